@@ -0,0 +1,112 @@
+"""Per-request CPU of decoding a tools/call request.
+
+Compares the previous path (Werkzeug `get_json`) with reading the body and
+decoding it with `codec.loads`, for a small and a ~1 MB arguments payload,
+using each available codec. Both paths then validate the envelope and params,
+this is shallow since `dict[str, Any]` values are not traversed by pydantic.
+
+Building the Werkzeug request is measured separately and subtracted.
+
+Usage:
+    python benchmarks/bench_decode.py
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import time
+
+from werkzeug.wrappers import Request
+
+from frappe_mcp.server import codec, types
+
+
+def get_body(size: int) -> bytes:
+    rows = [
+        {'name': f'TODO-{i:06}', 'status': 'Open', 'priority': i % 3}
+        for i in range(size)
+    ]
+    data = {
+        'jsonrpc': '2.0',
+        'id': 1,
+        'method': 'tools/call',
+        'params': {
+            'name': 'import_rows',
+            'arguments': {'doctype': 'ToDo', 'rows': rows},
+        },
+    }
+    return json.dumps(data).encode()
+
+
+def get_request(body: bytes) -> Request:
+    return Request.from_values(
+        method='POST',
+        content_type='application/json',
+        input_stream=io.BytesIO(body),
+    )
+
+
+def build_request(body: bytes):
+    return get_request(body)
+
+
+def decode_get_json(body: bytes):
+    data = get_request(body).get_json(force=True)
+    return validate(data)
+
+
+def decode_codec(body: bytes):
+    data = codec.loads(get_request(body).get_data())
+    return validate(data)
+
+
+def validate(data):
+    rpc_request = types.JSONRPCRequest.model_validate(data)
+    return types.CallToolRequestParams.model_validate(rpc_request.params)
+
+
+def bench(fn, body: bytes, number: int, repeat: int = 5) -> float:
+    """Returns the best per-call time in seconds out of `repeat` runs."""
+    fn(body)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(body)
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+
+def get_codecs() -> list[codec.JSONCodec]:
+    codecs: list[codec.JSONCodec] = [codec.StdlibCodec()]
+    try:
+        codecs.append(codec.OrjsonCodec())
+    except ImportError:
+        pass
+    return codecs
+
+
+def main():
+    cases = [('small', get_body(1), 5_000), ('1 MB', get_body(20_000), 20)]
+    default = codec.get_codec()
+
+    print(
+        f'{"payload":>8} {"bytes":>9} {"codec":>7} {"get_json":>12} {"codec":>12} {"speedup":>8}'
+    )
+    for label, body, number in cases:
+        overhead = bench(build_request, body, number)
+        before = bench(decode_get_json, body, number) - overhead
+        for c in get_codecs():
+            codec.set_codec(c)
+            after = bench(decode_codec, body, number) - overhead
+            print(
+                f'{label:>8} {len(body):>9} {c.name:>7} {before * 1e6:>10.1f}us'
+                f' {after * 1e6:>10.1f}us {before / after:>7.2f}x'
+            )
+
+    codec.set_codec(default)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Per-request CPU of answering tools/list with ~800 registered tools.
+
+Compares building the result on every call (validating each tool and
+serializing the result, the previous path) with the cached list result of a
+`Registry`.
+
+Usage:
+    python benchmarks/bench_list_tools.py
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+
+from frappe_mcp.server import codec, tools
+from frappe_mcp.server.registry import Registry
+
+
+def get_tool(i: int) -> tools.Tool:
+    def fn(name: str, fields: list[str] | None = None, limit: int = 20):
+        """Get documents of a DocType.
+
+        Args:
+            name: Name of the document.
+            fields: Fields to return.
+            limit: Maximum number of documents.
+        """
+
+    return tools.get_tool(fn, tools.ToolOptions(name=f'get_doctype_{i:03}'))
+
+
+def list_tools(registry):
+    # A plain mapping is listed uncached, a Registry returns its cached result
+    result = tools.handle_list_tools({}, registry)
+    return bytes(codec.encode(result))
+
+
+def bench(fn, registry, number: int, repeat: int = 5) -> float:
+    """Returns the best per-call time in seconds out of `repeat` runs."""
+    fn(registry)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(registry)
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+
+def main():
+    plain: OrderedDict[str, tools.Tool] = OrderedDict()
+    registry = Registry('tools', tools.get_tool_description)
+    for i in range(800):
+        tool = get_tool(i)
+        plain[tool['name']] = tool
+        registry[tool['name']] = tool
+
+    assert list_tools(plain) == list_tools(registry)
+
+    before = bench(list_tools, plain, 20)
+    after = bench(list_tools, registry, 20_000)
+    print(f'{"tools":>6} {"uncached":>12} {"cached":>12} {"speedup":>9}')
+    print(
+        f'{len(plain):>6} {before * 1e6:>10.1f}us {after * 1e6:>10.1f}us {before / after:>8.0f}x'
+    )
+
+
+if __name__ == '__main__':
+    main()
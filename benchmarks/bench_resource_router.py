@@ -0,0 +1,84 @@
+"""Per-lookup time of matching a resources/read URI against N resource templates.
+
+Templates are one per DocType, e.g. 'frappe://doc/Sales Invoice 42/{name}',
+along with a few generic ones. The linear scan, the previous path, tries the
+compiled pattern of each template in turn. The router follows the segments of
+the URI through a trie of the templates.
+
+Usage:
+    python benchmarks/bench_resource_router.py
+"""
+
+from __future__ import annotations
+
+import time
+
+from frappe_mcp.server.registry import Registry
+from frappe_mcp.server.resources import (
+    TemplateRouter,
+    get_resource,
+    get_template_description,
+)
+from frappe_mcp.server.resources.uri_template import match_uri
+
+
+def get_doc(doctype: str = '', name: str = '', path: str = ''):
+    pass
+
+
+def get_registry(count: int) -> Registry:
+    registry = Registry('resourceTemplates', get_template_description)
+    for i in range(count):
+        uri_template = f'frappe://doc/DocType%20{i}/{{name}}'
+        registry[uri_template] = get_resource(get_doc, uri_template)
+    for uri_template in (
+        'frappe://doc/{doctype}/{name}',
+        'frappe://file/{doctype}/{name}/{+path}',
+    ):
+        registry[uri_template] = get_resource(get_doc, uri_template)
+    return registry
+
+
+def scan(registry: Registry, uri: str):
+    for template in registry.values():
+        if (arguments := match_uri(template['pattern'], uri)) is not None:
+            return template, arguments
+    return None
+
+
+def bench(fn, args: tuple, number: int, repeat: int = 5) -> float:
+    """Returns the best per-call time in seconds out of `repeat` runs."""
+    fn(*args)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(*args)
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+
+def main():
+    print(f'{"templates":>9} {"uri":>8} {"scan":>12} {"router":>12} {"speedup":>9}')
+    for count in (10, 1_000, 10_000):
+        registry = get_registry(count)
+        router = TemplateRouter(registry)
+        uris = {
+            # The last DocType, worst case for the scan
+            'doctype': f'frappe://doc/DocType%20{count - 1}/SINV-0001',
+            'generic': 'frappe://doc/User/admin',
+            'path': 'frappe://file/User/admin/private/files/a.png',
+        }
+        for label, uri in uris.items():
+            assert scan(registry, uri) == router.match(uri)
+            number = max(10, 100_000 // count)
+            before = bench(scan, (registry, uri), number)
+            after = bench(router.match, (uri,), 20_000)
+            print(
+                f'{count:>9} {label:>8} {before * 1e6:>10.1f}us '
+                f'{after * 1e6:>10.2f}us {before / after:>8.0f}x'
+            )
+
+
+if __name__ == '__main__':
+    main()
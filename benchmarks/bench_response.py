@@ -0,0 +1,84 @@
+"""Latency and peak memory of encoding a large tools/call response.
+
+Compares the previous path (`CallToolResult.model_dump`, wrapping the dict in
+a `JSONRPCSuccessResponse` and calling `model_dump_json`) with
+`server.get_success_response`, which serializes the typed result once and
+writes the envelope around the encoded bytes.
+
+Usage:
+    python benchmarks/bench_response.py
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import tracemalloc
+
+from frappe_mcp.server import types
+from frappe_mcp.server.server import get_success_response
+
+
+def get_result(rows: int) -> types.CallToolResult:
+    data = {
+        'rows': [
+            {
+                'name': f'TODO-{i:06}',
+                'status': 'Open',
+                'description': 'x' * 40,
+                'priority': i % 3,
+            }
+            for i in range(rows)
+        ]
+    }
+    return types.CallToolResult(
+        content=[types.TextContent(text=json.dumps(data))],
+        structuredContent=data,
+        isError=False,
+    )
+
+
+def encode_revalidate(result: types.CallToolResult) -> bytes:
+    data = result.model_dump(exclude_none=True, by_alias=True)
+    response = types.JSONRPCSuccessResponse(id=1, result=data)
+    return response.model_dump_json(exclude_none=True, by_alias=True).encode()
+
+
+def encode_direct(result: types.CallToolResult) -> list[bytes]:
+    # Chunks are written to the response as is
+    return get_success_response(1, result).chunks
+
+
+def measure(fn, result, number: int = 5) -> tuple[float, int, int]:
+    """Returns (best seconds per call, peak bytes allocated, output size)."""
+    out = fn(result)
+    size = len(out) if isinstance(out, bytes) else sum(len(c) for c in out)
+    del out
+
+    times = []
+    for _ in range(number):
+        start = time.perf_counter()
+        fn(result)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(result)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak, size
+
+
+def main():
+    print(f'{"rows":>7} {"size":>9} {"path":>11} {"time":>10} {"peak memory":>12}')
+    for rows in (10_000, 50_000):
+        result = get_result(rows)
+        for label, fn in (('revalidate', encode_revalidate), ('direct', encode_direct)):
+            seconds, peak, size = measure(fn, result)
+            print(
+                f'{rows:>7} {size / 2**20:>7.1f}MB {label:>11} {seconds * 1e3:>8.1f}ms'
+                f' {peak / 2**20:>10.1f}MB'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Latency and output of encoding a tool's `frappe.get_all` style result.
+
+Rows hold dates, datetimes and `Decimal` values as returned by Frappe. The
+previous path calls `json.dumps` on the result, which fails on these types, so
+the tool's result is sent as its `str()` in a text block and has no structured
+content. The encoder path encodes the result once with the registered type
+handlers and writes that JSON as both the text and the structured content.
+
+Usage:
+    python benchmarks/bench_result_encode.py
+"""
+
+from __future__ import annotations
+
+import datetime
+import decimal
+import json
+import time
+
+from frappe_mcp.server import codec, types
+from frappe_mcp.server.tools import get_tool
+from frappe_mcp.server.tools.handlers import _get_result
+
+
+class FrappeDict(dict):
+    # Like frappe._dict
+    __getattr__ = dict.get
+
+
+def get_rows(count: int) -> list[dict]:
+    modified = datetime.datetime(2025, 1, 31, 10, 30, 5, 120000)
+    return [
+        FrappeDict(
+            name=f'SINV-{i:06}',
+            customer=f'CUST-{i % 250:04}',
+            posting_date=datetime.date(2025, 1, 1) + datetime.timedelta(days=i % 365),
+            modified=modified,
+            grand_total=decimal.Decimal(i) / 4,
+            status='Paid',
+        )
+        for i in range(count)
+    ]
+
+
+def encode_fallback(result: dict) -> bytes:
+    try:
+        text = json.dumps(result)
+    except Exception:
+        text = str(result)
+    call_result = types.CallToolResult(
+        content=[types.TextContent(text=text)], isError=False
+    )
+    return bytes(codec.encode(call_result))
+
+
+def encode_result(result: dict) -> bytes:
+    def get_invoices():
+        """Returns invoices."""
+        return result
+
+    return bytes(codec.encode(_get_result(get_tool(get_invoices), {})))
+
+
+def measure(fn, result, number: int = 5) -> tuple[float, int]:
+    """Returns (best seconds per call, output size)."""
+    size = len(fn(result))
+    times = []
+    for _ in range(number):
+        start = time.perf_counter()
+        fn(result)
+        times.append(time.perf_counter() - start)
+    return min(times), size
+
+
+def main():
+    print(f'codec: {codec.get_codec().name}')
+    print(f'{"rows":>7} {"path":>9} {"time":>10} {"size":>9}  structured')
+    for count in (10_000, 50_000):
+        result = {'rows': get_rows(count)}
+        for label, fn in (('fallback', encode_fallback), ('encoder', encode_result)):
+            seconds, size = measure(fn, result)
+            structured = b'"structuredContent"' in fn(result)
+            print(
+                f'{count:>7} {label:>9} {seconds * 1e3:>8.1f}ms'
+                f' {size / 2**20:>7.1f}MB  {structured}'
+            )
+
+
+if __name__ == '__main__':
+    main()
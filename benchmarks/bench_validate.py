@@ -0,0 +1,104 @@
+"""Per-call CPU of validating tools/call arguments against the input schema.
+
+Compares `jsonschema.validate` (the previous path in `run_tool`, which checks
+the schema and creates a validator on every call) with a jsonschema validator
+created once, and with the validator generated by `compile_validator`.
+
+Usage:
+    python benchmarks/bench_validate.py
+"""
+
+from __future__ import annotations
+
+import time
+from functools import partial
+
+import jsonschema
+
+from frappe_mcp.server.tools.validator import compile_validator
+
+FLAT_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'doctype': {'type': 'string'},
+        'name': {'type': 'string'},
+        'limit': {'type': 'integer', 'minimum': 1},
+    },
+    'required': ['doctype', 'name'],
+}
+
+DEEP_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'doctype': {'type': 'string'},
+        'rows': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'name': {'type': 'string', 'minLength': 1},
+                    'status': {'enum': ['Open', 'Closed']},
+                    'priority': {'type': 'integer'},
+                    'tags': {'type': 'array', 'items': {'type': 'string'}},
+                },
+                'required': ['name', 'status'],
+                'additionalProperties': False,
+            },
+        },
+    },
+    'required': ['doctype', 'rows'],
+}
+
+
+def get_cases():
+    rows = [
+        {
+            'name': f'TODO-{i:06}',
+            'status': 'Open',
+            'priority': i % 3,
+            'tags': ['a', 'b'],
+        }
+        for i in range(100)
+    ]
+    return [
+        (
+            'flat',
+            FLAT_SCHEMA,
+            {'doctype': 'ToDo', 'name': 'TODO-000001', 'limit': 10},
+            1_000,
+        ),
+        ('deep', DEEP_SCHEMA, {'doctype': 'ToDo', 'rows': rows}, 50),
+    ]
+
+
+def bench(fn, instance, number: int, repeat: int = 5) -> float:
+    """Returns the best per-call time in seconds out of `repeat` runs."""
+    fn(instance)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(instance)
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+
+def main():
+    print(
+        f'{"schema":>7} {"validate":>12} {"cached":>12} {"compiled":>12} {"speedup":>8}'
+    )
+    for label, schema, instance, number in get_cases():
+        validator = jsonschema.validators.validator_for(schema)(schema)
+        compiled = compile_validator(schema)
+
+        before = bench(partial(jsonschema.validate, schema=schema), instance, number)
+        reused = bench(validator.validate, instance, number)
+        after = bench(compiled, instance, number)
+        print(
+            f'{label:>7} {before * 1e6:>10.1f}us {reused * 1e6:>10.1f}us'
+            f' {after * 1e6:>10.1f}us {before / after:>7.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,16 @@
 import frappe_mcp.server as server
+from frappe_mcp.server.context import Context
 from frappe_mcp.server.server import MCP
 from frappe_mcp.server.tools import Tool, ToolAnnotations
 from frappe_mcp.server.types import PromptMessage, TextContent
 
-__all__ = ['MCP', 'PromptMessage', 'TextContent', 'Tool', 'ToolAnnotations', 'server']
+__all__ = [
+    'MCP',
+    'Context',
+    'PromptMessage',
+    'TextContent',
+    'Tool',
+    'ToolAnnotations',
+    'server',
+]
 __version__ = '0.1.1'
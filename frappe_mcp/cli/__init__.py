@@ -54,6 +54,32 @@ def check(app: str | None = None, verbose: bool = False):
             print()
 
 
+@run.command('compile')
+@click.option('--app', '-a', help='Compile only a specific app')
+def compile_manifests(app: str | None = None):
+    """Compile the tool, prompt and resource manifests of MCP handlers"""
+    try:
+        import frappe  # noqa: F401
+    except ImportError:
+        click.secho('Not running in a Frappe site', fg='red')
+        return
+
+    apps = [app] if app else utils.get_apps_using_frappe_mcp()
+    if not apps:
+        click.secho('No apps found using frappe_mcp', fg='yellow')
+
+    for i, app in enumerate(apps):
+        handlers = utils.find_mcp_handlers_in_app(app)
+        if not handlers:
+            click.echo(f'No MCP handler found for {click.style(app, bold=True)}')
+            continue
+
+        utils.compile_manifests(app, handlers)
+
+        if i < len(apps) - 1:
+            print()
+
+
 def get_version():
     from pathlib import Path
 
@@ -7,6 +7,7 @@ from textwrap import indent
 import click
 
 from frappe_mcp.server import MCP
+from frappe_mcp.server.manifest import write_manifest
 
 dim_bullet = click.style('*', dim=True)
 green_check = click.style('✓', fg='green')
@@ -101,6 +102,38 @@ def check(app: str, handlers: list[tuple[Path, MCP]], verbose: bool = False):
                     click.echo(f' {green_check}')
 
 
+def compile_manifests(app: str, handlers: list[tuple[Path, MCP]]):
+    if not len(handlers):
+        return
+
+    click.secho(app + ':', bold=True)
+    for p, m in handlers:
+        path = get_app_relative_path(app, p)
+        if m._mcp_entry_fn is None:
+            click.echo(f'{dim_bullet} handler not properly registered: {path} {red_x}')
+            continue
+
+        if m._manifest is None:
+            click.echo(
+                f'{dim_bullet} manifest not set, pass MCP(manifest=...): {path} {yellow_o}'
+            )
+            continue
+
+        try:
+            m._mcp_entry_fn()
+            write_manifest(m, m._manifest)
+        except Exception as e:
+            click.echo(f'{dim_bullet} manifest error: {e} {red_x}')
+            continue
+
+        click.echo(
+            f'{dim_bullet} manifest: {m._manifest} '
+            f'({len(m._tool_registry)} tools, {len(m._prompt_registry)} prompts, '
+            f'{len(m._resource_registry) + len(m._template_registry)} resources) '
+            f'{green_check}'
+        )
+
+
 def get_mcp_url(mcp_entry_fn) -> str:
     handler_path = '.'.join([mcp_entry_fn.__module__, mcp_entry_fn.__name__])
 
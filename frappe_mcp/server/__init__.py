@@ -1,4 +1,5 @@
+from frappe_mcp.server.context import Context
 from frappe_mcp.server.server import MCP
 from frappe_mcp.server.tools import Tool, ToolAnnotations
 
-__all__ = ['MCP', 'Tool', 'ToolAnnotations']
+__all__ = ['MCP', 'Context', 'Tool', 'ToolAnnotations']
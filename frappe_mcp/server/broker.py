@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any
+
+__all__ = [
+    'BROADCAST',
+    'CANCELLED',
+    'RESOURCES_UPDATED',
+    'Broker',
+    'InProcessBroker',
+    'RedisBroker',
+    'Subscription',
+    'get_session_channel',
+]
+
+# The server's own channels start with `mcp:` and the channel of a session
+# with `session:`, so a client can't pick an `Mcp-Session-Id` that names one
+# of the server's channels.
+
+# Channel that all streams are subscribed to.
+BROADCAST = 'mcp:broadcast'
+# Channel on which cancelled tool calls are sent to all worker processes.
+CANCELLED = 'mcp:cancelled'
+# Channel on which changed resources are sent to all worker processes.
+RESOURCES_UPDATED = 'mcp:resources_updated'
+
+
+def get_session_channel(session_id: str) -> str:
+    """Returns the channel of the GET stream of the session `session_id`."""
+    return f'session:{session_id}'
+
+
+class Subscription:
+    """Receives messages published on a set of channels."""
+
+    def get(self, timeout: float) -> dict[str, Any] | None:
+        """Blocks until a message is available or `timeout` seconds pass.
+
+        Returns None if no message was received in time.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class Broker:
+    """Publishes server to client messages to subscribed streams.
+
+    Messages published on a channel are delivered to every open subscription
+    of that channel. The GET SSE stream of an MCP endpoint subscribes to the
+    broadcast channel and, if the client has one, to its session's channel.
+
+    `InProcessBroker` only delivers messages published in the same process.
+    When running multiple workers (e.g. Gunicorn) a shared broker such as
+    `RedisBroker` should be used so that a message published by one worker
+    reaches the streams held open by the others. Other message queues can be
+    used by implementing `publish` and `subscribe`.
+    """
+
+    def publish(self, channel: str, message: dict[str, Any]):
+        raise NotImplementedError
+
+    def subscribe(self, channels: list[str]) -> Subscription:
+        raise NotImplementedError
+
+
+class InProcessBroker(Broker):
+    """Delivers messages to subscriptions in the current process.
+
+    Each subscription buffers at most `max_pending` messages. If a client
+    does not keep up the oldest messages are dropped so that a slow stream
+    can't grow memory without bound, the number of dropped messages is kept
+    in `Subscription.dropped`.
+    """
+
+    def __init__(self, *, max_pending: int = 100):
+        self.max_pending = max_pending
+        self._channels: dict[str, set[_InProcessSubscription]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, message: dict[str, Any]):
+        with self._lock:
+            subscriptions = list(self._channels.get(channel, ()))
+
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    def subscribe(self, channels: list[str]) -> Subscription:
+        subscription = _InProcessSubscription(self, channels)
+        with self._lock:
+            for channel in channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: _InProcessSubscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscriptions = self._channels.get(channel)
+                if subscriptions is None:
+                    continue
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._channels[channel]
+
+
+class _InProcessSubscription(Subscription):
+    def __init__(self, broker: InProcessBroker, channels: list[str]):
+        self.broker = broker
+        self.channels = channels
+        self.dropped = 0
+        self._messages: deque[dict[str, Any]] = deque()
+        self._condition = threading.Condition()
+
+    def put(self, message: dict[str, Any]):
+        with self._condition:
+            if len(self._messages) >= self.broker.max_pending:
+                self._messages.popleft()
+                self.dropped += 1
+            self._messages.append(message)
+            self._condition.notify()
+
+    def get(self, timeout: float) -> dict[str, Any] | None:
+        with self._condition:
+            # Blocks on the condition, the thread sleeps until a message is
+            # put or the timeout passes.
+            if not self._messages and not self._condition.wait(timeout):
+                return None
+            return self._messages.popleft() if self._messages else None
+
+    def close(self):
+        self.broker._unsubscribe(self)
+
+
+class FileBroker(Broker):
+    """Delivers messages between processes using append-only files.
+
+    Every channel is a file of newline delimited JSON in `directory`.
+    Subscriptions read messages appended after they were opened, checking for
+    new messages every `poll_interval` seconds.
+
+    Only meant for tests that stand in for multiple worker processes. Channel
+    files are never truncated or removed, so it isn't exported and shouldn't
+    be used to serve clients, use `RedisBroker` instead.
+    """
+
+    def __init__(self, directory: str | os.PathLike, *, poll_interval: float = 0.25):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.poll_interval = poll_interval
+
+    def publish(self, channel: str, message: dict[str, Any]):
+        line = json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+        # A single write to a file opened with O_APPEND is not interleaved
+        # with writes from other processes.
+        fd = os.open(
+            self._get_path(channel), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+        )
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def subscribe(self, channels: list[str]) -> Subscription:
+        return _FileSubscription(self, [self._get_path(c) for c in channels])
+
+    def _get_path(self, channel: str) -> Path:
+        name = hashlib.sha1(channel.encode()).hexdigest()
+        return self.directory / f'{name}.jsonl'
+
+
+class _FileSubscription(Subscription):
+    def __init__(self, broker: FileBroker, paths: list[Path]):
+        self.broker = broker
+        self.paths = paths
+        self._offsets = {p: p.stat().st_size if p.exists() else 0 for p in paths}
+        self._messages: deque[dict[str, Any]] = deque()
+
+    def get(self, timeout: float) -> dict[str, Any] | None:
+        deadline = time.monotonic() + timeout
+        while True:
+            if not self._messages:
+                self._read()
+            if self._messages:
+                return self._messages.popleft()
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(self.broker.poll_interval, remaining))
+
+    def _read(self):
+        for path, offset in self._offsets.items():
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                continue
+            if size <= offset:
+                continue
+
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read(size - offset)
+
+            # Only consume complete lines, a write may be in progress
+            end = data.rfind(b'\n') + 1
+            self._offsets[path] = offset + end
+            for line in data[:end].splitlines():
+                self._messages.append(json.loads(line))
+
+    def close(self):
+        self._messages.clear()
+
+
+class RedisBroker(Broker):
+    """Delivers messages between processes using Redis pub/sub.
+
+    Args:
+        client: A `redis.Redis` client, in a Frappe app the site's
+            `frappe.cache` connection.
+        prefix: Prefix added to channel names.
+    """
+
+    def __init__(self, client: Any, *, prefix: str = 'frappe_mcp:'):
+        self.client = client
+        self.prefix = prefix
+
+    def publish(self, channel: str, message: dict[str, Any]):
+        self.client.publish(self.prefix + channel, json.dumps(message))
+
+    def subscribe(self, channels: list[str]) -> Subscription:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(*(self.prefix + c for c in channels))
+        return _RedisSubscription(pubsub)
+
+
+class _RedisSubscription(Subscription):
+    def __init__(self, pubsub: Any):
+        self.pubsub = pubsub
+
+    def get(self, timeout: float) -> dict[str, Any] | None:
+        deadline = time.monotonic() + timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            # Waits on the socket, returns early for control messages
+            message = self.pubsub.get_message(timeout=remaining)
+            if message is not None and message.get('type') == 'message':
+                return json.loads(message['data'])
+        return None
+
+    def close(self):
+        self.pubsub.close()
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+from frappe_mcp.server.context import CancellationToken
+from frappe_mcp.server.errors import ServerBusyError
+
+if TYPE_CHECKING:
+    from frappe_mcp.server.tools import Tool
+
+__all__ = ['Bulkhead', 'Bulkheads']
+
+# Seconds between checks of a queued call's cancellation token.
+_POLL_INTERVAL = 0.05
+
+
+class Bulkhead:
+    """A semaphore that counts the calls holding and waiting for it.
+
+    Args:
+        limit: Maximum number of calls holding it at a time, unlimited if None.
+    """
+
+    def __init__(self, limit: int | None = None):
+        self.limit = limit
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, deadline: float | None, token: CancellationToken) -> bool:
+        """Waits for a free slot until `deadline`, a `time.monotonic` value.
+
+        Returns False if there is no free slot by the deadline.
+
+        Raises:
+            MCPError: The token's error, if it is cancelled while waiting.
+        """
+        with self._condition:
+            if self.limit is None or self.in_flight < self.limit:
+                self.in_flight += 1
+                return True
+
+            self.queued += 1
+            try:
+                while self.in_flight >= self.limit:
+                    if token.error is not None:
+                        raise token.error
+
+                    wait = _POLL_INTERVAL
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.rejected += 1
+                            return False
+                        wait = min(wait, remaining)
+                    self._condition.wait(wait)
+
+                self.in_flight += 1
+                return True
+            finally:
+                self.queued -= 1
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def get_stats(self) -> dict[str, int | None]:
+        with self._condition:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'rejected': self.rejected,
+            }
+
+
+class Bulkheads:
+    """Limits the number of concurrent calls to each tool and to each tag of
+    tools, so that a burst of calls to a slow tool can't take up every worker
+    thread.
+
+    A call holds a slot of the tool's bulkhead, limited by the tool's
+    `concurrency`, and of the bulkhead of each of its tags. When these are
+    taken the call is queued for at most the tool's `queue_timeout`, or
+    `queue_timeout`, after which a `ServerBusyError` is raised. Calls are
+    counted for every tool, whether limited or not.
+
+    Args:
+        tag_limits: Maximum number of concurrent calls to the tools with a
+            tag, by tag.
+        queue_timeout: Seconds a call waits for a free slot, calls wait until
+            they are cancelled if None.
+    """
+
+    def __init__(
+        self,
+        tag_limits: dict[str, int] | None = None,
+        *,
+        queue_timeout: float | None = None,
+    ):
+        self.tag_limits = tag_limits or {}
+        self.queue_timeout = queue_timeout
+        self._tools: dict[str, Bulkhead] = {}
+        self._tags: dict[str, Bulkhead] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tool: Tool) -> list[Bulkhead]:
+        """Returns the bulkheads of the tool's tags, ordered by tag, followed
+        by the tool's own bulkhead."""
+        name = tool['name']
+        tags = sorted(set(tool.get('tags') or ()))
+        with self._lock:
+            bulkheads = []
+            for tag in tags:
+                if (bulkhead := self._tags.get(tag)) is None:
+                    bulkhead = self._tags[tag] = Bulkhead(self.tag_limits.get(tag))
+                bulkheads.append(bulkhead)
+
+            if (bulkhead := self._tools.get(name)) is None:
+                bulkhead = self._tools[name] = Bulkhead(tool.get('concurrency'))
+            bulkheads.append(bulkhead)
+        return bulkheads
+
+    def acquire(self, tool: Tool, token: CancellationToken) -> Callable[[], None]:
+        """Takes a slot of each of the tool's bulkheads and returns the
+        function that releases them.
+
+        Bulkheads are acquired in the same order by every call, so calls
+        waiting on each other's slots can't deadlock.
+
+        Raises:
+            ServerBusyError: If a slot isn't free within the queue timeout.
+            MCPError: The token's error, if it is cancelled while waiting.
+        """
+        if (timeout := tool.get('queue_timeout')) is None:
+            timeout = self.queue_timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        acquired: list[Bulkhead] = []
+
+        def release():
+            while acquired:
+                acquired.pop().release()
+
+        try:
+            for bulkhead in self.get(tool):
+                if not bulkhead.acquire(deadline, token):
+                    raise ServerBusyError(
+                        f"Tool '{tool['name']}' is busy, retry the call later",
+                        data={'retryable': True},
+                    )
+                acquired.append(bulkhead)
+        except BaseException:
+            release()
+            raise
+        return release
+
+    def get_stats(self) -> dict[str, dict[str, dict[str, int | None]]]:
+        """Returns the limit and the number of in flight, queued and rejected
+        calls of each tool and tag that has been called."""
+        with self._lock:
+            tools = dict(self._tools)
+            tags = dict(self._tags)
+        return {
+            'tools': {name: b.get_stats() for name, b in tools.items()},
+            'tags': {tag: b.get_stats() for tag, b in tags.items()},
+        }
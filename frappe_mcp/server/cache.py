@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
+
+from frappe_mcp.server.sqlite import SQLiteConnections
+
+if TYPE_CHECKING:
+    from frappe_mcp.server.tools import Tool
+
+__all__ = [
+    'Cache',
+    'MemoryCache',
+    'ReadCache',
+    'RedisCache',
+    'ResultCache',
+    'SQLiteCache',
+]
+
+
+class Cache:
+    """Stores encoded values with a time to live.
+
+    `MemoryCache` only caches in the current process. When running multiple
+    workers a shared cache such as `RedisCache` lets a result computed by one
+    worker be reused by the others. Other backends implement `get`, `set`
+    and `clear`.
+    """
+
+    def get(self, key: str) -> bytes | None:
+        """Returns the value for `key`, or None if it is missing or expired."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float):
+        """Stores `value` for `ttl` seconds."""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryCache(Cache):
+    """Caches values in the current process.
+
+    Least recently used values are evicted once more than `max_entries` values,
+    or values totalling more than `max_bytes`, are stored.
+    """
+
+    def __init__(self, *, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._values: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            item = self._values.get(key)
+            if item is None:
+                return None
+
+            expires, value = item
+            if expires <= time.monotonic():
+                self._remove(key)
+                return None
+
+            self._values.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float):
+        if len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._values:
+                self._remove(key)
+            self._values[key] = (time.monotonic() + ttl, value)
+            self._size += len(value)
+
+            while len(self._values) > self.max_entries or self._size > self.max_bytes:
+                self._remove(next(iter(self._values)))
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._size = 0
+
+    def _remove(self, key: str):
+        _, value = self._values.pop(key)
+        self._size -= len(value)
+
+
+class SQLiteCache(Cache):
+    """Caches values in an SQLite database shared by processes on a machine.
+
+    Useful for tests, or when all workers run on one machine without Redis.
+    Once more than `max_entries` values are stored the ones closest to
+    expiring are evicted.
+    """
+
+    def __init__(self, path: str | os.PathLike, *, max_entries: int = 10_000):
+        self.path = os.fspath(path)
+        self.max_entries = max_entries
+        self._connections = SQLiteConnections(self.path)
+        self._connections.get().execute(
+            'create table if not exists cache '
+            '(key text primary key, value blob not null, expires real not null)'
+        )
+
+    def get(self, key: str) -> bytes | None:
+        row = (
+            self._connections.get()
+            .execute(
+                'select value from cache where key = ? and expires > ?',
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return None if row is None else row[0]
+
+    def set(self, key: str, value: bytes, ttl: float):
+        now = time.time()
+        with self._connections.get() as connection:
+            connection.execute(
+                'insert or replace into cache (key, value, expires) values (?, ?, ?)',
+                (key, value, now + ttl),
+            )
+            connection.execute('delete from cache where expires <= ?', (now,))
+            connection.execute(
+                'delete from cache where key in '
+                '(select key from cache order by expires desc limit -1 offset ?)',
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._connections.get() as connection:
+            connection.execute('delete from cache')
+
+
+class RedisCache(Cache):
+    """Caches values in Redis.
+
+    Args:
+        client: A `redis.Redis` client, e.g. `frappe.cache`.
+        prefix: Prefix added to keys.
+    """
+
+    def __init__(self, client: Any, *, prefix: str = 'frappe_mcp:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> bytes | None:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.client.set(self.prefix + key, value, px=max(int(ttl * 1000), 1))
+
+    def clear(self):
+        for key in self.client.scan_iter(match=f'{self.prefix}*'):
+            self.client.delete(key)
+
+
+class ResultCache:
+    """Caches the results of tool calls.
+
+    Only tools that are marked as cacheable are cached, by default these are
+    tools annotated with `readOnlyHint` or `idempotentHint`. Results are keyed
+    by the tool name and its arguments, and if `per_user` is set the user the
+    tool is called by. Results marked as errors are not cached.
+
+    Args:
+        backend: Where results are stored, defaults to a `MemoryCache`.
+        ttl: Seconds for which a result is reused, unless set on the tool.
+        per_user: Cache results separately for every user, in a Frappe app
+            this is the session user. Leave this set if tools return data
+            that depends on the user's permissions.
+    """
+
+    def __init__(
+        self,
+        backend: Cache | None = None,
+        *,
+        ttl: float = 60,
+        per_user: bool = True,
+    ):
+        self.backend = backend or MemoryCache()
+        self.ttl = ttl
+        self.per_user = per_user
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_ttl(self, tool: Tool) -> float | None:
+        """Returns the seconds for which results of the tool are cached, or
+        None if they are not cached."""
+        cache = tool.get('cache')
+        if cache is None:
+            annotations = tool.get('annotations') or {}
+            cache = bool(
+                annotations.get('readOnlyHint') or annotations.get('idempotentHint')
+            )
+
+        if cache is True:
+            return self.ttl
+        return cache or None
+
+    def get_key(self, tool_name: str, arguments: dict[str, Any]) -> str:
+        user = get_session_user() if self.per_user else None
+        canonical = json.dumps(
+            [user, arguments],
+            sort_keys=True,
+            separators=(',', ':'),
+            default=str,
+        )
+        digest = hashlib.sha256(canonical.encode()).hexdigest()
+        return f'result:{tool_name}:{digest}'
+
+    def get(self, key: str) -> bytes | None:
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.backend.set(key, value, ttl)
+
+    def clear(self):
+        self.backend.clear()
+
+    def get_stats(self) -> dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+class ReadCache:
+    """Caches the encoded results of resource reads.
+
+    Only resources that have a version are cached, i.e. registered with
+    `version` or returning a `File`. Results are keyed by the URI, the
+    version and the byte range that was read, and if `per_user` is set the
+    user the resource is read by. A result is reused until the resource's
+    version changes, `ttl` only bounds how long unused results are kept.
+
+    Args:
+        backend: Where results are stored, defaults to a `MemoryCache` that
+            keeps up to 64 MB of results evicting the least recently used.
+        ttl: Seconds for which a result is kept.
+        per_user: Cache results separately for every user, in a Frappe app
+            this is the session user.
+    """
+
+    def __init__(
+        self,
+        backend: Cache | None = None,
+        *,
+        ttl: float = 3600,
+        per_user: bool = True,
+    ):
+        self.backend = backend or MemoryCache()
+        self.ttl = ttl
+        self.per_user = per_user
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_key(self, uri: str, etag: str, read_range: tuple) -> str:
+        user = get_session_user() if self.per_user else None
+        canonical = json.dumps([user, uri, etag, read_range], separators=(',', ':'))
+        digest = hashlib.sha256(canonical.encode()).hexdigest()
+        return f'read:{digest}'
+
+    def get(self, key: str) -> bytes | None:
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes):
+        self.backend.set(key, value, self.ttl)
+
+    def clear(self):
+        self.backend.clear()
+
+    def get_stats(self) -> dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def get_session_user() -> str | None:
+    """Returns the user of the current Frappe request, if any."""
+    try:
+        import frappe
+    except ImportError:
+        return None
+
+    try:
+        return frappe.session.user
+    except (AttributeError, RuntimeError):
+        return None
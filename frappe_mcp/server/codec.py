@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import base64
+import json
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from pydantic import BaseModel
+
+__all__ = [
+    'Base64',
+    'JSONCodec',
+    'OrjsonCodec',
+    'RawJSON',
+    'StdlibCodec',
+    'dumps',
+    'encode',
+    'get_codec',
+    'loads',
+    'set_codec',
+]
+
+
+class JSONCodec:
+    """Encodes and decodes JSON, subclass this to plug in a different library.
+
+    `loads` must raise a `ValueError` for invalid JSON.
+    """
+
+    name: str
+
+    def loads(self, data: bytes | str) -> Any:
+        raise NotImplementedError
+
+    def dumps(self, obj: Any) -> bytes:
+        raise NotImplementedError
+
+
+class StdlibCodec(JSONCodec):
+    name = 'json'
+
+    def loads(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+class OrjsonCodec(JSONCodec):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def loads(self, data: bytes | str) -> Any:
+        return self._orjson.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._orjson.dumps(obj)
+
+
+def _get_default_codec() -> JSONCodec:
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        return StdlibCodec()
+
+
+_codec = _get_default_codec()
+
+
+def get_codec() -> JSONCodec:
+    return _codec
+
+
+def set_codec(codec: JSONCodec):
+    """Sets the codec used to decode requests and encode responses.
+
+    Defaults to `OrjsonCodec` if `orjson` is installed, else `StdlibCodec`.
+    """
+    global _codec
+    _codec = codec
+
+
+def loads(data: bytes | str) -> Any:
+    return _codec.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    return _codec.dumps(obj)
+
+
+class RawJSON:
+    """JSON that has already been encoded.
+
+    Handlers can return this in place of a result, it is written into the
+    response as is. The JSON is held as a list of chunks so that large
+    payloads can be assembled and written without being copied into a single
+    buffer. A chunk can be a `Base64` that is only encoded as it is written.
+    """
+
+    __slots__ = ('chunks',)
+
+    chunks: list[bytes | Base64]
+
+    def __init__(self, *chunks: bytes | Base64):
+        self.chunks = list(chunks)
+
+    def __len__(self) -> int:
+        return sum(len(c) for c in self.chunks)
+
+    def __bytes__(self) -> bytes:
+        if len(self.chunks) == 1 and isinstance(self.chunks[0], bytes):
+            return self.chunks[0]
+        return b''.join(self)
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self.chunks:
+            if isinstance(chunk, Base64):
+                yield from chunk
+            else:
+                yield chunk
+
+    def close(self):
+        for chunk in self.chunks:
+            if isinstance(chunk, Base64):
+                chunk.close()
+
+
+class Base64:
+    """The bytes of a buffer base64 encoded a chunk at a time as they are read.
+
+    The bytes from `start` up to `end` of `buffer`, e.g. a memory map, are
+    encoded `chunk_size` bytes at a time, a multiple of 3 so that the chunks
+    can be joined. `close` is called once all chunks have been read or the
+    `Base64` is closed, so the encoded bytes can only be read once.
+    """
+
+    __slots__ = ('_close', 'buffer', 'chunk_size', 'end', 'start')
+
+    def __init__(
+        self,
+        buffer: Any,
+        start: int,
+        end: int,
+        chunk_size: int,
+        *,
+        close: Callable[[], None] | None = None,
+    ):
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+        self.chunk_size = chunk_size
+        self._close = close
+
+    def __len__(self) -> int:
+        return 4 * ((self.end - self.start + 2) // 3)
+
+    def __bytes__(self) -> bytes:
+        return b''.join(self)
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            with memoryview(self.buffer) as view:
+                for position in range(self.start, self.end, self.chunk_size):
+                    end = min(position + self.chunk_size, self.end)
+                    with view[position:end] as chunk:
+                        yield base64.b64encode(chunk)
+        finally:
+            self.close()
+
+    def close(self):
+        close, self._close = self._close, None
+        if close is not None:
+            close()
+
+
+def encode(value: Any) -> RawJSON:
+    """Encodes a handler result, pydantic models are serialized directly."""
+    if isinstance(value, RawJSON):
+        return value
+    if isinstance(value, BaseModel):
+        return RawJSON(
+            value.__pydantic_serializer__.to_json(
+                value, exclude_none=True, by_alias=True
+            )
+        )
+    return RawJSON(dumps(value))
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from frappe_mcp.server import types
+from frappe_mcp.server.errors import MCPError
+
+__all__ = ['CancellationToken', 'Context']
+
+# Minimum seconds between progress notifications of a call, updates reported
+# more often are dropped.
+PROGRESS_INTERVAL = 0.25
+
+
+class Context:
+    """Gives a running tool access to the request it is serving.
+
+    A tool receives a context by declaring a parameter annotated with
+    `Context`, the parameter is not part of the tool's input schema.
+
+    Example:
+        >>> @mcp.tool()
+        ... def export_rows(doctype: str, ctx: Context):
+        ...     '''Export all rows of a DocType.'''
+        ...     for row in get_rows(doctype):
+        ...         ctx.raise_if_cancelled()
+        ...         ctx.send(row)
+
+    When the client accepts `text/event-stream` content sent using the
+    context is flushed to the client as it is produced, otherwise it is
+    collected and returned with the tool result.
+
+    `session_id` is the client's `Mcp-Session-Id`, if it has one, e.g. to key
+    data cached for the session.
+    """
+
+    def __init__(
+        self,
+        *,
+        send: Callable[[Any], None] | None = None,
+        token: CancellationToken | None = None,
+        progress_token: str | int | None = None,
+        notify: Callable[[types.JSONRPCNotification], None] | None = None,
+        session_id: str | None = None,
+    ):
+        self._send = send
+        self._token = token
+        self._notify = notify
+        self.progress_token = progress_token
+        self.session_id = session_id
+        self.content: list[Any] = []
+        self._progress: float | None = None
+        self._progress_time = float('-inf')
+
+    def send(self, content: Any):
+        """Sends a content block to the client.
+
+        Args:
+            content: A content block (e.g. `TextContent`), a string, or any
+                JSON serializable value.
+        """
+        if self._send is None:
+            self.content.append(content)
+            return
+        self._send(content)
+
+    def report_progress(
+        self,
+        progress: float,
+        total: float | None = None,
+        message: str | None = None,
+    ):
+        """Sends a progress notification to the client.
+
+        Does nothing if the client did not ask for progress, i.e. the request
+        has no `progressToken`. Updates are rate limited, and dropped if
+        `progress` has not increased, but the update that reaches `total` is
+        always sent.
+
+        Example:
+            >>> for i, row in enumerate(rows):
+            ...     import_row(row)
+            ...     ctx.report_progress(i + 1, len(rows))
+        """
+        if self.progress_token is None or self._notify is None:
+            return
+        if self._progress is not None and progress <= self._progress:
+            return
+
+        now = time.monotonic()
+        is_done = total is not None and progress >= total
+        if not is_done and now - self._progress_time < PROGRESS_INTERVAL:
+            return
+
+        self._progress = progress
+        self._progress_time = now
+        params = types.ProgressNotificationParams(
+            progressToken=self.progress_token,
+            progress=progress,
+            total=total,
+            message=message,
+        )
+        self._notify(
+            types.JSONRPCNotification(
+                method='notifications/progress',
+                params=params.model_dump(exclude_none=True),
+            )
+        )
+
+    @property
+    def cancelled(self) -> bool:
+        """True if the client cancelled the call or it timed out."""
+        return self._token is not None and self._token.cancelled
+
+    def raise_if_cancelled(self):
+        """Raises the cancellation error if the call has been cancelled.
+
+        Long running tools should call this periodically so that work stops
+        once the client has given up on the result.
+        """
+        if self._token is not None and self._token.error is not None:
+            raise self._token.error
+
+
+class CancellationToken:
+    """Signals that a running tool call should stop.
+
+    A token is created for every tool call, it is cancelled when the client
+    sends `notifications/cancelled` for the call or when the call times out.
+    """
+
+    def __init__(self):
+        self.error: MCPError | None = None
+        self._callbacks: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.error is not None
+
+    def cancel(self, error: MCPError):
+        """Cancels the call, `error` is returned to the client."""
+        with self._lock:
+            if self.error is not None:
+                return
+            self.error = error
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback: Callable[[], None]):
+        """Calls `callback` when the token is cancelled, or now if it already is."""
+        with self._lock:
+            if self.error is None:
+                self._callbacks.append(callback)
+                return
+        callback()
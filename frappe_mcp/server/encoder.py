@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import decimal
+import json
+import uuid
+from collections.abc import Callable
+from typing import Any, Literal
+
+from pydantic import BaseModel
+
+from frappe_mcp.server import codec
+
+__all__ = [
+    'ResultEncoder',
+    'get_result_encoder',
+    'register_type',
+    'set_result_encoder',
+]
+
+
+class ResultEncoder:
+    """Encodes values returned by tools as JSON.
+
+    Values are encoded in a single pass by the JSON library of the current
+    codec, types it can't encode natively are converted by the handler
+    registered for the type (or for one of its base classes).
+
+    Handlers for dates and times (ISO 8601), `Decimal`, sets, UUIDs,
+    namedtuples (as objects), dataclasses and pydantic models are registered
+    by default. `frappe._dict` is a dict and needs no handler.
+
+    Args:
+        decimal_as: Encode `Decimal` values as a JSON 'number' (a float, as
+            Frappe does) or as a 'string', which keeps their precision.
+    """
+
+    def __init__(self, *, decimal_as: Literal['number', 'string'] = 'number'):
+        self._handlers: dict[type, Callable[[Any], Any]] = {}
+        self._resolved: dict[type, Callable[[Any], Any] | None] = {}
+
+        for t in (datetime.datetime, datetime.date, datetime.time):
+            self.register(t, _isoformat)
+        self.register(decimal.Decimal, float if decimal_as == 'number' else str)
+        self.register(set, list)
+        self.register(frozenset, list)
+        self.register(uuid.UUID, str)
+        self.register(BaseModel, _dump_model)
+
+    def register(self, type_: type, handler: Callable[[Any], Any]):
+        """Registers a function that converts values of `type_`, and of its
+        subclasses, into a JSON serializable value.
+
+        Example:
+            >>> encoder.register(Money, lambda m: {'amount': m.amount, 'currency': m.currency})
+        """
+        self._handlers[type_] = handler
+        self._resolved.clear()
+
+    def dumps(self, value: Any) -> bytes:
+        """Encodes `value` as JSON.
+
+        Raises:
+            TypeError: If the value holds a type that has no handler.
+        """
+        if isinstance(codec.get_codec(), codec.OrjsonCodec):
+            import orjson
+
+            return orjson.dumps(
+                value, default=self.default, option=orjson.OPT_NON_STR_KEYS
+            )
+
+        return json.dumps(
+            value,
+            default=self.default,
+            separators=(',', ':'),
+            ensure_ascii=False,
+        ).encode()
+
+    def default(self, value: Any) -> Any:
+        """Converts a value the JSON library can't encode."""
+        cls = type(value)
+        try:
+            handler = self._resolved[cls]
+        except KeyError:
+            handler = self._resolved[cls] = self._resolve(cls)
+
+        if handler is None:
+            raise TypeError(f'Object of type {cls.__name__} is not JSON serializable')
+        return handler(value)
+
+    def _resolve(self, cls: type) -> Callable[[Any], Any] | None:
+        for base in cls.__mro__:
+            if (handler := self._handlers.get(base)) is not None:
+                return handler
+
+        if issubclass(cls, tuple) and hasattr(cls, '_fields'):
+            return _namedtuple_asdict
+        if dataclasses.is_dataclass(cls):
+            return _dataclass_asdict
+        return None
+
+
+def _isoformat(value: datetime.date | datetime.time) -> str:
+    return value.isoformat()
+
+
+def _dump_model(value: BaseModel) -> Any:
+    return value.model_dump(mode='json', by_alias=True)
+
+
+def _namedtuple_asdict(value: Any) -> dict[str, Any]:
+    return value._asdict()
+
+
+def _dataclass_asdict(value: Any) -> dict[str, Any]:
+    # Not dataclasses.asdict, nested values are converted when encoded
+    return {f.name: getattr(value, f.name) for f in dataclasses.fields(value)}
+
+
+_encoder = ResultEncoder()
+
+
+def get_result_encoder() -> ResultEncoder:
+    return _encoder
+
+
+def set_result_encoder(encoder: ResultEncoder):
+    """Sets the encoder used for tool results, e.g. to encode `Decimal`
+    values as strings:
+
+    Example:
+        >>> set_result_encoder(ResultEncoder(decimal_as='string'))
+    """
+    global _encoder
+    _encoder = encoder
+
+
+def register_type(type_: type, handler: Callable[[Any], Any]):
+    """Registers a handler for `type_` with the current result encoder."""
+    _encoder.register(type_, handler)
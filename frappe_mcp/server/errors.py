@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import Any
+
+from frappe_mcp.server import types
+
+__all__ = [
+    'MCPError',
+    'RequestCancelledError',
+    'RequestTimeoutError',
+    'ResourceNotFoundError',
+    'ServerBusyError',
+]
+
+
+class MCPError(Exception):
+    """An error that is returned to the client as a JSON-RPC error response.
+
+    Other exceptions raised by a tool are returned as a tool result with
+    `isError` set.
+    """
+
+    code: int = types.INTERNAL_ERROR
+
+    def __init__(self, message: str, *, code: int | None = None, data: Any = None):
+        super().__init__(message)
+        self.message = message
+        self.data = data
+        if code is not None:
+            self.code = code
+
+
+class RequestTimeoutError(MCPError):
+    """Raised when a tool call does not finish within its timeout."""
+
+    code = types.REQUEST_TIMEOUT
+
+
+class ResourceNotFoundError(MCPError):
+    """Raised when a resource that is read doesn't exist."""
+
+    code = types.RESOURCE_NOT_FOUND
+
+
+class ServerBusyError(MCPError):
+    """Raised when a tool call waits too long for a free slot, the client can
+    retry the call."""
+
+    code = types.SERVER_BUSY
+
+
+class RequestCancelledError(MCPError):
+    """Raised when a tool call is cancelled by the client."""
+
+    code = types.REQUEST_CANCELLED
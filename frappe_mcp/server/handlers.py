@@ -1,25 +1,50 @@
 from __future__ import annotations
 
+# Protocol versions the server can speak, latest first.
+SUPPORTED_PROTOCOL_VERSIONS = ['2025-06-18', '2025-03-26', '2024-11-05']
 
-def handle_initialize(params, name: str):
+# Protocol version from which tool results can have structured content.
+STRUCTURED_CONTENT_VERSION = '2025-06-18'
+
+
+def handle_initialize(
+    params, name: str, *, resources: bool = False, subscribe: bool = False
+):
     """
     Handles the initialize request from the client.
+
+    The protocol version requested by the client is used if it is supported,
+    otherwise the latest supported version is sent and the client decides
+    whether to continue. The resources capability is only sent if the server
+    has resources, `resources` is True, and supports subscriptions if the
+    server issues sessions, `subscribe` is True.
     """
+    version = get_protocol_version(params)
+    capabilities: dict = {
+        'tools': {'listChanged': False},
+        'prompts': {'listChanged': False},
+        # Not yet implemented
+        # "completions": {},
+        # "logging": {},
+    }
+    if resources:
+        capabilities['resources'] = {'subscribe': subscribe, 'listChanged': False}
+
     return {
-        'protocolVersion': '2025-03-26',
-        # "protocolVersion": "2024-11-05",
+        'protocolVersion': version,
         'serverInfo': {'name': name, 'version': '0.1.0'},
-        'capabilities': {
-            'tools': {'listChanged': False},
-            'prompts': {'listChanged': False},
-            # Not yet implemented
-            # "completions": {},
-            # "resources": {"subscribe": True, "listChanged": False},
-            # "logging": {},
-        },
+        'capabilities': capabilities,
     }
 
 
+def get_protocol_version(params) -> str:
+    """Returns the protocol version negotiated on initialize."""
+    version = params.get('protocolVersion')
+    if version not in SUPPORTED_PROTOCOL_VERSIONS:
+        version = SUPPORTED_PROTOCOL_VERSIONS[0]
+    return version
+
+
 def handle_ping(_):
     """
     Handles the ping request from the client.
@@ -36,27 +61,6 @@ def handle_set_level(_params):
     raise NotImplementedError('handle_set_level not implemented')
 
 
-def handle_list_resources(_params):
-    raise NotImplementedError('handle_list_resources not implemented')
-
-
-def handle_list_resource_templates(_params):
-    raise NotImplementedError('handle_list_resource_templates not implemented')
-
-
-def handle_read_resource(_params):
-    raise NotImplementedError('handle_read_resource not implemented')
-
-
-def handle_subscribe(_params):
-    raise NotImplementedError('handle_subscribe not implemented')
-
-
-def handle_unsubscribe(_params):
-    raise NotImplementedError('handle_unsubscribe not implemented')
-
-
-def handle_cancelled(_params): ...
 def handle_progress(_params): ...
 def handle_initialized(_params): ...
 def handle_roots_list_changed(_params): ...
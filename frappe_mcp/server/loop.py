@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import threading
+from collections.abc import AsyncIterator, Coroutine, Iterator
+from typing import Any, TypeVar
+
+from frappe_mcp.server.context import CancellationToken
+from frappe_mcp.server.process_local import ProcessLocal
+
+__all__ = ['get_loop', 'iter_async', 'run_coroutine']
+
+T = TypeVar('T')
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Returns the event loop that async tools are run on.
+
+    One loop is started per process, on first use, and runs for the lifetime
+    of the process in a daemon thread. Workers forked from a preloaded master
+    start their own loop.
+    """
+    loop, _ = _loop.get()
+    return loop
+
+
+def _start_loop() -> tuple[asyncio.AbstractEventLoop, threading.Thread]:
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(
+        target=_run_loop,
+        args=(loop,),
+        name='frappe-mcp-loop',
+        daemon=True,
+    )
+    thread.start()
+    return loop, thread
+
+
+def _run_loop(loop: asyncio.AbstractEventLoop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+_loop = ProcessLocal(_start_loop)
+
+
+def run_coroutine(
+    coro: Coroutine[Any, Any, T],
+    token: CancellationToken | None = None,
+) -> T:
+    """Runs `coro` on the shared loop and blocks until it is done.
+
+    The coroutine runs in a copy of the caller's context, so context
+    variables such as `frappe.local` are available to it. If `token` is
+    cancelled the coroutine is cancelled and the token's error is raised.
+    """
+    loop, thread = _loop.get()
+    if threading.current_thread() is thread:
+        coro.close()
+        raise RuntimeError('Cannot block on a coroutine from the event loop thread')
+
+    # The callback that schedules the coroutine runs in a copy of the
+    # current context, the task created by it inherits that context.
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    if token is not None:
+        token.add_callback(future.cancel)
+
+    try:
+        return future.result()
+    except concurrent.futures.CancelledError:
+        if token is not None and token.error is not None:
+            raise token.error from None
+        raise
+
+
+def iter_async(
+    iterator: AsyncIterator[T],
+    token: CancellationToken | None = None,
+) -> Iterator[T]:
+    """Iterates over an async iterator (e.g. an async generator) from sync code.
+
+    Each item is awaited on the shared loop.
+    """
+    try:
+        while True:
+            try:
+                yield run_coroutine(_anext(iterator), token)
+            except StopAsyncIteration:
+                return
+    finally:
+        if (aclose := getattr(iterator, 'aclose', None)) is not None:
+            run_coroutine(aclose())
+
+
+async def _anext(iterator: AsyncIterator[T]) -> T:
+    # run_coroutine_threadsafe only accepts coroutines, anext() returns an awaitable
+    return await iterator.__anext__()
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import importlib
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from frappe_mcp.server import codec, prompts, resources, tools
+from frappe_mcp.server.process import get_function_path, parse_function_path
+from frappe_mcp.server.resources.uri_template import compile_uri_template
+
+if TYPE_CHECKING:
+    from frappe_mcp.server.server import MCP
+
+__all__ = ['MANIFEST_VERSION', 'compile_manifest', 'load_manifest', 'write_manifest']
+
+# Bumped when the layout of the manifest changes, manifests of another
+# version are not loaded.
+MANIFEST_VERSION = 2
+
+# Keys of a tool, other than those in its description, kept in the manifest.
+_TOOL_KEYS = (
+    'thread_safe',
+    'stream',
+    'context_param',
+    'cache',
+    'timeout',
+    'executor',
+    'concurrency',
+    'tags',
+    'queue_timeout',
+)
+
+
+def compile_manifest(mcp: MCP) -> dict[str, Any]:
+    """Returns the manifest of the tools, prompts, resources and resource
+    templates registered with `mcp`.
+
+    The manifest holds the description of each as sent to the client, along
+    with the import path of its function (and of a resource's version
+    function), and the modification time and size of the source files they
+    are defined in.
+
+    Raises:
+        ValueError: If a function can't be imported by path, e.g. because it
+            is defined inside another function or is a `DirectoryProvider`.
+    """
+    sources: set[str] = set()
+    if mcp._mcp_entry_fn is not None:
+        sources.add(_get_source(mcp._mcp_entry_fn.__module__))
+
+    tool_entries = []
+    for name, tool in mcp._tool_registry.items():
+        path = _get_path(tool)
+        sources.add(_get_source(parse_function_path(path)[0]))
+        entry = {
+            'path': path,
+            'description': codec.loads(mcp._tool_registry.get_entry(name)),
+        }
+        entry.update({key: tool[key] for key in _TOOL_KEYS if key in tool})
+        tool_entries.append(entry)
+
+    prompt_entries = []
+    for name, prompt in mcp._prompt_registry.items():
+        path = _get_path(prompt)
+        sources.add(_get_source(parse_function_path(path)[0]))
+        prompt_entries.append(
+            {
+                'path': path,
+                'description': codec.loads(mcp._prompt_registry.get_entry(name)),
+            }
+        )
+
+    resource_entries = []
+    template_entries = []
+    for registry, entries in (
+        (mcp._resource_registry, resource_entries),
+        (mcp._template_registry, template_entries),
+    ):
+        for key, resource in registry.items():
+            path = _get_path(resource)
+            sources.add(_get_source(parse_function_path(path)[0]))
+            entry = {'path': path, 'description': codec.loads(registry.get_entry(key))}
+            if (version_path := _get_version_path(resource)) is not None:
+                sources.add(_get_source(parse_function_path(version_path)[0]))
+                entry['version'] = version_path
+            entries.append(entry)
+
+    return {
+        'version': MANIFEST_VERSION,
+        'sources': {source: _stat(source) for source in sorted(sources)},
+        'tools': tool_entries,
+        'prompts': prompt_entries,
+        'resources': resource_entries,
+        'resourceTemplates': template_entries,
+    }
+
+
+def write_manifest(mcp: MCP, path: str | os.PathLike):
+    """Compiles the manifest of `mcp` and writes it to `path`."""
+    Path(path).write_bytes(codec.dumps(compile_manifest(mcp)))
+
+
+def load_manifest(mcp: MCP, path: str | os.PathLike) -> bool:
+    """Registers the tools, prompts, resources and resource templates of the
+    manifest at `path` with `mcp`.
+
+    Their modules are not imported, they are registered as if added with
+    `mcp.add_lazy_tool`, and their descriptions are listed as read from the
+    manifest.
+
+    Returns False, without registering anything, if the manifest doesn't
+    exist, is of another version, or a source file has changed since it was
+    compiled.
+    """
+    try:
+        manifest = codec.loads(Path(path).read_bytes())
+    except (OSError, ValueError):
+        return False
+
+    if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+        return False
+
+    try:
+        if not _is_fresh(manifest['sources']):
+            return False
+        tool_list = [_get_tool(entry) for entry in manifest['tools']]
+        prompt_list = [_get_prompt(entry) for entry in manifest['prompts']]
+        resource_list = [_get_resource(entry, 'uri') for entry in manifest['resources']]
+        template_list = [
+            _get_resource(entry, 'uriTemplate')
+            for entry in manifest['resourceTemplates']
+        ]
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return False
+
+    for tool, entry in tool_list:
+        # The validator is compiled on the first call
+        mcp._tool_registry.set_encoded(tool['name'], tool, entry)
+        if tool.get('executor') == 'process':
+            mcp._process_pool.add_tool(tool)
+
+    for prompt, entry in prompt_list:
+        mcp._prompt_registry.set_encoded(prompt['name'], prompt, entry)
+
+    for resource, entry in resource_list:
+        mcp._resource_registry.set_encoded(resource['uri_template'], resource, entry)
+    for resource, entry in template_list:
+        mcp._template_registry.set_encoded(resource['uri_template'], resource, entry)
+    return True
+
+
+def _is_fresh(sources: dict[str, list[int]]) -> bool:
+    for source, stat in sources.items():
+        try:
+            if _stat(source) != stat:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _get_tool(entry: dict[str, Any]) -> tuple[tools.Tool, bytes]:
+    description = entry['description']
+    tool = tools.Tool(
+        fn=None,  # type: ignore[typeddict-item]
+        name=description['name'],
+        description=description.get('description') or '',
+        input_schema=description['inputSchema'],
+        output_schema=description.get('outputSchema'),
+        annotations=description.get('annotations'),
+        path=entry['path'],
+    )
+    tool.update({key: entry[key] for key in _TOOL_KEYS if key in entry})
+    return tool, codec.dumps(description)
+
+
+def _get_prompt(entry: dict[str, Any]) -> tuple[prompts.Prompt, bytes]:
+    description = entry['description']
+    prompt = prompts.Prompt(
+        fn=None,  # type: ignore[typeddict-item]
+        name=description['name'],
+        description=description.get('description'),
+        arguments=description.get('arguments'),
+        path=entry['path'],
+    )
+    return prompt, codec.dumps(description)
+
+
+def _get_resource(
+    entry: dict[str, Any], uri_key: str
+) -> tuple[resources.Resource, bytes]:
+    description = entry['description']
+    uri_template = description[uri_key]
+    resource = resources.Resource(
+        fn=None,  # type: ignore[typeddict-item]
+        name=description['name'],
+        title=description.get('title'),
+        uri_template=uri_template,
+        description=description.get('description'),
+        mime_type=description.get('mimeType'),
+        annotations=description.get('annotations'),
+        size=description.get('size'),
+        pattern=compile_uri_template(uri_template)
+        if uri_key == 'uriTemplate'
+        else None,
+        path=entry['path'],
+        version_path=entry.get('version'),
+    )
+    return resource, codec.dumps(description)
+
+
+def _get_version_path(resource: resources.Resource) -> str | None:
+    if (version_path := resource.get('version_path')) is not None:
+        return version_path
+    if (version := resource.get('version')) is None:
+        return None
+    try:
+        module, qualname = get_function_path(version)
+    except ValueError as e:
+        raise ValueError(
+            f"Can't add the version of '{resource['name']}' to the manifest: {e}"
+        ) from e
+    return f'{module}:{qualname}'
+
+
+def _get_path(value: tools.Tool | prompts.Prompt | resources.Resource) -> str:
+    if (path := value.get('path')) is not None:
+        return path
+    try:
+        module, qualname = get_function_path(value['fn'])
+    except ValueError as e:
+        raise ValueError(f"Can't add '{value['name']}' to the manifest: {e}") from e
+    return f'{module}:{qualname}'
+
+
+def _get_source(module: str) -> str:
+    # Lazy tools' modules may not have been imported yet
+    if (file := getattr(importlib.import_module(module), '__file__', None)) is None:
+        raise ValueError(f"Module '{module}' has no source file")
+    return os.path.abspath(file)
+
+
+def _stat(source: str) -> list[int]:
+    stat = os.stat(source)
+    return [stat.st_mtime_ns, stat.st_size]
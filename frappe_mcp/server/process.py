@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import importlib
+import inspect
+import multiprocessing
+import queue
+import secrets
+import threading
+import time
+from multiprocessing.connection import Connection, wait
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING, Any
+
+from frappe_mcp.server import types
+from frappe_mcp.server.codec import RawJSON, encode
+from frappe_mcp.server.context import CancellationToken
+from frappe_mcp.server.errors import RequestTimeoutError
+from frappe_mcp.server.process_local import ProcessLocal
+
+if TYPE_CHECKING:
+    from frappe_mcp.server.tools import Tool
+
+__all__ = ['ProcessPool']
+
+# Results larger than this are passed back through shared memory instead of
+# the worker's pipe.
+SHARED_MEMORY_THRESHOLD = 64 * 1024
+
+# Seconds between checks of a call's cancellation token.
+_POLL_INTERVAL = 0.05
+
+# Each process importing Frappe takes up memory, and every server worker (e.g.
+# Gunicorn) has a pool of its own.
+DEFAULT_MAX_WORKERS = 2
+
+
+class ProcessPool:
+    """Runs calls to CPU bound tools in worker processes.
+
+    Tools registered with `executor='process'` hold the GIL while they run,
+    in a process of their own they don't stall the threads serving other
+    requests. Workers are spawned as calls need them, up to `max_workers`,
+    and are kept running, each one imports the modules of the pool's tools
+    once so calls don't pay for it.
+
+    The result is encoded in the worker, large results are passed back
+    through shared memory and written to the response without being decoded.
+    The shared memory is named by the calling process, which unlinks it even
+    if the worker is killed. A worker that times out, is cancelled or crashes
+    is killed, the call returns an error and other calls are unaffected.
+
+    Tool functions must be importable by the worker, i.e. defined at the top
+    level of a module, and must not take a `Context`.
+
+    Args:
+        max_workers: Maximum number of worker processes, defaults to
+            `DEFAULT_MAX_WORKERS`.
+        start_method: The multiprocessing start method, 'spawn' is the default
+            as forking a threaded server is unsafe.
+    """
+
+    def __init__(self, max_workers: int | None = None, *, start_method: str = 'spawn'):
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self.modules: set[str] = set()
+        self._mp = multiprocessing.get_context(start_method)
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._workers: list[_Worker] = []
+        self._lock = threading.Lock()
+        self._started = ProcessLocal(self._reset_workers)
+
+    def add_tool(self, tool: Tool):
+        """Adds the tool's module to the modules workers import on start."""
+        if (path := tool.get('path')) is not None:
+            # Not imported by this process until the tool is called
+            module, _ = parse_function_path(path)
+        else:
+            module, _ = get_function_path(tool['fn'])
+        self.modules.add(module)
+
+    def start(self):
+        """Prepares the pool for use in the current process, workers are
+        spawned by the calls."""
+        self._started.get()
+
+    def _reset_workers(self):
+        # Workers of a parent process can't be used after a fork
+        with self._lock:
+            self._idle = queue.Queue()
+            self._workers = []
+
+    def shutdown(self):
+        """Stops the workers, they are started again on the next call."""
+        with self._lock:
+            for worker in self._workers:
+                worker.kill()
+            self._workers = []
+            self._idle = queue.Queue()
+        self._started.reset()
+
+    def call(
+        self,
+        tool: Tool,
+        arguments: dict[str, Any],
+        *,
+        timeout: float | None = None,
+        token: CancellationToken | None = None,
+        structured_text: str = 'json',
+    ) -> types.CallToolResult | RawJSON:
+        """Calls the tool in a worker and returns its encoded result.
+
+        Errors raised by the tool are returned as a `CallToolResult` with
+        `isError` set. Waiting for a free worker counts towards `timeout`.
+
+        Raises:
+            RequestTimeoutError: If the call takes longer than `timeout`.
+            MCPError: The token's error, if it is cancelled.
+        """
+        self.start()
+        token = token or CancellationToken()
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def check():
+            if token.error is not None:
+                raise token.error
+            if deadline is not None and time.monotonic() >= deadline:
+                raise RequestTimeoutError(
+                    f"Tool '{tool['name']}' timed out after {timeout} seconds"
+                )
+
+        worker = None
+        while worker is None:
+            check()
+            worker = self._get_idle_worker()
+
+        module, qualname = get_function_path(tool['fn'])
+        site, user = _get_frappe_session()
+        # Short enough for the name limits of all platforms
+        memory_name = f'fmcp_{secrets.token_hex(8)}'
+        try:
+            worker.conn.send(
+                (
+                    module,
+                    qualname,
+                    tool['name'],
+                    arguments,
+                    structured_text,
+                    site,
+                    user,
+                    memory_name,
+                )
+            )
+            while not wait([worker.conn, worker.process.sentinel], _POLL_INTERVAL):
+                check()
+            kind, is_error, payload = worker.conn.recv()
+        except BaseException as e:
+            self._remove(worker)
+            # The worker may have created the shared memory before it was
+            # killed
+            _unlink_shared_memory(memory_name)
+            if isinstance(e, (EOFError, OSError)):
+                code = worker.process.exitcode
+                text = f"Error calling tool '{tool['name']}': worker process exited with code {code}"
+                return types.CallToolResult(
+                    content=[types.TextContent(text=text)], isError=True
+                )
+            if isinstance(e, RequestTimeoutError):
+                token.cancel(e)
+            raise
+
+        self._idle.put(worker)
+        data = _read_payload(kind, payload)
+        if is_error:
+            return types.CallToolResult.model_validate_json(data)
+        return RawJSON(data)
+
+    def _get_idle_worker(self) -> _Worker | None:
+        """Returns an idle worker, spawning one if all are busy and there is
+        room for more. Waits briefly for one to become idle otherwise."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._workers) < self.max_workers:
+                return self._spawn()
+
+        try:
+            return self._idle.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            return None
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._mp.Pipe()
+        process = self._mp.Process(
+            target=_serve,
+            args=(child_conn, sorted(self.modules)),
+            name='frappe-mcp-process-tool',
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn)
+        self._workers.append(worker)
+        return worker
+
+    def _remove(self, worker: _Worker):
+        """Kills the worker, the next call that needs one spawns a new one."""
+        worker.kill()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+
+
+class _Worker:
+    def __init__(self, process: Any, conn: Connection):
+        self.process = process
+        self.conn = conn
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+def get_function_path(fn: Any) -> tuple[str, str]:
+    """Returns the module and qualified name a worker imports `fn` by.
+
+    Raises:
+        ValueError: If the function can't be imported by name.
+    """
+    module = getattr(fn, '__module__', None)
+    qualname = getattr(fn, '__qualname__', None)
+    if not module or not qualname or '<locals>' in qualname or module == '__main__':
+        raise ValueError(
+            f'{fn!r} must be defined at the top level of a module to run in a process'
+        )
+    if inspect.ismethod(fn) and not isinstance(fn.__self__, type):
+        # Its path would import the function without the instance
+        raise ValueError(f"{fn!r} is a method of an instance and can't be imported")
+    return module, qualname
+
+
+def parse_function_path(path: str) -> tuple[str, str]:
+    """Splits an import path, e.g. 'app.tools.reports:monthly_report', into
+    the module and qualified name. A dotted path, as used in Frappe hooks, is
+    split at its last dot.
+
+    Raises:
+        ValueError: If the path has no module.
+    """
+    if ':' in path:
+        module, _, qualname = path.partition(':')
+    else:
+        module, _, qualname = path.rpartition('.')
+    if not module or not qualname:
+        raise ValueError(f"Invalid function path '{path}'")
+    return module, qualname
+
+
+def import_function(module: str, qualname: str) -> Any:
+    """Imports the module and returns the function at `qualname` in it."""
+    fn: Any = importlib.import_module(module)
+    for attr in qualname.split('.'):
+        fn = getattr(fn, attr)
+    return fn
+
+
+def _get_frappe_session() -> tuple[str | None, str | None]:
+    try:
+        import frappe
+    except ImportError:
+        return None, None
+
+    try:
+        return frappe.local.site, frappe.session.user
+    except (AttributeError, RuntimeError):
+        return None, None
+
+
+def _unlink_shared_memory(name: str):
+    try:
+        memory = SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    memory.close()
+    memory.unlink()
+
+
+def _read_payload(kind: str, payload: Any) -> bytes:
+    if kind == 'bytes':
+        return payload
+
+    name, size = payload
+    memory = SharedMemory(name=name)
+    try:
+        return bytes(memory.buf[:size])
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def _serve(conn: Connection, modules: list[str]):
+    """Runs in a worker process, calls tools until the pipe is closed."""
+    for module in modules:
+        importlib.import_module(module)
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+
+        *args, memory_name = message
+        is_error, data = _run(*args)
+        if len(data) <= SHARED_MEMORY_THRESHOLD:
+            conn.send(('bytes', is_error, data))
+            continue
+
+        memory = SharedMemory(name=memory_name, create=True, size=len(data))
+        memory.buf[: len(data)] = data
+        conn.send(('shared_memory', is_error, (memory.name, len(data))))
+        # The parent process unlinks it once read
+        memory.close()
+
+
+def _run(
+    module, qualname, name, arguments, structured_text, site, user
+) -> tuple[bool, bytes]:
+    # Imported here so that they are loaded once the worker is running
+    from frappe_mcp.server.tools.handlers import _get_safe_result
+
+    try:
+        fn = import_function(module, qualname)
+        _init_frappe(site, user)
+        tool: Any = {'name': name, 'fn': fn}
+        result = _get_safe_result(
+            tool, arguments, None, CancellationToken(), structured_text
+        )
+    except Exception as e:
+        text = f"Error calling tool '{name}': {e}"
+        result = types.CallToolResult(
+            content=[types.TextContent(text=text)], isError=True
+        )
+
+    is_error = isinstance(result, types.CallToolResult) and bool(result.isError)
+    _end_frappe_call(site, is_error)
+    return is_error, bytes(encode(result))
+
+
+def _init_frappe(site: str | None, user: str | None):
+    if site is None:
+        return
+
+    import frappe
+
+    if getattr(frappe.local, 'site', None) != site:
+        frappe.init(site=site)
+        frappe.connect()
+    if user:
+        frappe.set_user(user)
+
+
+def _end_frappe_call(site: str | None, is_error: bool):
+    if site is None:
+        return
+
+    import frappe
+
+    if getattr(frappe.local, 'db', None) is None:
+        return
+    if is_error:
+        frappe.db.rollback()
+    else:
+        frappe.db.commit()
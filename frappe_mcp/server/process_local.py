@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+__all__ = ['ProcessLocal']
+
+T = TypeVar('T')
+
+
+class ProcessLocal(Generic[T]):
+    """A value created once per process, on first use.
+
+    Threads, thread pools and event loops don't survive a fork: workers
+    forked from a preloaded master (e.g. Gunicorn with `preload_app`) call
+    `create` again to get their own, instead of using the master's.
+    """
+
+    def __init__(self, create: Callable[[], T]):
+        self._create = create
+        self._value: T | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._value = self._create()
+                    self._pid = pid
+        return self._value  # type: ignore[return-value]
+
+    def reset(self):
+        """The value is created again on the next `get`."""
+        with self._lock:
+            self._value = None
+            self._pid = None
@@ -5,15 +5,23 @@ from collections.abc import Callable
 from inspect import getdoc
 from typing import TypedDict
 
-from frappe_mcp.server.prompts.handlers import handle_get_prompt, handle_list_prompts
+from frappe_mcp.server.process import import_function, parse_function_path
+from frappe_mcp.server.prompts.handlers import (
+    get_prompt_description,
+    handle_get_prompt,
+    handle_list_prompts,
+)
+from frappe_mcp.server.registry import loading
 
 __all__ = [
     'Prompt',
     'PromptArgument',
     'PromptOptions',
     'get_prompt',
+    'get_prompt_description',
     'handle_get_prompt',
     'handle_list_prompts',
+    'load_prompt',
 ]
 
 
@@ -24,13 +32,19 @@ class PromptArgument(TypedDict, total=False):
     required: bool | None
 
 
-class Prompt(TypedDict):
+class _PromptRequired(TypedDict):
     name: str
     description: str | None
     arguments: list[PromptArgument] | None
     fn: Callable
 
 
+class Prompt(_PromptRequired, total=False):
+    # Import path of the function of a prompt read from a manifest, `fn` is
+    # None until the function is imported, see `load_prompt`.
+    path: str
+
+
 class PromptOptions(TypedDict, total=False):
     name: str | None
     description: str | None
@@ -51,6 +65,18 @@ def get_prompt(fn: Callable, options: PromptOptions | None = None) -> Prompt:
     return Prompt(fn=fn, name=name, description=description, arguments=arguments)
 
 
+def load_prompt(prompt: Prompt) -> Prompt:
+    """Imports the function of a prompt read from a manifest, if not yet
+    imported."""
+    if prompt.get('fn') is not None:
+        return prompt
+
+    with loading():
+        if prompt.get('fn') is None:
+            prompt['fn'] = import_function(*parse_function_path(prompt['path']))
+    return prompt
+
+
 def _get_arguments_from_fn(fn: Callable) -> list[PromptArgument]:
     sig = inspect.signature(fn)
     args = []
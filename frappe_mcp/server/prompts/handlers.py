@@ -2,33 +2,60 @@ from __future__ import annotations
 
 from collections import OrderedDict
 
+import frappe_mcp.server.prompts as prompts
 from frappe_mcp.server import types
+from frappe_mcp.server.codec import RawJSON
+from frappe_mcp.server.registry import Registry
 
 
-def handle_list_prompts(params, prompt_registry: OrderedDict) -> dict:
-    types.ListPromptsRequestParams.model_validate(params)
-    prompt_list = []
-    for prompt_info in prompt_registry.values():
-        raw_args = prompt_info.get('arguments') or []
-        arguments = [
-            types.PromptArgument(
-                name=arg['name'],
-                title=arg.get('title'),
-                description=arg.get('description'),
-                required=arg.get('required'),
-            )
-            for arg in raw_args
-        ] or None
-        prompt = types.Prompt(
-            name=prompt_info['name'],
-            description=prompt_info.get('description'),
-            arguments=arguments,
+def handle_list_prompts(
+    params,
+    prompt_registry: OrderedDict,
+    *,
+    page_size: int | None = None,
+) -> dict | RawJSON:
+    """Handles the prompts/list request from the client.
+
+    Prompts in a `Registry` are validated and encoded when registered, the
+    cached list result is returned as is. If `page_size` is set the result is
+    paginated.
+    """
+    list_params = types.ListPromptsRequestParams.model_validate(params)
+
+    if isinstance(prompt_registry, Registry):
+        if page_size is None and list_params.cursor is None:
+            return prompt_registry.get_list_result()
+        return prompt_registry.get_page(
+            list_params.cursor, page_size or len(prompt_registry)
         )
-        prompt_list.append(prompt)
+
+    prompt_list = [get_prompt_description(p) for p in prompt_registry.values()]
     result = types.ListPromptsResult(prompts=prompt_list)
     return result.model_dump(exclude_none=True, by_alias=True)
 
 
+def get_prompt_description(prompt_info) -> types.Prompt:
+    """Returns the prompt as sent to the client.
+
+    Raises a pydantic `ValidationError` (a `ValueError`) if the prompt is invalid.
+    """
+    raw_args = prompt_info.get('arguments') or []
+    arguments = [
+        types.PromptArgument(
+            name=arg['name'],
+            title=arg.get('title'),
+            description=arg.get('description'),
+            required=arg.get('required'),
+        )
+        for arg in raw_args
+    ] or None
+    return types.Prompt(
+        name=prompt_info['name'],
+        description=prompt_info.get('description'),
+        arguments=arguments,
+    )
+
+
 def handle_get_prompt(params, prompt_registry: OrderedDict) -> dict:
     get_params = types.GetPromptRequestParams.model_validate(params)
     name = get_params.name
@@ -38,7 +65,7 @@ def handle_get_prompt(params, prompt_registry: OrderedDict) -> dict:
         raise ValueError(f"Prompt '{name}' not found.")
 
     prompt_info = prompt_registry[name]
-    fn = prompt_info['fn']
+    fn = prompts.load_prompt(prompt_info)['fn']
 
     raw_result = fn(**arguments)
 
@@ -52,7 +79,7 @@ def handle_get_prompt(params, prompt_registry: OrderedDict) -> dict:
     else:
         raise ValueError(
             f"Prompt '{name}' must return list[PromptMessage] or GetPromptResult, "
-            f"got {type(raw_result).__name__}."
+            f'got {type(raw_result).__name__}.'
         )
 
     return result.model_dump(exclude_none=True, by_alias=True)
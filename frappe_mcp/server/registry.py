@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+
+from frappe_mcp.server import codec
+
+__all__ = ['Registry', 'loading']
+
+T = TypeVar('T')
+
+_MISSING = object()
+
+# Held while the module of a lazy tool, prompt or resource is imported.
+_load_lock = threading.RLock()
+_loading = threading.local()
+
+
+@contextmanager
+def loading() -> Iterator[None]:
+    """Held while the module of a lazy tool, prompt or resource is imported.
+
+    The module may register its entries again as it is imported, e.g. using
+    the `@mcp.tool()` decorator. Registering a name that is already registered
+    keeps the existing entry, even once the registry is frozen.
+    """
+    with _load_lock:
+        _loading.depth = getattr(_loading, 'depth', 0) + 1
+        try:
+            yield
+        finally:
+            _loading.depth -= 1
+
+
+class Registry(OrderedDict[str, T]):
+    """An ordered mapping of names to registered tools or prompts.
+
+    Each entry is described (e.g. as a `types.Tool`) when it is added, this
+    validates it and the description is kept as encoded JSON. List results are
+    assembled from these and cached until the registry changes.
+
+    List results can be paginated. Cursors are stateless: they hold the offset
+    of the next page and a digest of the registry's entries, so a cursor is
+    valid on every worker that has the same entries registered, and is
+    rejected once the entries change.
+
+    A registry can be frozen once registration is done, changing a frozen
+    registry raises a `RuntimeError`. Entries registered again while a lazy
+    entry's module is imported are ignored, see `loading`.
+
+    Args:
+        key: Key of the list in list results, e.g. 'tools'.
+        describe: Returns the model sent to the client for an entry, raises a
+            `ValueError` if the entry is invalid.
+    """
+
+    def __init__(self, key: str, describe: Callable[[T], BaseModel]):
+        super().__init__()
+        self.key = key
+        self.version = 0
+        self.frozen = False
+        self._describe = describe
+        self._entries: dict[str, bytes] = {}
+        self._list_result: codec.RawJSON | None = None
+        self._pages: dict[tuple[int, int], codec.RawJSON] = {}
+        self._digest: str | None = None
+
+    def __setitem__(self, name: str, value: T):
+        if self._is_reloaded(name):
+            return
+        self._check_frozen()
+        try:
+            entry = bytes(codec.encode(self._describe(value)))
+        except ValueError as e:
+            raise ValueError(f"Invalid {self.key[:-1]} '{name}': {e}") from e
+
+        super().__setitem__(name, value)
+        self._entries[name] = entry
+        self._changed()
+
+    def set_encoded(self, name: str, value: T, entry: bytes):
+        """Adds an entry along with its encoded description, e.g. as read from
+        a manifest, without describing it again."""
+        if self._is_reloaded(name):
+            return
+        self._check_frozen()
+        super().__setitem__(name, value)
+        self._entries[name] = entry
+        self._changed()
+
+    def __delitem__(self, name: str):
+        self._check_frozen()
+        super().__delitem__(name)
+        del self._entries[name]
+        self._changed()
+
+    def pop(self, name: str, default: Any = _MISSING) -> Any:
+        if name not in self:
+            if default is _MISSING:
+                raise KeyError(name)
+            return default
+        value = self[name]
+        del self[name]
+        return value
+
+    def popitem(self, last: bool = True) -> tuple[str, T]:
+        self._check_frozen()
+        name, value = super().popitem(last)
+        del self._entries[name]
+        self._changed()
+        return name, value
+
+    def clear(self):
+        self._check_frozen()
+        super().clear()
+        self._entries.clear()
+        self._changed()
+
+    def setdefault(self, name: str, default: Any = None) -> Any:
+        if name not in self:
+            self[name] = default
+        return self[name]
+
+    def move_to_end(self, name: str, last: bool = True):
+        self._check_frozen()
+        super().move_to_end(name, last)
+        self._changed()
+
+    def get_entry(self, name: str) -> bytes:
+        """Returns the encoded description of the entry."""
+        return self._entries[name]
+
+    def get_entries(self) -> list[bytes]:
+        """Returns the encoded description of each entry, in order."""
+        return [self._entries[name] for name in self]
+
+    def get_list_result(self) -> codec.RawJSON:
+        """Returns the encoded list result, e.g. `{"tools":[...]}`."""
+        if self._list_result is None:
+            entries = b','.join(self.get_entries())
+            self._list_result = codec.RawJSON(
+                b'{"%s":[%s]}' % (self.key.encode(), entries)
+            )
+        return self._list_result
+
+    def get_page(self, cursor: str | None, page_size: int) -> codec.RawJSON:
+        """Returns the encoded list result for the page at `cursor`.
+
+        `nextCursor` is set if there are more entries after the page.
+
+        Raises:
+            ValueError: If the cursor is invalid or the registry has changed
+                since it was issued.
+        """
+        offset = self._get_offset(cursor) if cursor else 0
+        key = (offset, page_size)
+        if (page := self._pages.get(key)) is not None:
+            return page
+
+        entries = self.get_entries()
+        end = offset + page_size
+        body = b'{"%s":[%s]' % (self.key.encode(), b','.join(entries[offset:end]))
+        if end < len(entries):
+            body += b',"nextCursor":' + codec.dumps(self._get_cursor(end))
+        page = self._pages[key] = codec.RawJSON(body + b'}')
+        return page
+
+    def get_digest(self) -> str:
+        """Returns a digest of the entries, equal across workers with the same entries."""
+        if self._digest is None:
+            h = hashlib.sha1()
+            for entry in self.get_entries():
+                h.update(entry)
+                h.update(b'\n')
+            self._digest = h.hexdigest()[:16]
+        return self._digest
+
+    def _get_cursor(self, offset: int) -> str:
+        return base64.urlsafe_b64encode(
+            f'{self.get_digest()}:{offset}'.encode()
+        ).decode()
+
+    def _get_offset(self, cursor: str) -> int:
+        try:
+            digest, position = (
+                base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+            )
+            offset = int(position)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise ValueError('Invalid cursor') from None
+
+        if digest != self.get_digest():
+            raise ValueError('Invalid cursor, the list has changed')
+        if not 0 < offset < len(self):
+            raise ValueError('Invalid cursor')
+        return offset
+
+    def _is_reloaded(self, name: str) -> bool:
+        # The entry, read from a manifest or added lazily, is kept
+        return getattr(_loading, 'depth', 0) > 0 and name in self
+
+    def _check_frozen(self):
+        if self.frozen:
+            raise RuntimeError(
+                f'Cannot change {self.key} after registration is done, '
+                f'{self.key} must be registered when the MCP entry function runs'
+            )
+
+    def _changed(self):
+        self.version += 1
+        self._list_result = None
+        self._pages.clear()
+        self._digest = None
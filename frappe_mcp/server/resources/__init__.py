@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Callable
+from inspect import getdoc, isroutine, signature
+from typing import Any, TypedDict
+
+from frappe_mcp.server.process import import_function, parse_function_path
+from frappe_mcp.server.registry import loading
+from frappe_mcp.server.resources.contents import (
+    DirectoryProvider,
+    File,
+    get_contents,
+    get_file_version,
+)
+from frappe_mcp.server.resources.handlers import (
+    get_etag,
+    get_resource_description,
+    get_template_description,
+    handle_list_resource_templates,
+    handle_list_resources,
+    handle_read_resource,
+    handle_subscribe,
+    handle_unsubscribe,
+)
+from frappe_mcp.server.resources.router import TemplateRouter
+from frappe_mcp.server.resources.subscriptions import Subscriptions
+from frappe_mcp.server.resources.uri_template import compile_uri_template, get_variables
+
+__all__ = [
+    'DirectoryProvider',
+    'File',
+    'Resource',
+    'ResourceOptions',
+    'Subscriptions',
+    'TemplateRouter',
+    'get_contents',
+    'get_etag',
+    'get_file_version',
+    'get_resource',
+    'get_resource_description',
+    'get_template_description',
+    'handle_list_resource_templates',
+    'handle_list_resources',
+    'handle_read_resource',
+    'handle_subscribe',
+    'handle_unsubscribe',
+    'is_template',
+    'load_resource',
+]
+
+
+class _ResourceRequired(TypedDict):
+    name: str
+    # A URI, or a URI template whose variables are passed to `fn`.
+    uri_template: str
+    description: str | None
+    mime_type: str | None
+    annotations: dict[str, Any] | None
+    fn: Callable
+
+
+class Resource(_ResourceRequired, total=False):
+    title: str | None
+    # Size in bytes, listed for resources that aren't templates.
+    size: int | None
+    # Matches the URIs of a template, compiled when the resource is created.
+    pattern: re.Pattern[str] | None
+    # Returns the current version of the resource, called with the same
+    # arguments as `fn`.
+    version: Callable | None
+    # Import paths of `fn` and `version` of a resource registered from a
+    # manifest. `fn` is None until they are imported on the first read, see
+    # `load_resource`.
+    path: str
+    version_path: str | None
+
+
+class ResourceOptions(TypedDict, total=False):
+    name: str | None
+    title: str | None
+    description: str | None
+    mime_type: str | None
+    annotations: dict[str, Any] | None
+    size: int | None
+    version: Callable | None
+
+
+def get_resource(
+    fn: Callable,
+    uri_template: str,
+    options: ResourceOptions | None = None,
+) -> Resource:
+    """Returns a resource read by calling `fn`.
+
+    If `uri_template` has variables the resource is a template, `fn` is
+    called with the values of the variables in the URI that is read. If the
+    `version` option isn't set, the `get_version` method of `fn` is used if
+    it has one, e.g. of a `DirectoryProvider`.
+
+    Raises:
+        ValueError: If the URI template is invalid, or has variables `fn`
+            doesn't take.
+    """
+    if options is None:
+        options = ResourceOptions()
+
+    pattern = None
+    if '{' in uri_template or '}' in uri_template:
+        pattern = compile_uri_template(uri_template)
+        _check_parameters(fn, get_variables(uri_template), uri_template)
+
+    return Resource(
+        fn=fn,
+        name=options.get('name') or getattr(fn, '__name__', None) or uri_template,
+        title=options.get('title'),
+        uri_template=uri_template,
+        # Not the class docstring of a callable object, e.g. a provider
+        description=options.get('description')
+        or (isroutine(fn) and getdoc(fn))
+        or None,
+        mime_type=options.get('mime_type'),
+        annotations=options.get('annotations'),
+        size=options.get('size'),
+        pattern=pattern,
+        version=options.get('version') or getattr(fn, 'get_version', None),
+    )
+
+
+def load_resource(resource: Resource) -> Resource:
+    """Imports the functions of a resource registered from a manifest, if not
+    yet imported.
+
+    Raises:
+        ImportError, AttributeError: If a function can't be imported.
+    """
+    if resource.get('fn') is not None:
+        return resource
+
+    with loading():
+        if resource.get('fn') is not None:
+            return resource
+
+        if (version_path := resource.get('version_path')) is not None:
+            resource['version'] = import_function(*parse_function_path(version_path))
+        resource['fn'] = import_function(*parse_function_path(resource['path']))
+    return resource
+
+
+def is_template(resource: Resource) -> bool:
+    """True if the resource's URI has variables."""
+    return resource.get('pattern') is not None
+
+
+def _check_parameters(fn: Callable, variables: list[str], uri_template: str):
+    try:
+        parameters = signature(fn).parameters
+    except (TypeError, ValueError):
+        return
+
+    if any(p.kind is p.VAR_KEYWORD for p in parameters.values()):
+        return
+    if missing := [v for v in variables if v not in parameters]:
+        raise ValueError(
+            f"Resource function for '{uri_template}' doesn't take {', '.join(missing)}"
+        )
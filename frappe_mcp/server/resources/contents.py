@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import mmap
+import os
+import stat
+from collections.abc import Callable
+from typing import Any
+
+from frappe_mcp.server import codec, types
+from frappe_mcp.server.encoder import get_result_encoder
+from frappe_mcp.server.errors import ResourceNotFoundError
+from frappe_mcp.server.tools import content
+
+__all__ = ['DirectoryProvider', 'File', 'get_contents', 'get_file_version']
+
+# Mime types of files that are read as text, along with text/*.
+_TEXT_MIME_TYPES = {'application/json', 'application/xml', 'application/yaml'}
+
+
+class File:
+    """A file returned by a resource function.
+
+    The file is read through a memory map and base64 encoded a chunk at a
+    time while the response is written, it is never loaded into memory as a
+    whole. Text files read whole are sent as text, anything else as a blob.
+
+    Args:
+        path: Path of the file.
+        mime_type: Mime type of the file, guessed from its contents and name
+            if not set.
+    """
+
+    def __init__(self, path: str | os.PathLike, *, mime_type: str | None = None):
+        self.path = os.fspath(path)
+        self.mime_type = mime_type
+
+
+class DirectoryProvider:
+    """A resource function that serves the files in a directory.
+
+    Registered for a template with a `{+path}` variable, e.g.
+    'file:///private/files/{+path}', it returns the file at `path` within
+    `root`. Paths that resolve outside of `root`, e.g. through '..' or a
+    symlink, are not found. The version of a file is read from its metadata,
+    see `get_version`.
+
+    Args:
+        root: The directory files are served from.
+        mime_type: Mime type of all files, guessed per file if not set.
+    """
+
+    def __init__(self, root: str | os.PathLike, *, mime_type: str | None = None):
+        self.root = os.path.realpath(root)
+        self.mime_type = mime_type
+        self.__name__ = os.path.basename(self.root)
+
+    def __call__(self, path: str) -> File:
+        return File(self._get_path(path), mime_type=self.mime_type)
+
+    def get_version(self, path: str) -> str:
+        """Returns the version of the file at `path`, without reading it."""
+        return get_file_version(self._get_path(path))
+
+    def _get_path(self, path: str) -> str:
+        full_path = os.path.realpath(os.path.join(self.root, path))
+        if not full_path.startswith(self.root + os.sep) or not os.path.isfile(
+            full_path
+        ):
+            raise ResourceNotFoundError(f"File '{path}' not found")
+        return full_path
+
+
+def get_contents(
+    uri: str,
+    value: Any,
+    *,
+    mime_type: str | None = None,
+    offset: int | None = None,
+    length: int | None = None,
+    max_read_size: int | None = None,
+) -> list[codec.RawJSON]:
+    """Converts the value returned by a resource function into the encoded
+    contents of a read result.
+
+    Strings and files opened in text mode are sent as text, `File`s, bytes
+    and binary file objects as a blob, other values as JSON text. `TextResourceContents` and
+    `BlobResourceContents`, or a list of them, are sent as is.
+
+    A blob can be read in parts: only the bytes from `offset` up to `length`
+    bytes are sent, at most `max_read_size` bytes if set. A partial read has
+    `_meta` set to its `offset`, `length` and the total `size`.
+    """
+    if isinstance(value, (types.TextResourceContents, types.BlobResourceContents)):
+        return [codec.encode(value)]
+    if isinstance(value, list) and all(
+        isinstance(v, (types.TextResourceContents, types.BlobResourceContents))
+        for v in value
+    ):
+        return [codec.encode(v) for v in value]
+
+    if isinstance(value, str):
+        return [_get_text(uri, value, mime_type or 'text/plain')]
+    if content.is_text_stream(value):
+        text = content.read_text(value)
+        return [_get_text(uri, text, mime_type or 'text/plain')]
+
+    read_range = (offset, length, max_read_size)
+    if isinstance(value, File):
+        return [_get_file(uri, value.path, value.mime_type or mime_type, read_range)]
+
+    if content.is_binary(value):
+        if _is_disk_file(value):
+            # Read through a memory map as well
+            try:
+                name = getattr(value, 'name', None)
+                return [_get_file(uri, name, mime_type, read_range, file=value)]
+            finally:
+                value.close()
+
+        data = value
+        if not isinstance(value, (bytes, bytearray, memoryview)):
+            data = b''.join(content.iter_chunks(value))
+        view = memoryview(data).cast('B')
+        mime_type = mime_type or content.get_mime_type(bytes(view[:16]))
+        return [_get_blob(uri, view, mime_type, read_range)]
+
+    text = get_result_encoder().dumps(value).decode()
+    return [_get_text(uri, text, mime_type or 'application/json')]
+
+
+def get_file_version(path: str | os.PathLike) -> str:
+    """Returns the version of a file from its modification time, size and
+    inode, a file replaced or changed in place gets a new version.
+
+    Raises:
+        ResourceNotFoundError: If the file doesn't exist.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        raise ResourceNotFoundError(f"File '{os.fspath(path)}' not found") from None
+    return f'{st.st_mtime_ns:x}-{st.st_size:x}-{st.st_ino:x}'
+
+
+def _get_text(uri: str, text: str, mime_type: str) -> codec.RawJSON:
+    return codec.RawJSON(
+        b'{"uri":%s,"mimeType":%s,"text":%s}'
+        % (codec.dumps(uri), codec.dumps(mime_type), codec.dumps(text))
+    )
+
+
+def _get_file(
+    uri: str,
+    path: Any,
+    mime_type: str | None,
+    read_range: tuple[int | None, int | None, int | None],
+    *,
+    file: Any = None,
+) -> codec.RawJSON:
+    name = path if isinstance(path, str) else None
+    owned = file is None
+    if file is None:
+        try:
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            raise ResourceNotFoundError(f"Resource '{uri}' not found") from None
+
+    try:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            mime_type = mime_type or content.get_mime_type(b'', name)
+            return _get_blob(uri, memoryview(b''), mime_type, read_range)
+
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            text = None
+            # Released before the map is closed
+            with memoryview(mapped) as view:
+                mime_type = mime_type or content.get_mime_type(bytes(view[:16]), name)
+                offset, length, max_read_size = read_range
+                is_whole = offset is None and length is None
+                fits = max_read_size is None or size <= max_read_size
+                if is_whole and fits and _is_text(mime_type):
+                    try:
+                        text = str(view, 'utf-8')
+                    except UnicodeDecodeError:
+                        pass
+            if text is not None:
+                mapped.close()
+                return _get_text(uri, text, mime_type)
+            # The map stays open until the blob has been written
+            return _get_blob(uri, mapped, mime_type, read_range, close=mapped.close)
+        except BaseException:
+            mapped.close()
+            raise
+    finally:
+        if owned:
+            file.close()
+
+
+def _get_blob(
+    uri: str,
+    buffer: Any,
+    mime_type: str,
+    read_range: tuple[int | None, int | None, int | None],
+    *,
+    close: Callable[[], None] | None = None,
+) -> codec.RawJSON:
+    offset, length, max_read_size = read_range
+    size = len(buffer)
+    start = min(offset or 0, size)
+    end = size if length is None else min(start + length, size)
+    if max_read_size is not None:
+        end = min(end, start + max_read_size)
+
+    header = b'{"uri":%s,"mimeType":%s,"blob":"' % (
+        codec.dumps(uri),
+        codec.dumps(mime_type),
+    )
+    # Encoded while the response is written
+    blob = codec.Base64(buffer, start, end, content.CHUNK_SIZE, close=close)
+    if offset is None and length is None and end == size:
+        return codec.RawJSON(header, blob, b'"}')
+
+    meta = {'offset': start, 'length': end - start, 'size': size}
+    return codec.RawJSON(header, blob, b'","_meta":%s}' % codec.dumps(meta))
+
+
+def _is_disk_file(value: Any) -> bool:
+    # Pipes and sockets have a file descriptor but can't be mapped
+    try:
+        return stat.S_ISREG(os.fstat(value.fileno()).st_mode)
+    except (AttributeError, OSError):
+        return False
+
+
+def _is_text(mime_type: str) -> bool:
+    return mime_type.startswith('text/') or mime_type in _TEXT_MIME_TYPES
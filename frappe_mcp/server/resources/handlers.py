@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from typing import Any
+
+import frappe_mcp.server.resources as resources
+from frappe_mcp.server import types
+from frappe_mcp.server.cache import ReadCache
+from frappe_mcp.server.codec import RawJSON, dumps
+from frappe_mcp.server.errors import ResourceNotFoundError
+from frappe_mcp.server.registry import Registry
+from frappe_mcp.server.resources.contents import File, get_file_version
+from frappe_mcp.server.resources.router import TemplateRouter
+from frappe_mcp.server.resources.subscriptions import Subscriptions
+
+_MISSING = object()
+
+
+def handle_list_resources(
+    params,
+    resource_registry: OrderedDict,
+    *,
+    page_size: int | None = None,
+) -> dict | RawJSON:
+    """Handles the resources/list request from the client.
+
+    Lists the resources whose URI isn't a template. Resources in a `Registry`
+    are validated and encoded when registered, the cached list result is
+    returned as is. If `page_size` is set the result is paginated.
+    """
+    list_params = types.ListResourcesRequestParams.model_validate(params)
+
+    if isinstance(resource_registry, Registry):
+        if page_size is None and list_params.cursor is None:
+            return resource_registry.get_list_result()
+        return resource_registry.get_page(
+            list_params.cursor, page_size or len(resource_registry)
+        )
+
+    resource_list = [get_resource_description(r) for r in resource_registry.values()]
+    result = types.ListResourcesResult(resources=resource_list)
+    return result.model_dump(exclude_none=True, by_alias=True)
+
+
+def handle_list_resource_templates(
+    params,
+    template_registry: OrderedDict,
+    *,
+    page_size: int | None = None,
+) -> dict | RawJSON:
+    """Handles the resources/templates/list request from the client."""
+    list_params = types.ListResourceTemplatesRequestParams.model_validate(params)
+
+    if isinstance(template_registry, Registry):
+        if page_size is None and list_params.cursor is None:
+            return template_registry.get_list_result()
+        return template_registry.get_page(
+            list_params.cursor, page_size or len(template_registry)
+        )
+
+    template_list = [get_template_description(r) for r in template_registry.values()]
+    result = types.ListResourceTemplatesResult(resourceTemplates=template_list)
+    return result.model_dump(exclude_none=True, by_alias=True)
+
+
+def handle_read_resource(
+    params,
+    resource_registry: OrderedDict,
+    template_router: TemplateRouter,
+    *,
+    max_read_size: int | None = None,
+    read_cache: ReadCache | None = None,
+) -> RawJSON:
+    """Handles the resources/read request from the client.
+
+    The resource is looked up by its URI, and otherwise the template that
+    matches the URI is read, see `TemplateRouter`. Blobs are encoded a chunk
+    at a time into the returned JSON, a byte range can be requested using
+    `offset` and `length` in the request's `_meta`. If `max_read_size` is set
+    reads are limited to as many bytes, see `resources.get_contents`.
+
+    If the resource has a version, its ETag is set in the result's `_meta`.
+    A client that sends the ETag of its last read in the request's `_meta`
+    gets a result without contents and with `notModified` set if the
+    resource hasn't changed. Otherwise the result is reused from
+    `read_cache` if it has one for this version.
+
+    Raises:
+        ResourceNotFoundError: If no resource or template matches the URI.
+    """
+    read_params = types.ReadResourceRequestParams.model_validate(params)
+    uri = read_params.uri
+    meta = read_params.meta or types.ReadResourceMeta()
+
+    resource, arguments = find_resource(uri, resource_registry, template_router)
+    resources.load_resource(resource)
+    value = _MISSING
+    if (get_version := resource.get('version')) is not None:
+        version = get_version(**arguments)
+    else:
+        # A file is versioned by its metadata, it isn't read if unchanged
+        value = resource['fn'](**arguments)
+        version = get_file_version(value.path) if isinstance(value, File) else None
+
+    etag = None if version is None else get_etag(version)
+    if etag is not None and etag == meta.etag:
+        return RawJSON(
+            b'{"contents":[],"_meta":{"etag":%s,"notModified":true}}' % dumps(etag)
+        )
+
+    key = None
+    if read_cache is not None and etag is not None:
+        key = read_cache.get_key(uri, etag, (meta.offset, meta.length, max_read_size))
+        if (cached := read_cache.get(key)) is not None:
+            return RawJSON(cached)
+
+    if value is _MISSING:
+        value = resource['fn'](**arguments)
+    contents = resources.get_contents(
+        uri,
+        value,
+        mime_type=resource.get('mime_type'),
+        offset=meta.offset,
+        length=meta.length,
+        max_read_size=max_read_size,
+    )
+
+    chunks = [b'{"contents":[']
+    for i, entry in enumerate(contents):
+        if i:
+            chunks.append(b',')
+        chunks.extend(entry.chunks)
+    if etag is None:
+        chunks.append(b']}')
+    else:
+        chunks.append(b'],"_meta":{"etag":%s}}' % dumps(etag))
+
+    result = RawJSON(*chunks)
+    if read_cache is not None and key is not None:
+        # Blobs can only be encoded once
+        data = bytes(result)
+        read_cache.set(key, data)
+        return RawJSON(data)
+    return result
+
+
+def get_etag(version: Any) -> str:
+    """Returns the ETag of a version of a resource, e.g. its modified time."""
+    return hashlib.sha1(str(version).encode()).hexdigest()[:20]
+
+
+def handle_subscribe(
+    params,
+    subscriptions: Subscriptions,
+    resource_registry: OrderedDict,
+    template_router: TemplateRouter,
+    *,
+    session_id: str | None,
+) -> dict:
+    """Handles the resources/subscribe request from the client.
+
+    A URI that ends in '/' subscribes to all resources under it, and need not
+    be a resource itself.
+
+    Raises:
+        ValueError: If the request has no session, updates are sent over the
+            session's GET stream. The server must have a session store.
+        ResourceNotFoundError: If no resource or template matches the URI.
+    """
+    subscribe_params = types.SubscribeRequestParams.model_validate(params)
+    uri = subscribe_params.uri
+    if session_id is None:
+        raise ValueError('Subscribing to resources needs a session, see session_store')
+    if not uri.endswith('/'):
+        find_resource(uri, resource_registry, template_router)
+
+    subscriptions.subscribe(session_id, uri)
+    return {}
+
+
+def handle_unsubscribe(
+    params,
+    subscriptions: Subscriptions,
+    *,
+    session_id: str | None,
+) -> dict:
+    """Handles the resources/unsubscribe request from the client."""
+    unsubscribe_params = types.UnsubscribeRequestParams.model_validate(params)
+    if session_id is not None:
+        subscriptions.unsubscribe(session_id, unsubscribe_params.uri)
+    return {}
+
+
+def find_resource(
+    uri: str,
+    resource_registry: OrderedDict,
+    template_router: TemplateRouter,
+) -> tuple[resources.Resource, dict[str, Any]]:
+    """Returns the resource for `uri` and the arguments its function is
+    called with, the values of the template's variables.
+
+    Raises:
+        ResourceNotFoundError: If no resource or template matches the URI.
+    """
+    if (resource := resource_registry.get(uri)) is not None:
+        return resource, {}
+
+    if (found := template_router.match(uri)) is not None:
+        return found
+
+    raise ResourceNotFoundError(f"Resource '{uri}' not found", data={'uri': uri})
+
+
+def get_resource_description(resource_info) -> types.Resource:
+    """Returns the resource as sent to the client.
+
+    Raises a pydantic `ValidationError` (a `ValueError`) if the resource is
+    invalid.
+    """
+    return types.Resource(
+        uri=resource_info['uri_template'],
+        name=resource_info['name'],
+        title=resource_info.get('title'),
+        description=resource_info.get('description'),
+        mimeType=resource_info.get('mime_type'),
+        annotations=resource_info.get('annotations'),
+        size=resource_info.get('size'),
+    )
+
+
+def get_template_description(resource_info) -> types.ResourceTemplate:
+    """Returns the resource template as sent to the client.
+
+    Raises a pydantic `ValidationError` (a `ValueError`) if the template is
+    invalid.
+    """
+    return types.ResourceTemplate(
+        uriTemplate=resource_info['uri_template'],
+        name=resource_info['name'],
+        title=resource_info.get('title'),
+        description=resource_info.get('description'),
+        mimeType=resource_info.get('mime_type'),
+        annotations=resource_info.get('annotations'),
+    )
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any
+from urllib.parse import unquote
+
+from frappe_mcp.server.resources.uri_template import get_segment_variable, match_uri
+
+if TYPE_CHECKING:
+    from frappe_mcp.server.resources import Resource
+
+__all__ = ['TemplateRouter']
+
+
+class _Node:
+    __slots__ = ('literals', 'patterns', 'templates', 'variable')
+
+    def __init__(self):
+        # Children by the literal text of the next segment
+        self.literals: dict[str, _Node] = {}
+        # Child for a `{name}` segment, shared by all templates
+        self.variable: _Node | None = None
+        # Templates that end at this node, with the names of their variables
+        self.templates: list[tuple[Resource, list[str]]] = []
+        # Templates matched by their pattern from this node on
+        self.patterns: list[Resource] = []
+
+
+class TemplateRouter:
+    """Finds the resource template that matches a URI.
+
+    Templates are split into segments at '/' and kept in a trie, so a lookup
+    follows the segments of the URI rather than trying each template in turn
+    and takes about the same time however many templates are registered.
+    Segments that are a single `{name}` variable share a branch, the rest of a
+    template that has any other expression, e.g. `{+path}` or `{name}.json`,
+    is matched using its compiled pattern once the lookup reaches it.
+
+    Literal segments take precedence over variables, and both over patterns,
+    e.g. 'frappe://doc/User/{name}' is matched before
+    'frappe://doc/{doctype}/{name}' whatever the order they are registered in.
+    Otherwise the template registered first is matched.
+
+    The trie is built from `templates` on the first lookup, and rebuilt if
+    `templates` is a `Registry` that has changed since.
+
+    Args:
+        templates: Mapping of URI templates to their resources.
+    """
+
+    def __init__(self, templates: Mapping[str, Resource]):
+        self.templates = templates
+        self._state: tuple[Any, _Node] | None = None
+
+    def match(self, uri: str) -> tuple[Resource, dict[str, str]] | None:
+        """Returns the template that matches `uri` and the values of its
+        variables, or None if no template matches."""
+        return _match(self._get_root(), uri, uri.split('/'), 0, [])
+
+    def _get_root(self) -> _Node:
+        # A plain mapping has no version and is built once
+        version = getattr(self.templates, 'version', None)
+        state = self._state
+        if state is None or state[0] != version:
+            state = self._state = (version, _build(self.templates.values()))
+        return state[1]
+
+
+def _build(templates) -> _Node:
+    root = _Node()
+    for template in templates:
+        _insert(root, template)
+    return root
+
+
+def _insert(root: _Node, template: Resource):
+    node = root
+    names = []
+    for segment in template['uri_template'].split('/'):
+        if '{' not in segment and '}' not in segment:
+            node = node.literals.setdefault(segment, _Node())
+            continue
+
+        if (name := get_segment_variable(segment)) is None:
+            node.patterns.append(template)
+            return
+
+        names.append(name)
+        if node.variable is None:
+            node.variable = _Node()
+        node = node.variable
+
+    node.templates.append((template, names))
+
+
+def _match(
+    node: _Node,
+    uri: str,
+    segments: list[str],
+    index: int,
+    values: list[str],
+) -> tuple[Resource, dict[str, str]] | None:
+    if index == len(segments):
+        if node.templates:
+            template, names = node.templates[0]
+            return template, {n: unquote(v) for n, v in zip(names, values, strict=True)}
+    else:
+        segment = segments[index]
+        child = node.literals.get(segment)
+        if child is not None and (
+            found := _match(child, uri, segments, index + 1, values)
+        ):
+            return found
+
+        # Matches the same values as `[^/?#]+` in the template's pattern
+        if node.variable is not None and _is_value(segment):
+            values.append(segment)
+            found = _match(node.variable, uri, segments, index + 1, values)
+            values.pop()
+            if found:
+                return found
+
+    for template in node.patterns:
+        if (arguments := match_uri(template['pattern'], uri)) is not None:
+            return template, arguments
+    return None
+
+
+def _is_value(segment: str) -> bool:
+    return bool(segment) and '?' not in segment and '#' not in segment
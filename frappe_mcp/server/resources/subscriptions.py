@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable, Iterable
+
+from frappe_mcp.server.process_local import ProcessLocal
+
+__all__ = ['Subscriptions']
+
+
+class Subscriptions:
+    """Resource subscriptions of the sessions connected to this process.
+
+    Subscriptions are indexed by URI. A URI that ends in '/' subscribes to
+    every resource under it, e.g. 'frappe://doc/Sales Order/', these are
+    indexed by prefix so a change is matched by looking up each '/' prefix
+    of the changed URI, whatever the number of subscriptions.
+
+    Changes are coalesced: a session is sent one update per URI it
+    subscribed to, after no further change to it for `debounce` seconds, or
+    at most `max_delay` seconds after the first change. A bulk change to
+    many resources under a subscribed prefix results in a single update
+    with the subscribed URI.
+
+    If `is_active` is set, the subscriptions of sessions that have ended,
+    e.g. expired from the session store, are removed before an update is
+    sent to them, and every `purge_interval` seconds.
+
+    Args:
+        send: Called with a session id and a URI to send the update.
+        debounce: Seconds without changes after which updates are sent.
+        max_delay: Seconds after which updates are sent even if there are
+            further changes.
+        is_active: Called with a session id, returns False once the session
+            has ended.
+        purge_interval: Seconds between checks of the subscribed sessions.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, str], None],
+        *,
+        debounce: float = 0.5,
+        max_delay: float = 10,
+        is_active: Callable[[str], bool] | None = None,
+        purge_interval: float = 300,
+    ):
+        self.send = send
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.is_active = is_active
+        self.purge_interval = purge_interval
+        # Session ids by subscribed URI, and by prefix for URIs ending in '/'
+        self._uris: dict[str, set[str]] = {}
+        self._prefixes: dict[str, set[str]] = {}
+        # Subscribed URIs by session id
+        self._sessions: dict[str, set[str]] = {}
+        # URIs to send by session id, and when they first and last changed
+        self._pending: dict[str, set[str]] = {}
+        self._first_change = 0.0
+        self._last_change = 0.0
+        self._next_purge = time.monotonic() + purge_interval
+        self._condition = threading.Condition()
+        # Runs once per process, workers forked after a subscription was
+        # made start their own.
+        self._flusher = ProcessLocal(self._start_flusher_thread)
+
+    def __bool__(self) -> bool:
+        return bool(self._sessions)
+
+    def subscribe(self, session_id: str, uri: str):
+        index = self._prefixes if uri.endswith('/') else self._uris
+        with self._condition:
+            index.setdefault(uri, set()).add(session_id)
+            self._sessions.setdefault(session_id, set()).add(uri)
+            if self.is_active is not None:
+                # Purges the subscriptions of ended sessions
+                self._start_flusher()
+
+    def unsubscribe(self, session_id: str, uri: str):
+        with self._condition:
+            self._remove(session_id, uri)
+
+    def remove_session(self, session_id: str):
+        """Removes all subscriptions of the session, and its pending updates."""
+        with self._condition:
+            for uri in list(self._sessions.get(session_id, ())):
+                self._remove(session_id, uri)
+            self._pending.pop(session_id, None)
+
+    def get_uris(self, session_id: str) -> set[str]:
+        """Returns the URIs the session is subscribed to in this process."""
+        with self._condition:
+            return set(self._sessions.get(session_id, ()))
+
+    def get_subscribers(self, uri: str) -> dict[str, set[str]]:
+        """Returns the subscribed URIs that a change to `uri` affects, by
+        session id."""
+        with self._condition:
+            return self._get_subscribers(uri)
+
+    def updated(self, uris: Iterable[str]):
+        """Records changes to the resources, updates are sent to the
+        sessions subscribed to them once the changes settle."""
+        with self._condition:
+            if not self._sessions:
+                return
+
+            was_idle = not self._pending
+            changed = False
+            for uri in uris:
+                for session_id, subscribed in self._get_subscribers(uri).items():
+                    self._pending.setdefault(session_id, set()).update(subscribed)
+                    changed = True
+
+            if not changed:
+                return
+            now = time.monotonic()
+            if was_idle:
+                self._first_change = now
+            self._last_change = now
+            self._start_flusher()
+            self._condition.notify()
+
+    def flush(self):
+        """Sends the pending updates now."""
+        with self._condition:
+            pending = self._pending
+            self._pending = {}
+        self._send(pending)
+
+    def purge(self):
+        """Removes the subscriptions of the sessions that have ended."""
+        with self._condition:
+            session_ids = list(self._sessions)
+        for session_id in session_ids:
+            if not self._is_active(session_id):
+                self.remove_session(session_id)
+
+    def _is_active(self, session_id: str) -> bool:
+        if self.is_active is None:
+            return True
+        try:
+            return self.is_active(session_id)
+        except Exception:
+            # e.g. the session store is unreachable, checked again later
+            return True
+
+    def _get_subscribers(self, uri: str) -> dict[str, set[str]]:
+        subscribers: dict[str, set[str]] = {}
+        for session_id in self._uris.get(uri, ()):
+            subscribers.setdefault(session_id, set()).add(uri)
+
+        if self._prefixes:
+            position = uri.find('/')
+            while position != -1:
+                prefix = uri[: position + 1]
+                for session_id in self._prefixes.get(prefix, ()):
+                    subscribers.setdefault(session_id, set()).add(prefix)
+                position = uri.find('/', position + 1)
+        return subscribers
+
+    def _remove(self, session_id: str, uri: str):
+        index = self._prefixes if uri.endswith('/') else self._uris
+        if (sessions := index.get(uri)) is not None:
+            sessions.discard(session_id)
+            if not sessions:
+                del index[uri]
+
+        if (uris := self._sessions.get(session_id)) is not None:
+            uris.discard(uri)
+            if not uris:
+                del self._sessions[session_id]
+                self._pending.pop(session_id, None)
+
+    def _start_flusher(self):
+        self._flusher.get()
+
+    def _start_flusher_thread(self):
+        threading.Thread(
+            target=self._run_flusher,
+            name='frappe-mcp-subscriptions',
+            daemon=True,
+        ).start()
+
+    def _run_flusher(self):
+        while True:
+            with self._condition:
+                now = time.monotonic()
+                due = None
+                if self._pending:
+                    due = min(
+                        self._last_change + self.debounce,
+                        self._first_change + self.max_delay,
+                    )
+                if self.is_active is not None:
+                    due = (
+                        self._next_purge if due is None else min(due, self._next_purge)
+                    )
+
+                if due is None or (remaining := due - now) > 0:
+                    self._condition.wait(None if due is None else remaining)
+                    continue
+
+                pending = None
+                if self.is_active is not None and self._next_purge <= now:
+                    self._next_purge = now + self.purge_interval
+                else:
+                    pending = self._pending
+                    self._pending = {}
+
+            if pending is None:
+                self.purge()
+            else:
+                self._send(pending)
+
+    def _send(self, pending: dict[str, set[str]]):
+        for session_id, uris in pending.items():
+            if not self._is_active(session_id):
+                self.remove_session(session_id)
+                continue
+            for uri in sorted(uris):
+                try:
+                    self.send(session_id, uri)
+                except Exception:
+                    # e.g. the broker is unreachable, the flusher keeps running
+                    pass
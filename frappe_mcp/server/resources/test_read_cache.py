@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import base64
+import json
+import os
+
+import pytest
+
+from frappe_mcp.server.cache import MemoryCache, ReadCache
+from frappe_mcp.server.resources import DirectoryProvider, get_resource
+from frappe_mcp.server.server import MCP
+from frappe_mcp.server.tests.helpers import request
+
+
+def _read(mcp, uri, **meta):
+    params: dict = {'uri': uri}
+    if meta:
+        params['_meta'] = meta
+    return request(mcp, 'resources/read', params)['result']
+
+
+@pytest.fixture
+def docs():
+    # Stands in for the database, modified is bumped on every change
+    return {'ToDo': {'TD-1': {'description': 'Call back', 'modified': 1}}}
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def mcp(docs, calls, tmp_path):
+    mcp = MCP(name='frappe-mcp', read_cache=ReadCache(per_user=False))
+
+    def get_modified(doctype: str, name: str):
+        return docs[doctype][name]['modified']
+
+    @mcp.resource('frappe://doc/{doctype}/{name}', version=get_modified)
+    def get_doc(doctype: str, name: str):
+        calls.append(name)
+        return docs[doctype][name]
+
+    @mcp.resource('frappe://unversioned')
+    def unversioned():
+        calls.append('unversioned')
+        return 'text'
+
+    (tmp_path / 'a.bin').write_bytes(b'\x00' * 64)
+    mcp.add_resource(get_resource(DirectoryProvider(tmp_path), 'file:///{+path}'))
+    return mcp
+
+
+def test_not_modified(mcp, docs, calls):
+    result = _read(mcp, 'frappe://doc/ToDo/TD-1')
+    etag = result['_meta']['etag']
+    assert json.loads(result['contents'][0]['text'])['description'] == 'Call back'
+
+    result = _read(mcp, 'frappe://doc/ToDo/TD-1', etag=etag)
+    assert result == {'contents': [], '_meta': {'etag': etag, 'notModified': True}}
+    assert calls == ['TD-1']
+
+    docs['ToDo']['TD-1'] = {'description': 'Done', 'modified': 2}
+    result = _read(mcp, 'frappe://doc/ToDo/TD-1', etag=etag)
+    assert result['_meta']['etag'] != etag
+    assert json.loads(result['contents'][0]['text'])['description'] == 'Done'
+    assert calls == ['TD-1', 'TD-1']
+
+
+def test_cached(mcp, docs, calls):
+    first = _read(mcp, 'frappe://doc/ToDo/TD-1')
+    assert _read(mcp, 'frappe://doc/ToDo/TD-1') == first
+    assert calls == ['TD-1']
+    assert mcp._read_cache.get_stats() == {'hits': 1, 'misses': 1}
+
+    docs['ToDo']['TD-1']['modified'] = 2
+    _read(mcp, 'frappe://doc/ToDo/TD-1')
+    assert calls == ['TD-1', 'TD-1']
+
+
+def test_unversioned(mcp, calls):
+    result = _read(mcp, 'frappe://unversioned')
+    assert '_meta' not in result
+    _read(mcp, 'frappe://unversioned', etag='x')
+    assert calls == ['unversioned', 'unversioned']
+
+
+def test_file(mcp, tmp_path):
+    result = _read(mcp, 'file:///a.bin')
+    etag = result['_meta']['etag']
+    assert _read(mcp, 'file:///a.bin', etag=etag)['_meta']['notModified'] is True
+
+    # Ranges are cached separately
+    part = _read(mcp, 'file:///a.bin', offset=8, length=8)
+    assert base64.b64decode(part['contents'][0]['blob']) == b'\x00' * 8
+    assert part['contents'][0]['_meta'] == {'offset': 8, 'length': 8, 'size': 64}
+
+    path = tmp_path / 'a.bin'
+    path.write_bytes(b'\x01' * 64)
+    os.utime(path, ns=(0, 10**9))
+    result = _read(mcp, 'file:///a.bin', etag=etag)
+    assert result['_meta']['etag'] != etag
+    assert base64.b64decode(result['contents'][0]['blob']) == b'\x01' * 64
+
+
+def test_memory_cache_bounded():
+    cache = ReadCache(MemoryCache(max_bytes=100), per_user=False)
+    for i in range(10):
+        cache.set(cache.get_key(f'frappe://doc/ToDo/TD-{i}', 'v1', ()), b'x' * 40)
+
+    assert cache.get(cache.get_key('frappe://doc/ToDo/TD-0', 'v1', ())) is None
+    assert cache.get(cache.get_key('frappe://doc/ToDo/TD-9', 'v1', ())) == b'x' * 40
@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import base64
+import json
+import tracemalloc
+
+import pytest
+
+from frappe_mcp.server import types
+from frappe_mcp.server.registry import Registry
+from frappe_mcp.server.resources import (
+    DirectoryProvider,
+    File,
+    TemplateRouter,
+    get_resource,
+    get_template_description,
+)
+from frappe_mcp.server.resources.uri_template import compile_uri_template, match_uri
+from frappe_mcp.server.server import MCP
+from frappe_mcp.server.sessions import MemorySessionStore
+from frappe_mcp.server.tests.helpers import get_request, post, request
+from frappe_mcp.server.tools import content
+
+
+def _read(mcp, uri, **meta):
+    params: dict = {'uri': uri}
+    if meta:
+        params['_meta'] = meta
+    return request(mcp, 'resources/read', params)
+
+
+@pytest.fixture
+def files(tmp_path):
+    root = tmp_path / 'files'
+    root.mkdir()
+    (root / 'notes.txt').write_text('hello')
+    (root / 'data').mkdir()
+    (root / 'data' / 'blob.bin').write_bytes(bytes(range(256)) * 4)
+    (tmp_path / 'secret.txt').write_text('secret')
+    return root
+
+
+@pytest.fixture
+def mcp(files):
+    mcp = MCP(name='frappe-mcp')
+
+    @mcp.resource('frappe://readme', mime_type='text/markdown')
+    def readme():
+        """The app's readme."""
+        return '# Readme'
+
+    @mcp.resource('frappe://doc/{doctype}/{name}')
+    def get_doc(doctype: str, name: str):
+        """A document as JSON."""
+        return {'doctype': doctype, 'name': name}
+
+    @mcp.resource('frappe://raw')
+    def raw():
+        return b'\x89PNG\r\n\x1a\n' + b'\x00' * 8
+
+    mcp.add_resource(get_resource(DirectoryProvider(files), 'file:///files/{+path}'))
+    return mcp
+
+
+def test_list(mcp):
+    result = request(mcp, 'resources/list')['result']
+    assert [r['uri'] for r in result['resources']] == [
+        'frappe://readme',
+        'frappe://raw',
+    ]
+    assert result['resources'][0] == {
+        'uri': 'frappe://readme',
+        'name': 'readme',
+        'description': "The app's readme.",
+        'mimeType': 'text/markdown',
+    }
+
+    templates = request(mcp, 'resources/templates/list')['result']
+    assert [t['uriTemplate'] for t in templates['resourceTemplates']] == [
+        'frappe://doc/{doctype}/{name}',
+        'file:///files/{+path}',
+    ]
+    assert templates['resourceTemplates'][1]['name'] == 'files'
+    assert 'description' not in templates['resourceTemplates'][1]
+
+
+def test_initialize_capability(mcp):
+    result = request(mcp, 'initialize', {'protocolVersion': '2025-06-18'})['result']
+    # Subscribing needs a session store
+    assert result['capabilities']['resources'] == {
+        'subscribe': False,
+        'listChanged': False,
+    }
+
+    mcp._session_store = MemorySessionStore()
+    result = request(mcp, 'initialize', {'protocolVersion': '2025-06-18'})['result']
+    assert result['capabilities']['resources']['subscribe'] is True
+
+    empty = MCP(name='frappe-mcp')
+    result = request(empty, 'initialize', {'protocolVersion': '2025-06-18'})['result']
+    assert 'resources' not in result['capabilities']
+
+
+def test_read_text(mcp):
+    result = _read(mcp, 'frappe://readme')['result']
+    assert result == {
+        'contents': [
+            {'uri': 'frappe://readme', 'mimeType': 'text/markdown', 'text': '# Readme'}
+        ]
+    }
+
+
+def test_read_template(mcp):
+    contents = _read(mcp, 'frappe://doc/Sales%20Order/SO-0001')['result']['contents']
+    assert contents[0]['mimeType'] == 'application/json'
+    assert json.loads(contents[0]['text']) == {
+        'doctype': 'Sales Order',
+        'name': 'SO-0001',
+    }
+
+
+def test_read_bytes(mcp):
+    contents = _read(mcp, 'frappe://raw')['result']['contents']
+    assert contents[0]['mimeType'] == 'image/png'
+    assert base64.b64decode(contents[0]['blob']).startswith(b'\x89PNG')
+    assert '_meta' not in contents[0]
+
+
+def test_read_file(mcp, files):
+    contents = _read(mcp, 'file:///files/notes.txt')['result']['contents']
+    assert contents[0]['text'] == 'hello'
+
+    contents = _read(mcp, 'file:///files/data/blob.bin')['result']['contents']
+    expected = (files / 'data' / 'blob.bin').read_bytes()
+    assert base64.b64decode(contents[0]['blob']) == expected
+
+
+def test_read_file_encoded_while_written(mcp, files):
+    # Larger than a chunk, only a chunk at a time is held in memory
+    size = 8 * content.CHUNK_SIZE
+    (files / 'large.bin').write_bytes(b'\x00' * size)
+    data = get_request('resources/read', {'uri': 'file:///files/large.bin'})
+
+    tracemalloc.start()
+    try:
+        response = post(mcp, data)
+        written = sum(len(chunk) for chunk in response.iter_encoded())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    response.close()
+
+    assert written == response.content_length > 4 * size // 3
+    assert peak < size
+
+
+def test_read_range(mcp, files, monkeypatch):
+    monkeypatch.setattr(content, 'CHUNK_SIZE', 48)
+    expected = (files / 'data' / 'blob.bin').read_bytes()
+
+    contents = _read(mcp, 'file:///files/data/blob.bin', offset=100, length=200)
+    blob = contents['result']['contents'][0]
+    assert base64.b64decode(blob['blob']) == expected[100:300]
+    assert blob['_meta'] == {'offset': 100, 'length': 200, 'size': 1024}
+
+    # Clamped to the size of the file
+    contents = _read(mcp, 'file:///files/data/blob.bin', offset=1000, length=100)
+    blob = contents['result']['contents'][0]
+    assert base64.b64decode(blob['blob']) == expected[1000:]
+    assert blob['_meta'] == {'offset': 1000, 'length': 24, 'size': 1024}
+
+
+def test_read_text_range(mcp):
+    contents = _read(mcp, 'file:///files/notes.txt', offset=1, length=3)
+    blob = contents['result']['contents'][0]
+    assert base64.b64decode(blob['blob']) == b'ell'
+
+
+def test_max_read_size(files):
+    mcp = MCP(name='frappe-mcp', max_resource_read=300)
+    mcp.add_resource(get_resource(DirectoryProvider(files), 'file:///files/{+path}'))
+    expected = (files / 'data' / 'blob.bin').read_bytes()
+
+    blob = _read(mcp, 'file:///files/data/blob.bin')['result']['contents'][0]
+    assert base64.b64decode(blob['blob']) == expected[:300]
+    assert blob['_meta'] == {'offset': 0, 'length': 300, 'size': 1024}
+
+    contents = _read(mcp, 'file:///files/data/blob.bin', offset=900)
+    blob = contents['result']['contents'][0]
+    assert base64.b64decode(blob['blob']) == expected[900:]
+
+
+def test_file_object(tmp_path):
+    path = tmp_path / 'report.pdf'
+    path.write_bytes(b'%PDF-1.7' + b'\x00' * 100)
+    mcp = MCP(name='frappe-mcp')
+
+    @mcp.resource('frappe://report')
+    def report():
+        return open(path, 'rb')
+
+    @mcp.resource('frappe://report-file')
+    def report_file():
+        return File(path)
+
+    @mcp.resource('frappe://report-text', mime_type='text/csv')
+    def report_text():
+        return open(tmp_path / 'report.csv')
+
+    (tmp_path / 'report.csv').write_text('a,b\n1,2\n')
+    text = _read(mcp, 'frappe://report-text')['result']['contents'][0]
+    assert text == {
+        'uri': 'frappe://report-text',
+        'mimeType': 'text/csv',
+        'text': 'a,b\n1,2\n',
+    }
+
+    for uri in ('frappe://report', 'frappe://report-file'):
+        blob = _read(mcp, uri)['result']['contents'][0]
+        assert blob['mimeType'] == 'application/pdf'
+        assert base64.b64decode(blob['blob']) == path.read_bytes()
+
+
+def test_not_found(mcp):
+    for uri in (
+        'frappe://unknown',
+        'file:///files/../secret.txt',
+        'file:///files/missing.txt',
+        'file:///files/data',
+    ):
+        error = _read(mcp, uri)['error']
+        assert error['code'] == types.RESOURCE_NOT_FOUND, uri
+
+
+def test_invalid_template():
+    def fn(name):
+        pass
+
+    with pytest.raises(ValueError):
+        get_resource(fn, 'frappe://doc/{name}/{name}')
+    with pytest.raises(ValueError):
+        get_resource(fn, 'frappe://doc/{name}/{doctype}')
+    with pytest.raises(ValueError):
+        get_resource(fn, 'frappe://doc/{?name}')
+
+
+def test_match_uri():
+    pattern = compile_uri_template('frappe://doc/{doctype}/{name}')
+    assert match_uri(pattern, 'frappe://doc/User/admin') == {
+        'doctype': 'User',
+        'name': 'admin',
+    }
+    assert match_uri(pattern, 'frappe://doc/User/admin/extra') is None
+
+    pattern = compile_uri_template('file:///{+path}.json')
+    assert match_uri(pattern, 'file:///a/b.json') == {'path': 'a/b'}
+
+
+def _get_router(*uri_templates):
+    registry = Registry('resourceTemplates', get_template_description)
+    for uri_template in uri_templates:
+
+        def fn(**kwargs):
+            pass
+
+        registry[uri_template] = get_resource(fn, uri_template)
+    return registry, TemplateRouter(registry)
+
+
+def _route(router, uri):
+    if (found := router.match(uri)) is None:
+        return None
+    return found[0]['uri_template'], found[1]
+
+
+def test_router():
+    _, router = _get_router(
+        'frappe://doc/{doctype}/{name}',
+        'frappe://doc/User/{name}',
+        'frappe://doc/{doctype}/{name}/{+path}',
+        'frappe://report/{name}.csv',
+        'frappe://report/{name}',
+    )
+    assert _route(router, 'frappe://doc/User/admin') == (
+        'frappe://doc/User/{name}',
+        {'name': 'admin'},
+    )
+    assert _route(router, 'frappe://doc/ToDo/a%2Fb') == (
+        'frappe://doc/{doctype}/{name}',
+        {'doctype': 'ToDo', 'name': 'a/b'},
+    )
+    assert _route(router, 'frappe://doc/User/admin/files/a.png') == (
+        'frappe://doc/{doctype}/{name}/{+path}',
+        {'doctype': 'User', 'name': 'admin', 'path': 'files/a.png'},
+    )
+    assert _route(router, 'frappe://report/sales') == (
+        'frappe://report/{name}',
+        {'name': 'sales'},
+    )
+    assert _route(router, 'frappe://report/sales.csv') == (
+        'frappe://report/{name}',
+        {'name': 'sales.csv'},
+    )
+    assert _route(router, 'frappe://doc/User') is None
+    assert _route(router, 'frappe://doc/User/admin?x=1') is None
+    assert _route(router, 'frappe://doc//admin') is None
+
+
+def test_router_matches_patterns():
+    uri_templates = [
+        'frappe://doc/{doctype}/{name}',
+        'frappe://doc/{doctype}/{name}/{+path}',
+        'frappe://report/{name}.csv',
+        'file:///{+path}',
+    ]
+    _, router = _get_router(*uri_templates)
+    patterns = [compile_uri_template(t) for t in uri_templates]
+    for uri in (
+        'frappe://doc/User/admin',
+        'frappe://doc/User/admin/a/b',
+        'frappe://report/sales.csv',
+        'frappe://report/.csv',
+        'file:///a/b.txt',
+        'file:///',
+    ):
+        expected = None
+        for uri_template, pattern in zip(uri_templates, patterns, strict=True):
+            if (arguments := match_uri(pattern, uri)) is not None:
+                expected = (uri_template, arguments)
+                break
+        assert _route(router, uri) == expected, uri
+
+
+def test_router_rebuilt_on_change():
+    registry, router = _get_router('frappe://doc/{doctype}/{name}')
+    assert (
+        _route(router, 'frappe://doc/User/admin')[0] == 'frappe://doc/{doctype}/{name}'
+    )
+
+    registry['frappe://doc/User/{name}'] = get_resource(
+        lambda name: name, 'frappe://doc/User/{name}'
+    )
+    assert _route(router, 'frappe://doc/User/admin')[0] == 'frappe://doc/User/{name}'
+
+    registry.clear()
+    assert _route(router, 'frappe://doc/User/admin') is None
+
+
+def test_router_many_templates():
+    templates = [f'frappe://doc/DocType {i}/{{name}}' for i in range(1000)]
+    _, router = _get_router(*templates)
+    assert _route(router, 'frappe://doc/DocType 999/x') == (
+        templates[-1],
+        {'name': 'x'},
+    )
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from werkzeug.wrappers import Request, Response
+
+from frappe_mcp.server import types
+from frappe_mcp.server.broker import FileBroker, InProcessBroker, get_session_channel
+from frappe_mcp.server.resources import Subscriptions
+from frappe_mcp.server.server import MCP
+from frappe_mcp.server.sessions import MemorySessionStore, SQLiteSessionStore
+from frappe_mcp.server.tests import helpers
+
+
+def _request(mcp, method, params, session_id=None):
+    return helpers.request(mcp, method, params, session_id=session_id)
+
+
+def _initialize(mcp) -> str:
+    response = helpers.post(mcp, helpers.get_request('initialize'))
+    return response.headers['Mcp-Session-Id']
+
+
+def _get_mcp(broker=None, debounce=0.05, session_store=None):
+    mcp = MCP(
+        name='frappe-mcp',
+        broker=broker,
+        resource_debounce=debounce,
+        session_store=session_store or MemorySessionStore(),
+    )
+
+    @mcp.resource('frappe://doc/{doctype}/{name}')
+    def get_doc(doctype: str, name: str):
+        return {'doctype': doctype, 'name': name}
+
+    return mcp
+
+
+def _get_updates(subscription, timeout=1.0):
+    updates = []
+    deadline = time.monotonic() + timeout
+    while (remaining := deadline - time.monotonic()) > 0:
+        if (message := subscription.get(remaining)) is not None:
+            updates.append(message['params']['uri'])
+    return updates
+
+
+class _Sent:
+    def __init__(self):
+        self.updates = []
+        self.event = threading.Event()
+
+    def __call__(self, session_id, uri):
+        self.updates.append((session_id, uri))
+        self.event.set()
+
+
+def test_index():
+    subscriptions = Subscriptions(_Sent())
+    subscriptions.subscribe('a', 'frappe://doc/ToDo/TD-1')
+    subscriptions.subscribe('b', 'frappe://doc/ToDo/')
+    subscriptions.subscribe('c', 'frappe://doc/')
+
+    assert subscriptions.get_subscribers('frappe://doc/ToDo/TD-1') == {
+        'a': {'frappe://doc/ToDo/TD-1'},
+        'b': {'frappe://doc/ToDo/'},
+        'c': {'frappe://doc/'},
+    }
+    assert subscriptions.get_subscribers('frappe://doc/User/admin') == {
+        'c': {'frappe://doc/'}
+    }
+    assert subscriptions.get_subscribers('frappe://doc/ToDo/TD-10') == {
+        'b': {'frappe://doc/ToDo/'},
+        'c': {'frappe://doc/'},
+    }
+
+    subscriptions.unsubscribe('b', 'frappe://doc/ToDo/')
+    subscriptions.remove_session('c')
+    assert subscriptions.get_subscribers('frappe://doc/ToDo/TD-2') == {}
+    assert subscriptions
+
+
+def test_bulk_change_is_coalesced():
+    sent = _Sent()
+    subscriptions = Subscriptions(sent, debounce=0.05)
+    subscriptions.subscribe('a', 'frappe://doc/Item/')
+    subscriptions.subscribe('b', 'frappe://doc/Item/ITEM-00001')
+    subscriptions.subscribe('c', 'frappe://doc/User/')
+
+    subscriptions.updated(f'frappe://doc/Item/ITEM-{i:05}' for i in range(50_000))
+    assert sent.event.wait(2)
+    time.sleep(0.1)
+    assert sorted(sent.updates) == [
+        ('a', 'frappe://doc/Item/'),
+        ('b', 'frappe://doc/Item/ITEM-00001'),
+    ]
+
+
+def test_debounced_until_quiet():
+    sent = _Sent()
+    subscriptions = Subscriptions(sent, debounce=0.3, max_delay=10)
+    subscriptions.subscribe('a', 'frappe://doc/Item/')
+
+    for i in range(5):
+        subscriptions.updated([f'frappe://doc/Item/ITEM-{i}'])
+        time.sleep(0.02)
+    assert sent.updates == []
+
+    assert sent.event.wait(1)
+    assert sent.updates == [('a', 'frappe://doc/Item/')]
+
+
+def test_max_delay():
+    sent = _Sent()
+    subscriptions = Subscriptions(sent, debounce=1, max_delay=0.1)
+    subscriptions.subscribe('a', 'frappe://doc/Item/')
+
+    start = time.monotonic()
+    while not sent.event.is_set():
+        assert time.monotonic() - start < 1
+        subscriptions.updated(['frappe://doc/Item/ITEM-1'])
+        time.sleep(0.02)
+    assert sent.updates == [('a', 'frappe://doc/Item/')]
+
+
+def test_ended_sessions_removed():
+    sent = _Sent()
+    active = {'a', 'b'}
+    subscriptions = Subscriptions(
+        sent, debounce=0.01, is_active=active.__contains__, purge_interval=0.05
+    )
+    subscriptions.subscribe('a', 'frappe://doc/Item/')
+    subscriptions.subscribe('b', 'frappe://doc/Item/')
+    subscriptions.subscribe('c', 'frappe://doc/User/')
+
+    # Checked before an update is sent
+    subscriptions.updated(['frappe://doc/Item/ITEM-1', 'frappe://doc/User/admin'])
+    subscriptions.flush()
+    assert sorted(sent.updates) == [
+        ('a', 'frappe://doc/Item/'),
+        ('b', 'frappe://doc/Item/'),
+    ]
+    assert subscriptions.get_subscribers('frappe://doc/User/admin') == {}
+
+    # and periodically, without changes
+    active.discard('b')
+    deadline = time.monotonic() + 1
+    while subscriptions.get_subscribers('frappe://doc/Item/ITEM-1').keys() != {'a'}:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_subscribe():
+    broker = InProcessBroker()
+    mcp = _get_mcp(broker)
+    session_a = _initialize(mcp)
+    session_b = _initialize(mcp)
+    subscription = broker.subscribe([get_session_channel(session_a)])
+    other = broker.subscribe([get_session_channel(session_b)])
+
+    params = {'uri': 'frappe://doc/ToDo/TD-1'}
+    assert _request(mcp, 'resources/subscribe', params, session_a)['result'] == {}
+    params = {'uri': 'frappe://doc/User/'}
+    assert _request(mcp, 'resources/subscribe', params, session_b)['result'] == {}
+
+    mcp.notify_resource_updated('frappe://doc/ToDo/TD-1', 'frappe://doc/ToDo/TD-2')
+    assert _get_updates(subscription, 0.3) == ['frappe://doc/ToDo/TD-1']
+    assert _get_updates(other, 0.01) == []
+
+    params = {'uri': 'frappe://doc/ToDo/TD-1'}
+    assert _request(mcp, 'resources/unsubscribe', params, session_a)['result'] == {}
+    mcp.notify_resource_updated('frappe://doc/ToDo/TD-1')
+    assert _get_updates(subscription, 0.2) == []
+
+
+@pytest.mark.parametrize(
+    'uri,has_session,code',
+    [
+        ('frappe://doc/ToDo/TD-1', False, types.INVALID_PARAMS),
+        ('frappe://unknown', True, types.RESOURCE_NOT_FOUND),
+    ],
+)
+def test_subscribe_error(uri, has_session, code):
+    mcp = _get_mcp()
+    session_id = _initialize(mcp) if has_session else None
+    response = _request(mcp, 'resources/subscribe', {'uri': uri}, session_id)
+    assert response['error']['code'] == code
+
+
+def test_subscribe_needs_session_store():
+    mcp = MCP(name='frappe-mcp')
+
+    @mcp.resource('frappe://doc/{doctype}/{name}')
+    def get_doc(doctype: str, name: str):
+        return name
+
+    # Any session id would be accepted by a stateless server
+    params = {'uri': 'frappe://doc/ToDo/TD-1'}
+    response = _request(mcp, 'resources/subscribe', params, 'session-a')
+    assert response['error']['code'] == types.INVALID_PARAMS
+    assert not mcp._subscriptions
+
+
+def test_subscriptions_stored_with_session(tmp_path):
+    # Each MCP instance stands in for a worker process
+    broker = InProcessBroker()
+    store = SQLiteSessionStore(tmp_path / 'sessions.db')
+    first = _get_mcp(broker, session_store=store)
+    second = _get_mcp(broker, session_store=store)
+    session_id = _initialize(first)
+    subscription = broker.subscribe([get_session_channel(session_id)])
+
+    params = {'uri': 'frappe://doc/ToDo/'}
+    assert _request(first, 'resources/subscribe', params, session_id)['result'] == {}
+    assert store.get(session_id)['subscriptions'] == ['frappe://doc/ToDo/']
+
+    # The client's stream reconnects to another worker, which takes over
+    request = Request.from_values(
+        method='GET',
+        headers={'Accept': 'text/event-stream', 'Mcp-Session-Id': session_id},
+    )
+    second.handle(request, Response()).close()
+    assert second._subscriptions.get_uris(session_id) == {'frappe://doc/ToDo/'}
+
+    # Only the worker holding the subscriptions sends the update
+    first.notify_resource_updated('frappe://doc/ToDo/TD-1')
+    second.notify_resource_updated('frappe://doc/ToDo/TD-1')
+    assert _get_updates(subscription, 0.3) == ['frappe://doc/ToDo/']
+    assert not first._subscriptions
+
+    assert _request(first, 'resources/unsubscribe', params, session_id)['result'] == {}
+    assert store.get(session_id)['subscriptions'] == []
+    assert not first._subscriptions
+
+    # The other worker drops them when it next checks the session
+    second.notify_resource_updated('frappe://doc/ToDo/TD-1')
+    second._subscriptions.flush()
+    assert not second._subscriptions
+    assert _get_updates(subscription, 0.1) == []
+
+
+def test_updates_from_other_process(tmp_path):
+    # Each MCP instance stands in for a worker process sharing the broker
+    broker = FileBroker(tmp_path, poll_interval=0.01)
+    store = SQLiteSessionStore(tmp_path / 'sessions.db')
+    subscribed = _get_mcp(broker, session_store=store)
+    publisher = _get_mcp(broker, session_store=store)
+    session_id = _initialize(subscribed)
+    subscription = broker.subscribe([get_session_channel(session_id)])
+
+    params = {'uri': 'frappe://doc/ToDo/'}
+    assert (
+        _request(subscribed, 'resources/subscribe', params, session_id)['result'] == {}
+    )
+
+    for i in range(100):
+        publisher.notify_resource_updated(f'frappe://doc/ToDo/TD-{i}')
+    assert _get_updates(subscription, 1) == ['frappe://doc/ToDo/']
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import re
+from urllib.parse import unquote
+
+__all__ = ['compile_uri_template', 'get_segment_variable', 'get_variables', 'match_uri']
+
+# An expression of a URI template, `{name}` or `{+name}` for reserved
+# expansion, which can hold '/'.
+_EXPRESSION = re.compile(r'\{(\+?)([A-Za-z_][A-Za-z0-9_]*)\}')
+
+
+def get_variables(uri_template: str) -> list[str]:
+    """Returns the names of the variables in a URI template, in order."""
+    return [m.group(2) for m in _EXPRESSION.finditer(uri_template)]
+
+
+def get_segment_variable(segment: str) -> str | None:
+    """Returns the name of the variable if `segment`, a part of a URI template
+    between '/'s, is a single simple expression, e.g. `{name}`."""
+    m = _EXPRESSION.fullmatch(segment)
+    if m is None or m.group(1):
+        return None
+    return m.group(2)
+
+
+def compile_uri_template(uri_template: str) -> re.Pattern[str]:
+    """Compiles a URI template into a pattern that matches the URIs it expands
+    to, with a group for each variable.
+
+    Supports the simple (`{name}`) and reserved (`{+name}`) expressions of
+    RFC 6570. A simple variable matches a single path segment, a reserved
+    variable matches the rest of the URI up to the next literal text.
+
+    Raises:
+        ValueError: If the template has other kinds of expressions or
+            repeats a variable.
+    """
+    pattern = []
+    names: set[str] = set()
+    position = 0
+    for m in _EXPRESSION.finditer(uri_template):
+        pattern.append(_escape_literal(uri_template, position, m.start()))
+        reserved, name = m.groups()
+        if name in names:
+            raise ValueError(f"Variable '{name}' repeated in '{uri_template}'")
+        names.add(name)
+        pattern.append(f'(?P<{name}>.+?)' if reserved else f'(?P<{name}>[^/?#]+)')
+        position = m.end()
+    pattern.append(_escape_literal(uri_template, position, len(uri_template)))
+    return re.compile(''.join(pattern))
+
+
+def match_uri(pattern: re.Pattern[str], uri: str) -> dict[str, str] | None:
+    """Returns the values of the template's variables if `uri` matches it."""
+    if (m := pattern.fullmatch(uri)) is None:
+        return None
+    return {name: unquote(value) for name, value in m.groupdict().items()}
+
+
+def _escape_literal(uri_template: str, start: int, end: int) -> str:
+    literal = uri_template[start:end]
+    if '{' in literal or '}' in literal:
+        raise ValueError(f"Unsupported expression in URI template '{uri_template}'")
+    return re.escape(literal)
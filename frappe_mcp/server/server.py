@@ -1,16 +1,45 @@
 from __future__ import annotations
 
-import json
-from collections import OrderedDict
+import contextvars
+import os
+import threading
+import time
+import uuid
 from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Literal
 
 from pydantic import BaseModel, ValidationError
 from werkzeug.wrappers import Request, Response
+from werkzeug.wsgi import ClosingIterator
 
 import frappe_mcp.server.handlers as handlers
 import frappe_mcp.server.prompts as prompts
+import frappe_mcp.server.resources as resources
 import frappe_mcp.server.tools as tools
-from frappe_mcp.server import types
+from frappe_mcp.server import codec, manifest, types
+from frappe_mcp.server.broker import (
+    BROADCAST,
+    CANCELLED,
+    RESOURCES_UPDATED,
+    Broker,
+    InProcessBroker,
+    get_session_channel,
+)
+from frappe_mcp.server.bulkhead import Bulkheads
+from frappe_mcp.server.cache import ReadCache, ResultCache
+from frappe_mcp.server.context import CancellationToken
+from frappe_mcp.server.encoder import get_result_encoder
+from frappe_mcp.server.errors import MCPError, RequestCancelledError
+from frappe_mcp.server.process import ProcessPool
+from frappe_mcp.server.process_local import ProcessLocal
+from frappe_mcp.server.registry import Registry
+from frappe_mcp.server.sessions import (
+    Session,
+    SessionStore,
+    is_valid_session_id,
+    new_session_id,
+)
 
 __all__ = ['MCP']
 
@@ -51,21 +80,160 @@ class MCP:
     """
 
     _name: str | None
-    _tool_registry: OrderedDict[str, tools.Tool]
-    _prompt_registry: OrderedDict[str, prompts.Prompt]
+    _tool_registry: Registry[tools.Tool]
+    _prompt_registry: Registry[prompts.Prompt]
+    _resource_registry: Registry[resources.Resource]
+    _template_registry: Registry[resources.Resource]
     _mcp_entry_fn: Callable | None
-
-    def __init__(self, name: str | None):
-        self._tool_registry = OrderedDict()
-        self._prompt_registry = OrderedDict()
+    _is_setup: bool
+    _batch_workers: int
+    _batch_pool: ProcessLocal[ThreadPoolExecutor]
+    _broker: Broker
+    _sse_heartbeat: float
+    _sse_max_duration: float
+    _sse_max_streams: int | None
+    _sse_streams: int
+    _page_size: int | None
+    _result_cache: ResultCache | None
+    _tool_timeout: float | None
+    _process_pool: ProcessPool
+    _structured_text: tools.StructuredText
+    _manifest: str | os.PathLike | None
+    _bulkheads: Bulkheads
+    _calls: dict[tuple[str | None, types.RequestId], CancellationToken]
+    _cancel_listener: ProcessLocal[None]
+    _update_listener: ProcessLocal[None]
+
+    def __init__(
+        self,
+        name: str | None,
+        *,
+        batch_workers: int = 4,
+        broker: Broker | None = None,
+        sse_heartbeat: float = 15,
+        sse_max_duration: float = 300,
+        sse_max_streams: int | None = None,
+        page_size: int | None = None,
+        result_cache: ResultCache | None = None,
+        tool_timeout: float | None = None,
+        process_workers: int | None = None,
+        structured_text: tools.StructuredText = 'json',
+        manifest: str | os.PathLike | None = None,
+        tag_concurrency: dict[str, int] | None = None,
+        queue_timeout: float | None = None,
+        max_resource_read: int | None = None,
+        resource_debounce: float = 0.5,
+        read_cache: ReadCache | None = None,
+        session_store: SessionStore | None = None,
+    ):
+        """
+        Args:
+            name: Name of the MCP server, sent to the client on initialize.
+            batch_workers: Maximum number of threads used to run the entries of
+                a JSON-RPC batch concurrently. Set to 1 to run batches
+                sequentially.
+            broker: Broker used to deliver notifications to GET SSE streams.
+                Defaults to an `InProcessBroker`, a shared broker is needed when
+                running multiple worker processes.
+            sse_heartbeat: Seconds after which an idle SSE stream is sent a
+                comment to keep the connection open.
+            sse_max_duration: Seconds after which a GET SSE stream is closed,
+                clients are expected to reconnect.
+            sse_max_streams: Maximum number of GET SSE streams open at a time
+                in this process, each open stream holds a worker thread.
+            page_size: Maximum number of tools or prompts in a page of a
+                tools/list or prompts/list result. By default all of them are
+                returned in a single page.
+            result_cache: Cache for the results of tools annotated as read
+                only or idempotent, or registered with `cache=True`. Results
+                are not cached by default.
+            tool_timeout: Seconds after which a tool call is stopped and a
+                timeout error is returned, unless the tool sets its own
+                timeout. Calls are not timed out by default.
+            process_workers: Maximum number of worker processes that tools
+                registered with `executor='process'` run in. Defaults to 2,
+                processes are started as calls to such tools need them.
+            structured_text: Text content sent along with the structured
+                content of dict results to clients on a protocol version that
+                supports structured content. 'json' sends the result's JSON,
+                'summary' a line listing its keys and 'none' no text, which
+                avoids encoding and sending the result twice. Older clients
+                always get the JSON.
+            manifest: Path of the manifest written by `frappe-mcp compile`. If
+                it is up to date, tools and prompts are registered from it
+                instead of by the function registered using `mcp.register`,
+                and their modules are imported when first called.
+            tag_concurrency: Maximum number of concurrent calls to the tools
+                with a tag, by tag. Tools are tagged using `@mcp.tool(tags=...)`.
+            queue_timeout: Seconds a call waits for a free slot when its tool,
+                or one of its tags, is at its concurrency limit. A call that
+                doesn't get a slot in time returns a retryable error with code
+                `-32003`. Calls wait until cancelled by default.
+            max_resource_read: Maximum number of bytes of a blob sent in a
+                resources/read result, larger blobs are read in parts using
+                the `offset` and `length` in the request's `_meta`. Blobs
+                are sent whole by default.
+            resource_debounce: Seconds without further changes to a resource
+                after which its subscribers are sent an update, so a bulk
+                change sends one update per subscription.
+            read_cache: Cache for the results of reading resources that have
+                a version, reused until the version changes. Results are not
+                cached by default.
+            session_store: Store of the sessions issued on initialize. If set,
+                the response to initialize has an `Mcp-Session-Id` and
+                requests with an unknown or expired session id are answered
+                with a 404. Needed for resource subscriptions. The server is
+                stateless by default.
+        """
+        self._tool_registry = Registry('tools', tools.get_tool_description)
+        self._prompt_registry = Registry('prompts', prompts.get_prompt_description)
+        self._resource_registry = Registry(
+            'resources', resources.get_resource_description
+        )
+        self._template_registry = Registry(
+            'resourceTemplates', resources.get_template_description
+        )
+        self._template_router = resources.TemplateRouter(self._template_registry)
         self._name = name
         self._mcp_entry_fn = None
+        self._is_setup = False
+        self._setup_lock = threading.Lock()
+        self._batch_workers = batch_workers
+        # Pools and listener threads don't survive a fork
+        self._batch_pool = ProcessLocal(self._create_batch_pool)
+        self._broker = broker or InProcessBroker()
+        self._sse_heartbeat = sse_heartbeat
+        self._sse_max_duration = sse_max_duration
+        self._sse_max_streams = sse_max_streams
+        self._sse_streams = 0
+        self._sse_streams_lock = threading.Lock()
+        self._page_size = page_size
+        self._result_cache = result_cache
+        self._tool_timeout = tool_timeout
+        self._process_pool = ProcessPool(process_workers)
+        self._structured_text = structured_text
+        self._manifest = manifest
+        self._bulkheads = Bulkheads(tag_concurrency, queue_timeout=queue_timeout)
+        self._max_resource_read = max_resource_read
+        self._read_cache = read_cache
+        self._session_store = session_store
+        self._calls = {}
+        self._calls_lock = threading.Lock()
+        self._cancel_listener = ProcessLocal(self._listen_for_cancelled)
+        self._subscriptions = resources.Subscriptions(
+            self._send_resource_updated,
+            debounce=resource_debounce,
+            is_active=self._is_session_active,
+        )
+        self._update_listener = ProcessLocal(self._listen_for_updates)
+        self._id = uuid.uuid4().hex
 
     def register(
         self,
         *,
         allow_guest: bool = False,
         xss_safe: bool = False,
+        reload: bool = False,
     ):
         """A decorator to mark a function as an MCP endpoint.
 
@@ -73,11 +241,18 @@ class MCP:
         configuration for handling MCP requests. The decorated function will be
         used as the entry point for all MCP requests.
 
+        The decorated function is run once per process, before the first
+        request is handled (see `mcp.setup`).
+
         Only one function can be registered as an MCP endpoint per MCP instance.
 
         Args:
             allow_guest: If True, allows unauthenticated access to the endpoint.
             xss_safe: If True, response will not be sanitized for XSS.
+            reload: If True, the decorated function is run before every
+                request and the registries are not frozen. Meant for
+                development when the function registers tools itself, modules
+                that have been imported are not imported again.
 
         Raises:
             Exception: If not used in a Frappe app, or if already registered.
@@ -106,26 +281,83 @@ class MCP:
             self._mcp_entry_fn = fn
 
             def wrapper() -> Response:
-                # Runs wrapped dummy mcp handler before handling the request.
-                # This should import all the files with the registered mcp
-                # functions.
-                fn()
+                # Runs wrapped dummy mcp handler before handling the first
+                # request. This should import all the files with the
+                # registered mcp functions.
+                self.setup(reload=reload)
 
                 request = frappe.request
                 response = Response()
 
-                return self.handle(request, response)
+                response = self.handle(request, response)
+                if response.is_streamed and request.method == 'POST':
+                    body = response.response
+                    # The body is closed even if the client leaves before
+                    # iteration starts
+                    response.response = ClosingIterator(
+                        _stream_with_frappe_db(body),
+                        getattr(body, 'close', None),
+                    )
+                return response
 
             return whitelister(wrapper)
 
         return decorator
 
+    def setup(self, *, reload: bool = False):
+        """Runs the registration phase of the current process.
+
+        Calls the function registered using `mcp.register`, which imports the
+        modules that register tools and prompts, and then freezes the tool and
+        prompt registries. This happens once, later calls return immediately.
+        If the server's manifest is up to date the tools and prompts are
+        registered from it instead, without calling the function.
+
+        The phase runs when the first request is handled. To have it done
+        before traffic arrives call this when the app is loaded, e.g. in a
+        Gunicorn `post_fork` hook, or in the master process when using
+        `preload_app` so that workers inherit the registries.
+
+        Args:
+            reload: Run the registered function again even if it already has,
+                registries are left unfrozen.
+        """
+        if self._is_setup and not reload:
+            return
+
+        with self._setup_lock:
+            if self._is_setup and not reload:
+                return
+
+            self._set_frozen(False)
+            if self._manifest is not None and not reload:
+                loaded = manifest.load_manifest(self, self._manifest)
+            else:
+                loaded = False
+            if not loaded and self._mcp_entry_fn is not None:
+                self._mcp_entry_fn()
+            self._set_frozen(not reload)
+            self._is_setup = True
+
+    def _set_frozen(self, frozen: bool):
+        self._tool_registry.frozen = frozen
+        self._prompt_registry.frozen = frozen
+        self._resource_registry.frozen = frozen
+        self._template_registry.frozen = frozen
+
     def handle(self, request: Request, response: Response) -> Response:
         """Handle an MCP request in any Werkzeug based server.
 
         This method can be used directly to integrate MCP functionality into any Werkzeug based server.
         It processes the request according to the MCP specification and returns an appropriate response.
 
+        The request body may be a single JSON-RPC message or a JSON-RPC batch
+        (an array of messages), in which case the response is an array.
+
+        GET requests open an SSE stream over which notifications sent using
+        `mcp.send_notification` are delivered. If sessions are enabled, DELETE
+        requests end the client's session.
+
         Args:
             request: The Werkzeug Request object containing the MCP request
             response: A Werkzeug Response object to be populated with the MCP response
@@ -133,17 +365,62 @@ class MCP:
         Returns:
             The populated Werkzeug Response object
         """
+        session_id = request.headers.get('Mcp-Session-Id')
+        if session_id is not None and not is_valid_session_id(session_id):
+            return handle_invalid(
+                None, response, types.INVALID_REQUEST, 'Invalid session id'
+            )
+
+        if request.method == 'DELETE':
+            return self._handle_delete(session_id, response)
+
+        if request.method == 'GET':
+            session = self._get_session(session_id)
+            if session is None and not self._has_session(session_id):
+                return handle_session_not_found(response)
+            if self._restore_subscriptions(session_id, session):
+                # e.g. the stream reconnected after the worker holding the
+                # subscriptions restarted
+                self._save_subscriptions(session_id, session)
+            return self._handle_get(request, response)
+
         if request.method != 'POST':
             response.status_code = 405
             return response
 
         try:
-            data = request.get_json(force=True)
-        except json.JSONDecodeError:
+            data = codec.loads(request.get_data())
+        except ValueError:
             return handle_invalid(None, response, types.PARSE_ERROR, 'Parse error')
 
+        is_initialize = isinstance(data, dict) and data.get('method') == 'initialize'
+        if is_initialize:
+            # A new session is issued, even if the client sent one
+            session_id = None
+
+        session = self._get_session(session_id)
+        if session is None and not self._has_session(session_id):
+            return handle_session_not_found(response)
+
+        protocol_version = request.headers.get('MCP-Protocol-Version')
+        if protocol_version is None and session is not None:
+            protocol_version = session.get('protocolVersion')
+
+        if isinstance(data, list):
+            return self._handle_batch(
+                data,
+                response,
+                session_id=session_id,
+                protocol_version=protocol_version,
+            )
+
+        if not isinstance(data, dict):
+            return handle_invalid(
+                None, response, types.INVALID_REQUEST, 'Invalid Request'
+            )
+
         if get_is_notification(data):
-            return handle_notification(data, response)
+            return self._handle_notification(data, response, session_id=session_id)
 
         if (request_id := data.get('id')) is None:
             return handle_invalid(
@@ -153,7 +430,75 @@ class MCP:
                 'Invalid Request',
             )
 
-        return self._handle_request(request_id, data, response)
+        response = self._handle_request(
+            request_id,
+            data,
+            response,
+            accepts_sse=get_accepts_sse(request),
+            session_id=session_id,
+            protocol_version=protocol_version,
+        )
+        if is_initialize and self._session_store is not None:
+            if response.status_code == 200:
+                params = data.get('params') or {}
+                response.headers['Mcp-Session-Id'] = self._create_session(params)
+        return response
+
+    def get_session(self, session_id: str) -> Session | None:
+        """Returns the session with the `Mcp-Session-Id`, with the protocol
+        version, client info and capabilities negotiated on initialize.
+
+        Returns None if sessions are not enabled, see `session_store`, or the
+        session doesn't exist or has expired.
+        """
+        if self._session_store is None:
+            return None
+        return self._session_store.get(session_id)
+
+    def send_notification(
+        self,
+        method: str,
+        params: dict[str, Any] | None = None,
+        *,
+        session_id: str | None = None,
+    ):
+        """Sends a notification to clients over their GET SSE streams.
+
+        Example:
+            >>> mcp.send_notification('notifications/tools/list_changed')
+
+        Args:
+            method: The notification method, e.g. `notifications/resources/updated`.
+            params: The notification params.
+            session_id: If set, the notification is sent only to the client
+                with this `Mcp-Session-Id`, otherwise it is sent to all clients.
+        """
+        notification = types.JSONRPCNotification(method=method, params=params)
+        channel = get_session_channel(session_id) if session_id else BROADCAST
+        self._broker.publish(
+            channel, notification.model_dump(exclude_none=True, by_alias=True)
+        )
+
+    def notify_resource_updated(self, *uris: str):
+        """Sends `notifications/resources/updated` to the clients subscribed
+        to the resources, or to a prefix of their URIs.
+
+        Updates are debounced, see `resource_debounce`. Changes are sent to
+        all worker processes through the broker, so this can be called from
+        any process, e.g. a background job or a doc event hook.
+
+        Example:
+            >>> mcp.notify_resource_updated('frappe://doc/ToDo/TD-0001')
+
+        Args:
+            uris: The URIs of the resources that changed.
+        """
+        self._subscriptions.updated(uris)
+        if not isinstance(self._broker, InProcessBroker):
+            self._broker.publish(
+                RESOURCES_UPDATED,
+                {'uris': list(uris), 'source': self._get_source()},
+            )
 
     def tool(
         self,
@@ -161,9 +506,17 @@ class MCP:
         name: str | None = None,
         description: str | None = None,
         input_schema: dict | None = None,
+        output_schema: dict | None = None,
         use_entire_docstring: bool = False,
         annotations: tools.ToolAnnotations | None = None,
-        # stream: bool = False,  # stream yes or no (SSE)
+        thread_safe: bool = True,
+        stream: bool | None = None,
+        cache: bool | float | None = None,
+        timeout: float | None = None,
+        executor: Literal['thread', 'process'] = 'thread',
+        concurrency: int | None = None,
+        tags: list[str] | None = None,
+        queue_timeout: float | None = None,
         # whitelist: list | None = None,
         # role: str | None = None,
     ):
@@ -181,10 +534,34 @@ class MCP:
                 extracted from the function's docstring.
             input_schema: The JSON schema for the tool's input. If not provided, it will be
                 inferred from the function's signature and docstring.
+            output_schema: The JSON schema of the tool's structured result. If not
+                provided, it is inferred from the function's return annotation
+                if it is a dict or a TypedDict.
             use_entire_docstring: If True, the entire docstring will be used as the tool's
                 description. Otherwise, only the first section is used (i.e. no Args).
             annotations: Additional context about the tool, such as validation information
                 or examples of how to use it.
+            thread_safe: If False, calls to this tool in a JSON-RPC batch are run
+                sequentially in the request thread instead of on the batch pool.
+            stream: If True, content produced by the tool is streamed as SSE events
+                to clients that accept `text/event-stream`. Defaults to True for
+                generator functions and functions that take a `Context`.
+            cache: If True, or a number of seconds, results of the tool are
+                cached when the server has a `result_cache`. Defaults to
+                caching tools annotated with `readOnlyHint` or `idempotentHint`.
+            timeout: Seconds after which a call to the tool is stopped and a
+                timeout error is returned. Defaults to the server's
+                `tool_timeout`.
+            executor: Set to 'process' to run calls in a worker process, for
+                CPU bound tools that would otherwise hold the GIL. The function
+                must be defined at the top level of a module and can't take a
+                `Context`.
+            concurrency: Maximum number of concurrent calls to the tool in this
+                process, further calls are queued. Unlimited by default.
+            tags: Tags of the tool, calls to it count towards the server's
+                `tag_concurrency` limit of each tag.
+            queue_timeout: Seconds a queued call waits for a free slot.
+                Defaults to the server's `queue_timeout`.
         """
 
         def decorator(fn: Callable):
@@ -194,8 +571,17 @@ class MCP:
                     name=name,
                     description=description,
                     input_schema=input_schema,
+                    output_schema=output_schema,
                     use_entire_docstring=use_entire_docstring,
                     annotations=annotations,
+                    thread_safe=thread_safe,
+                    stream=stream,
+                    cache=cache,
+                    timeout=timeout,
+                    executor=executor,
+                    concurrency=concurrency,
+                    tags=tags,
+                    queue_timeout=queue_timeout,
                 ),
             )
             self.add_tool(tool)
@@ -213,8 +599,95 @@ class MCP:
         Args:
             tool: The tool to register. It must be a dictionary with keys
                 'name', 'description', 'input_schema', and 'fn'.
+
+        Raises:
+            jsonschema.SchemaError: If the tool's input schema is invalid.
+            ValueError: If the tool is invalid, e.g. a required key is missing.
         """
+        tools.get_validator(tool)
         self._tool_registry[tool['name']] = tool
+        if tool.get('executor') == 'process':
+            self._process_pool.add_tool(tool)
+
+    def add_lazy_tool(
+        self,
+        path: str,
+        *,
+        input_schema: dict,
+        name: str | None = None,
+        description: str | None = None,
+        output_schema: dict | None = None,
+        annotations: tools.ToolAnnotations | None = None,
+        thread_safe: bool = True,
+        stream: bool | None = None,
+        cache: bool | float | None = None,
+        timeout: float | None = None,
+        executor: Literal['thread', 'process'] = 'thread',
+        concurrency: int | None = None,
+        tags: list[str] | None = None,
+        queue_timeout: float | None = None,
+    ):
+        """Registers the function at an import path as a tool without
+        importing it.
+
+        The tool is listed right away, its module is imported when the tool
+        is first called. Modules of tools a client never calls, and their
+        dependencies, are not loaded by the worker.
+
+        Example:
+            >>> mcp.add_lazy_tool(
+            ...     'app.tools.reports:monthly_report',
+            ...     description='Get the monthly sales report.',
+            ...     input_schema={
+            ...         'type': 'object',
+            ...         'properties': {'month': {'type': 'string'}},
+            ...         'required': ['month'],
+            ...     },
+            ... )
+
+        Args:
+            path: Import path of the function, 'module:function' or the dotted
+                path used in Frappe hooks.
+            input_schema: The JSON schema for the tool's input, it can't be
+                inferred without importing the function.
+            name: The name of the tool, defaults to the function's name.
+            description: A description of what the tool does.
+
+        The other arguments are those of `mcp.tool`. An error importing the
+        function is returned as the result of the call.
+
+        Raises:
+            ValueError: If the path is invalid.
+        """
+        tool = tools.get_lazy_tool(
+            path,
+            tools.ToolOptions(
+                name=name,
+                description=description,
+                input_schema=input_schema,
+                output_schema=output_schema,
+                annotations=annotations,
+                thread_safe=thread_safe,
+                stream=stream,
+                cache=cache,
+                timeout=timeout,
+                executor=executor,
+                concurrency=concurrency,
+                tags=tags,
+                queue_timeout=queue_timeout,
+            ),
+        )
+        self.add_tool(tool)
+
+    def get_tool_stats(self) -> dict[str, dict[str, dict[str, int | None]]]:
+        """Returns the concurrency limit and the number of in flight, queued
+        and rejected calls of each tool and tag called in this process.
+
+        Example:
+            >>> mcp.get_tool_stats()
+            {'tools': {'search': {'limit': 2, 'in_flight': 2, 'queued': 5, 'rejected': 1}}, 'tags': {}}
+        """
+        return self._bulkheads.get_stats()
 
     def prompt(
         self,
@@ -261,22 +734,131 @@ class MCP:
         Args:
             prompt: A Prompt TypedDict with keys 'name', 'description',
                 'arguments', and 'fn'.
+
+        Raises:
+            ValueError: If the prompt is invalid.
         """
         self._prompt_registry[prompt['name']] = prompt
 
+    def resource(
+        self,
+        uri_template: str,
+        *,
+        name: str | None = None,
+        title: str | None = None,
+        description: str | None = None,
+        mime_type: str | None = None,
+        annotations: dict[str, Any] | None = None,
+        size: int | None = None,
+        version: Callable | None = None,
+    ):
+        """A decorator that registers a function that reads a resource.
+
+        If the URI has variables, e.g. `{name}`, the resource is listed as a
+        template and the function is called with the values of the variables
+        in the URI that is read. Use `{+name}` for values that contain '/'.
+
+        Example:
+            >>> @mcp.resource('frappe://report/{name}', mime_type='text/csv')
+            ... def get_report(name: str):
+            ...     return File(get_report_path(name))
+
+        The function can return a string, sent as text, bytes, a binary file
+        object or a `File`, sent as a blob, or `TextResourceContents` and
+        `BlobResourceContents`. Other values are sent as JSON. Files are read
+        through a memory map.
+
+        Args:
+            uri_template: The URI of the resource, or a URI template.
+            name: The resource name. Defaults to the function's __name__.
+            title: A human readable title of the resource.
+            description: A description of the resource. Defaults to the
+                docstring.
+            mime_type: The mime type of the contents. Guessed for blobs if
+                omitted.
+            annotations: Annotations of the resource, e.g. its `audience`.
+            size: The size of the resource in bytes, if known.
+            version: Returns the current version of the resource, e.g. its
+                modified time, called with the same arguments as the
+                function. Reads of a resource with a version can be answered
+                as not modified, and cached in the `read_cache`.
+        """
+
+        def decorator(fn: Callable):
+            resource = resources.get_resource(
+                fn,
+                uri_template,
+                resources.ResourceOptions(
+                    name=name,
+                    title=title,
+                    description=description,
+                    mime_type=mime_type,
+                    annotations=annotations,
+                    size=size,
+                    version=version,
+                ),
+            )
+            self.add_resource(resource)
+            return fn
+
+        return decorator
+
+    def add_resource(self, resource: resources.Resource):
+        """Registers a resource with the MCP instance, as a resource template
+        if its URI has variables.
+
+        Raises:
+            ValueError: If the resource is invalid.
+        """
+        if resources.is_template(resource):
+            self._template_registry[resource['uri_template']] = resource
+        else:
+            self._resource_registry[resource['uri_template']] = resource
+
     def _handle_request(
         self,
         request_id: types.RequestId,
         data: dict,
         response: Response,
+        *,
+        accepts_sse: bool = False,
+        session_id: str | None = None,
+        protocol_version: str | None = None,
     ) -> Response:
+        message = self._get_response_message(
+            request_id,
+            data,
+            accepts_sse=accepts_sse,
+            session_id=session_id,
+            protocol_version=protocol_version,
+        )
+        if isinstance(message, tools.ToolStream):
+            return handle_tool_stream(
+                request_id, message, response, notify=self._get_notify(session_id)
+            )
+
+        set_response_data(response, get_response_data(message))
+        response.mimetype = 'application/json'
+        response.status_code = 200
+        if isinstance(message, types.JSONRPCErrorResponse):
+            response.status_code = 400
+        return response
+
+    def _get_response_message(
+        self,
+        request_id: types.RequestId,
+        data: dict,
+        *,
+        accepts_sse: bool = False,
+        session_id: str | None = None,
+        protocol_version: str | None = None,
+    ) -> codec.RawJSON | types.JSONRPCErrorResponse | tools.ToolStream:
         # Request
         try:
             rpc_request = types.JSONRPCRequest.model_validate(data)
         except ValidationError as e:
-            return handle_invalid(
+            return get_error_response(
                 request_id,
-                response,
                 types.INVALID_PARAMS,
                 f'Invalid params: {e}',
             )
@@ -289,7 +871,14 @@ class MCP:
         try:
             match method:
                 case 'initialize':
-                    result = handlers.handle_initialize(params, self._name or 'frappe-mcp')
+                    result = handlers.handle_initialize(
+                        params,
+                        self._name or 'frappe-mcp',
+                        resources=bool(
+                            self._resource_registry or self._template_registry
+                        ),
+                        subscribe=self._session_store is not None,
+                    )
                 case 'ping':
                     result = handlers.handle_ping(params)
                 case 'completion/complete':
@@ -299,44 +888,537 @@ class MCP:
                 case 'prompts/get':
                     result = prompts.handle_get_prompt(params, self._prompt_registry)
                 case 'prompts/list':
-                    result = prompts.handle_list_prompts(params, self._prompt_registry)
+                    result = prompts.handle_list_prompts(
+                        params,
+                        self._prompt_registry,
+                        page_size=self._page_size,
+                    )
                 case 'resources/list':
-                    result = handlers.handle_list_resources(params)
+                    result = resources.handle_list_resources(
+                        params,
+                        self._resource_registry,
+                        page_size=self._page_size,
+                    )
                 case 'resources/templates/list':
-                    result = handlers.handle_list_resource_templates(params)
+                    result = resources.handle_list_resource_templates(
+                        params,
+                        self._template_registry,
+                        page_size=self._page_size,
+                    )
                 case 'resources/read':
-                    result = handlers.handle_read_resource(params)
+                    result = resources.handle_read_resource(
+                        params,
+                        self._resource_registry,
+                        self._template_router,
+                        max_read_size=self._max_resource_read,
+                        read_cache=self._read_cache,
+                    )
                 case 'resources/subscribe':
-                    result = handlers.handle_subscribe(params)
+                    # Without a session store any id would be accepted
+                    session = self._get_session(session_id)
+                    self._restore_subscriptions(session_id, session)
+                    result = resources.handle_subscribe(
+                        params,
+                        self._subscriptions,
+                        self._resource_registry,
+                        self._template_router,
+                        session_id=session_id if session is not None else None,
+                    )
+                    self._save_subscriptions(session_id, session)
+                    self._start_update_listener()
                 case 'resources/unsubscribe':
-                    result = handlers.handle_unsubscribe(params)
+                    session = self._get_session(session_id)
+                    self._restore_subscriptions(session_id, session)
+                    result = resources.handle_unsubscribe(
+                        params,
+                        self._subscriptions,
+                        session_id=session_id if session is not None else None,
+                    )
+                    self._save_subscriptions(session_id, session)
                 case 'tools/call':
-                    result = tools.handle_call_tool(params, self._tool_registry)
+                    result = self._call_tool(
+                        request_id,
+                        params,
+                        accepts_sse=accepts_sse,
+                        session_id=session_id,
+                        protocol_version=protocol_version,
+                    )
                 case 'tools/list':
-                    result = tools.handle_list_tools(params, self._tool_registry)
+                    result = tools.handle_list_tools(
+                        params,
+                        self._tool_registry,
+                        page_size=self._page_size,
+                    )
                 case _:
-                    return handle_invalid(
+                    return get_error_response(
                         request_id,
-                        response,
                         types.METHOD_NOT_FOUND,
                         'Method not found',
                     )
+        except MCPError as e:
+            return get_error_response(request_id, e.code, e.message, e.data)
         except ValueError as e:
-            return handle_invalid(request_id, response, types.INVALID_PARAMS, str(e))
+            return get_error_response(request_id, types.INVALID_PARAMS, str(e))
         except NotImplementedError:
-            return handle_invalid(request_id, response, types.METHOD_NOT_FOUND, 'Method not implemented')
+            return get_error_response(
+                request_id, types.METHOD_NOT_FOUND, 'Method not implemented'
+            )
         except Exception as e:
-            return handle_invalid(request_id, response, types.INTERNAL_ERROR, f'Internal error: {e}')
+            return get_error_response(
+                request_id, types.INTERNAL_ERROR, f'Internal error: {e}'
+            )
+
+        if isinstance(result, tools.ToolStream):
+            return result
 
         result = {} if result is None else result
-        success_response = types.JSONRPCSuccessResponse(id=request_id, result=result)
-        response.data = get_response_data(success_response)
+        return get_success_response(request_id, result)
+
+    def _call_tool(
+        self,
+        request_id: types.RequestId,
+        params: dict,
+        *,
+        accepts_sse: bool,
+        session_id: str | None,
+        protocol_version: str | None = None,
+    ):
+        """Calls a tool, the call can be cancelled while it is in flight."""
+        structured_text = 'json'
+        if (
+            protocol_version is not None
+            and protocol_version >= handlers.STRUCTURED_CONTENT_VERSION
+        ):
+            structured_text = self._structured_text
+
+        key = (session_id, request_id)
+        token = CancellationToken()
+        self._start_cancel_listener()
+        with self._calls_lock:
+            self._calls[key] = token
+
+        def untrack():
+            with self._calls_lock:
+                if self._calls.get(key) is token:
+                    del self._calls[key]
+
+        try:
+            result = tools.handle_call_tool(
+                params,
+                self._tool_registry,
+                stream=accepts_sse,
+                result_cache=self._result_cache,
+                timeout=self._tool_timeout,
+                token=token,
+                notify=self._get_notify(session_id),
+                process_pool=self._process_pool,
+                structured_text=structured_text,
+                bulkheads=self._bulkheads,
+                session_id=session_id,
+            )
+        except BaseException:
+            untrack()
+            raise
+
+        if isinstance(result, tools.ToolStream):
+            # Can be cancelled until the stream is closed
+            result.call_on_close(untrack)
+        else:
+            untrack()
+        return result
+
+    def _get_notify(self, session_id: str | None):
+        """Returns a function that sends notifications to the session's GET
+        stream, progress can't be delivered without a session."""
+        if session_id is None:
+            return None
+
+        def notify(notification: types.JSONRPCNotification):
+            self._broker.publish(
+                get_session_channel(session_id),
+                notification.model_dump(exclude_none=True, by_alias=True),
+            )
+
+        return notify
+
+    def _handle_notification(
+        self,
+        data: dict,
+        response: Response,
+        *,
+        session_id: str | None = None,
+    ) -> Response:
+        def cancel(params: types.CancelledNotificationParams):
+            self._cancel_call(session_id, params.requestId, params.reason)
+
+        return handle_notification(data, response, cancel=cancel)
+
+    def _cancel_call(
+        self,
+        session_id: str | None,
+        request_id: types.RequestId,
+        reason: str | None,
+        *,
+        publish: bool = True,
+    ):
+        with self._calls_lock:
+            token = self._calls.get((session_id, request_id))
+
+        if token is not None:
+            token.cancel(RequestCancelledError(reason or 'Request cancelled'))
+        elif publish:
+            # The call may be running in another worker process
+            self._broker.publish(
+                CANCELLED,
+                {'sessionId': session_id, 'requestId': request_id, 'reason': reason},
+            )
+
+    def _start_cancel_listener(self):
+        """Starts a thread that cancels calls cancelled in other processes.
+
+        Runs once per process, workers forked from a preloaded master start
+        their own.
+        """
+        self._cancel_listener.get()
+
+    def _listen_for_cancelled(self):
+        subscription = self._broker.subscribe([CANCELLED])
+
+        def listen():
+            while True:
+                message = subscription.get(timeout=60)
+                if message is None:
+                    continue
+                self._cancel_call(
+                    message.get('sessionId'),
+                    message.get('requestId'),
+                    message.get('reason'),
+                    publish=False,
+                )
+
+        threading.Thread(target=listen, name='frappe-mcp-cancel', daemon=True).start()
+
+    def _create_session(self, params: dict) -> str:
+        session_id = new_session_id()
+        session = Session(
+            protocolVersion=handlers.get_protocol_version(params),
+            clientInfo=params.get('clientInfo'),
+            capabilities=params.get('capabilities'),
+            created=time.time(),
+        )
+        self._session_store.set(session_id, session)  # type: ignore[union-attr]
+        return session_id
+
+    def _get_session(self, session_id: str | None) -> Session | None:
+        if session_id is None or self._session_store is None:
+            return None
+        return self._session_store.get(session_id)
+
+    def _has_session(self, session_id: str | None) -> bool:
+        """False if sessions are enabled and `session_id` is unknown or expired.
+        Requests without a session id are allowed."""
+        if session_id is None or self._session_store is None:
+            return True
+        return self._session_store.get(session_id) is not None
+
+    def _is_session_active(self, session_id: str) -> bool:
+        """False once the session has expired or was evicted from the store,
+        or its subscriptions were restored by another process."""
+        if self._session_store is None:
+            return False
+        if (session := self._session_store.peek(session_id)) is None:
+            return False
+        return session.get('subscriber', self._get_source()) == self._get_source()
+
+    def _restore_subscriptions(
+        self, session_id: str | None, session: Session | None
+    ) -> bool:
+        """Subscribes this process to the URIs stored with the session, unless
+        it holds them already. Returns True if any were restored.
+
+        Subscriptions are held in the memory of a single process, the one
+        that sends their updates. They are stored with the session so another
+        worker can take them over, e.g. after the one holding them restarted.
+        A process that loses them drops them when it next checks the session.
+        """
+        if session_id is None or session is None:
+            return False
+
+        uris = session.get('subscriptions')
+        if not uris or (
+            session.get('subscriber') == self._get_source()
+            and self._subscriptions.get_uris(session_id)
+        ):
+            return False
+
+        for uri in uris:
+            self._subscriptions.subscribe(session_id, uri)
+        self._start_update_listener()
+        return True
+
+    def _save_subscriptions(self, session_id: str | None, session: Session | None):
+        """Stores the URIs the session is subscribed to with it, and this
+        process as the one that sends their updates."""
+        if session_id is None or session is None or self._session_store is None:
+            return
+        session['subscriptions'] = sorted(self._subscriptions.get_uris(session_id))
+        session['subscriber'] = self._get_source()
+        self._session_store.set(session_id, session)
+
+    def _handle_delete(self, session_id: str | None, response: Response) -> Response:
+        """Ends the session, the client sends a DELETE when it is done."""
+        if self._session_store is None or session_id is None:
+            response.status_code = 405
+            return response
+        if self._session_store.get(session_id) is None:
+            return handle_session_not_found(response)
+
+        self._session_store.delete(session_id)
+        self._subscriptions.remove_session(session_id)
+        response.status_code = 204
+        return response
+
+    def _send_resource_updated(self, session_id: str, uri: str):
+        self.send_notification(
+            'notifications/resources/updated',
+            {'uri': uri},
+            session_id=session_id,
+        )
+
+    def _get_source(self) -> str:
+        # Identifies the process that published a change, forked workers
+        # share the instance's id.
+        return f'{self._id}:{os.getpid()}'
+
+    def _start_update_listener(self):
+        """Starts a thread that records resources changed in other processes.
+
+        Runs once per process, when a client first subscribes to a resource in
+        it. An `InProcessBroker` doesn't reach other processes, changes are
+        only recorded where they are made.
+        """
+        if not isinstance(self._broker, InProcessBroker):
+            self._update_listener.get()
+
+    def _listen_for_updates(self):
+        subscription = self._broker.subscribe([RESOURCES_UPDATED])
+
+        def listen():
+            while True:
+                message = subscription.get(timeout=60)
+                if message is None or message.get('source') == self._get_source():
+                    continue
+                self._subscriptions.updated(message.get('uris') or [])
+
+        threading.Thread(target=listen, name='frappe-mcp-updates', daemon=True).start()
+
+    def _handle_get(self, request: Request, response: Response) -> Response:
+        if not get_accepts_sse(request):
+            response.status_code = 406  # Not Acceptable
+            return response
+
+        with self._sse_streams_lock:
+            if (
+                self._sse_max_streams is not None
+                and self._sse_streams >= self._sse_max_streams
+            ):
+                response.status_code = 503
+                response.headers['Retry-After'] = str(int(self._sse_heartbeat))
+                return response
+            self._sse_streams += 1
+
+        channels = [BROADCAST]
+        if session_id := request.headers.get('Mcp-Session-Id'):
+            channels.append(get_session_channel(session_id))
+
+        try:
+            subscription = self._broker.subscribe(channels)
+        except Exception:
+            self._close_sse_stream()
+            raise
+
+        def generate():
+            deadline = time.monotonic() + self._sse_max_duration
+
+            # Flushes the headers through proxies before the first message
+            yield b': stream opened\n\n'
+            while (remaining := deadline - time.monotonic()) > 0:
+                # Blocks until a message arrives, idle streams wake up only to
+                # send the heartbeat.
+                message = subscription.get(min(self._sse_heartbeat, remaining))
+                if message is None:
+                    yield b': ping\n\n'
+                else:
+                    yield get_sse_event(codec.dumps(message))
+
+        # Callbacks are run when the server closes the response, even if the
+        # client went away before the body was iterated.
+        response.response = ClosingIterator(
+            generate(),
+            [subscription.close, self._close_sse_stream],
+        )
+        response.mimetype = 'text/event-stream'
+        response.status_code = 200
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    def _close_sse_stream(self):
+        with self._sse_streams_lock:
+            self._sse_streams -= 1
+
+    def _handle_batch(
+        self,
+        batch: list,
+        response: Response,
+        *,
+        session_id: str | None = None,
+        protocol_version: str | None = None,
+    ) -> Response:
+        if not batch:
+            return handle_invalid(
+                None, response, types.INVALID_REQUEST, 'Invalid Request'
+            )
+
+        messages = self._run_batch(batch, session_id, protocol_version)
+        messages = [m for m in messages if m is not None]
+        if not messages:
+            # Batch of only notifications
+            response.status_code = 202  # Accepted
+            return response
+
+        chunks = [b'[']
+        for i, message in enumerate(messages):
+            if i:
+                chunks.append(b',')
+            chunks.extend(get_response_data(message).chunks)
+        chunks.append(b']')
+
+        set_response_data(response, codec.RawJSON(*chunks))
         response.mimetype = 'application/json'
         response.status_code = 200
         return response
 
+    def _run_batch(
+        self,
+        batch: list,
+        session_id: str | None = None,
+        protocol_version: str | None = None,
+    ) -> list[codec.RawJSON | types.JSONRPCErrorResponse | None]:
+        """Runs the entries of a batch, returns their response messages in order.
+
+        Entries are independent of each other so they are run concurrently on
+        the batch pool. Calls to tools marked as not thread safe, and all
+        entries when the pool has a single worker, are run sequentially in the
+        calling thread.
+
+        In a Frappe request each pool task opens its own connection to the
+        site, the request's database connection can't be used by several
+        threads at once.
+        """
+        messages: list = [None] * len(batch)
+        futures: dict[int, Future] = {}
+
+        pool = self._get_batch_pool() if len(batch) > 1 else None
+        site = _get_frappe_site() if pool is not None else None
+        for i, entry in enumerate(batch):
+            if pool is None or not self._is_thread_safe(entry):
+                continue
+
+            args = (entry, session_id, protocol_version)
+            if site is not None:
+                # Run in an empty context so that frappe.local of the request
+                # isn't shared with the task.
+                futures[i] = pool.submit(
+                    contextvars.Context().run,
+                    _run_with_site_connection,
+                    site,
+                    self._get_batch_entry_message,
+                    *args,
+                )
+                continue
+
+            # Copy per task so that context locals are visible in the pool
+            # thread.
+            ctx = contextvars.copy_context()
+            futures[i] = pool.submit(ctx.run, self._get_batch_entry_message, *args)
+
+        for i, entry in enumerate(batch):
+            if i not in futures:
+                messages[i] = self._get_batch_entry_message(
+                    entry, session_id, protocol_version
+                )
+
+        for i, future in futures.items():
+            messages[i] = future.result()
+
+        return messages
+
+    def _get_batch_entry_message(
+        self,
+        entry: Any,
+        session_id: str | None = None,
+        protocol_version: str | None = None,
+    ) -> codec.RawJSON | types.JSONRPCErrorResponse | None:
+        if not isinstance(entry, dict):
+            return get_error_response(None, types.INVALID_REQUEST, 'Invalid Request')
+
+        if get_is_notification(entry):
+            self._handle_notification(entry, Response(), session_id=session_id)
+            return None
+
+        if (request_id := entry.get('id')) is None:
+            return get_error_response(None, types.INVALID_REQUEST, 'Invalid Request')
+
+        if entry.get('method') == 'initialize':
+            # Not allowed by the spec, the Mcp-Session-Id it issues is sent in
+            # the response headers that the entries of a batch share.
+            return get_error_response(
+                request_id,
+                types.INVALID_REQUEST,
+                'initialize must not be part of a batch',
+            )
 
-def handle_notification(data: dict, response: Response) -> Response:
+        message = self._get_response_message(
+            request_id,
+            entry,
+            session_id=session_id,
+            protocol_version=protocol_version,
+        )
+        assert not isinstance(message, tools.ToolStream)
+        return message
+
+    def _is_thread_safe(self, entry: Any) -> bool:
+        if not isinstance(entry, dict) or entry.get('method') != 'tools/call':
+            return True
+
+        params = entry.get('params')
+        if not isinstance(params, dict):
+            return True
+
+        name = params.get('name')
+        tool = self._tool_registry.get(name) if isinstance(name, str) else None
+        return tool is None or tool.get('thread_safe', True)
+
+    def _get_batch_pool(self) -> ThreadPoolExecutor | None:
+        if self._batch_workers <= 1:
+            return None
+
+        return self._batch_pool.get()
+
+    def _create_batch_pool(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=self._batch_workers,
+            thread_name_prefix='frappe-mcp-batch',
+        )
+
+
+def handle_notification(
+    data: dict,
+    response: Response,
+    *,
+    cancel: Callable[[types.CancelledNotificationParams], None] | None = None,
+) -> Response:
     # Notification
     try:
         rpc_notification = types.JSONRPCNotification.model_validate(data)
@@ -348,7 +1430,11 @@ def handle_notification(data: dict, response: Response) -> Response:
         params = rpc_notification.params or {}
         match method:
             case 'notifications/cancelled':
-                handlers.handle_cancelled(params)
+                if cancel is not None:
+                    try:
+                        cancel(types.CancelledNotificationParams.model_validate(params))
+                    except ValidationError:
+                        pass
             case 'notifications/progress':
                 handlers.handle_progress(params)
             case 'notifications/initialized':
@@ -360,24 +1446,240 @@ def handle_notification(data: dict, response: Response) -> Response:
     return response
 
 
+def handle_tool_stream(
+    request_id: types.RequestId,
+    stream: tools.ToolStream,
+    response: Response,
+    *,
+    notify: Callable[[types.JSONRPCNotification], None] | None = None,
+) -> Response:
+    """Writes the result of a tool call as an SSE stream.
+
+    The result is sent as a single JSON-RPC response event. Each content block
+    is written on its own `data:` line as soon as the tool produces it, so
+    the client starts receiving the response before the tool is done, and the
+    server does not hold the whole result in memory.
+
+    An `MCPError` raised before any content was written, e.g. on a timeout, is
+    sent as a JSON-RPC error response event as for calls that aren't
+    streamed. After that the result has been started, the error is then
+    written as a last text content block with `isError` set.
+
+    Progress notifications are written as events of their own before the
+    response event. Once the response event has been started, i.e. the tool
+    has sent content, they are sent with `notify` instead, to the session's
+    GET stream. Without a session they are dropped.
+    """
+
+    def generate():
+        # `data:` lines of an event are joined by newlines, which is valid
+        # whitespace in JSON, so the result can be split across lines.
+        start = (
+            b'event: message\ndata: {"jsonrpc":"2.0","id":'
+            + codec.dumps(request_id)
+            + b',"result":{"content":['
+        )
+
+        separator = None
+        try:
+            for content in stream:
+                if isinstance(content, types.JSONRPCNotification):
+                    if separator is None:
+                        yield get_sse_event(bytes(codec.encode(content)))
+                    elif notify is not None:
+                        # Events can't be written inside the response event
+                        notify(content)
+                    continue
+
+                if separator is None:
+                    yield start
+                    separator = b'\ndata: '
+                yield separator + bytes(codec.encode(content))
+                separator = b',\ndata: '
+        except MCPError as e:
+            if separator is None:
+                error = get_error_response(request_id, e.code, e.message, e.data)
+                yield get_sse_event(bytes(codec.encode(error)))
+                return
+
+            stream.is_error = True
+            content = types.TextContent(
+                text=f"Error calling tool '{stream.tool['name']}': {e}"
+            )
+            yield separator + bytes(codec.encode(content))
+
+        if separator is None:
+            yield start
+
+        end = b'\ndata: ]'
+        if stream.structured_content is not None:
+            structured = get_result_encoder().dumps(stream.structured_content)
+            end += b',"structuredContent":' + structured
+        is_error = b'true' if stream.is_error else b'false'
+        yield end + b',"isError":' + is_error + b'}}\n\n'
+
+    response.response = ClosingIterator(generate(), stream.close)
+    response.mimetype = 'text/event-stream'
+    response.status_code = 200
+    response.headers['Cache-Control'] = 'no-cache'
+    # Prevents proxies such as nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def get_sse_event(data: bytes) -> bytes:
+    return b'event: message\ndata: ' + data + b'\n\n'
+
+
+def handle_session_not_found(response: Response) -> Response:
+    """The session has expired or was deleted, the client is expected to
+    initialize a new one."""
+    handle_invalid(None, response, types.INVALID_REQUEST, 'Session not found')
+    response.status_code = 404
+    return response
+
+
 def handle_invalid(
     request_id: types.RequestId,
     response: Response,
     code: int,
     message: str,
 ) -> Response:
-    error_response = types.JSONRPCErrorResponse(
-        id=request_id if request_id is not None else None,
-        error=types.Error(code=code, message=message),
-    )
-    response.data = get_response_data(error_response)
+    error_response = get_error_response(request_id, code, message)
+    set_response_data(response, get_response_data(error_response))
     response.mimetype = 'application/json'
     response.status_code = 400
     return response
 
 
-def get_response_data(model: BaseModel):
-    return model.model_dump_json(exclude_none=True, by_alias=True)
+def get_error_response(
+    request_id: types.RequestId,
+    code: int,
+    message: str,
+    data: Any = None,
+) -> types.JSONRPCErrorResponse:
+    return types.JSONRPCErrorResponse(
+        id=request_id if request_id is not None else None,
+        error=types.Error(code=code, message=message, data=data),
+    )
+
+
+def get_success_response(request_id: types.RequestId, result: Any) -> codec.RawJSON:
+    """Returns the encoded JSON-RPC success response for `result`.
+
+    Results are encoded once and the envelope is written around them, they are
+    not validated or copied into a `JSONRPCSuccessResponse`. Handlers can
+    return pydantic models, `codec.RawJSON` or JSON serializable values.
+    """
+    return codec.RawJSON(
+        b'{"jsonrpc":"2.0","id":',
+        codec.dumps(request_id),
+        b',"result":',
+        *codec.encode(result).chunks,
+        b'}',
+    )
+
+
+def get_response_data(message: BaseModel | codec.RawJSON) -> codec.RawJSON:
+    if isinstance(message, types.JSONRPCErrorResponse) and message.id is None:
+        # id is required in error responses, it is null when the id of the
+        # request could not be determined (e.g. on a parse error).
+        return codec.RawJSON(
+            b'{"jsonrpc":"2.0","id":null,"error":',
+            *codec.encode(message.error).chunks,
+            b'}',
+        )
+    return codec.encode(message)
+
+
+def set_response_data(response: Response, data: codec.RawJSON):
+    if len(data.chunks) == 1 and isinstance(data.chunks[0], bytes):
+        response.data = data.chunks[0]
+        return
+
+    # Written chunk by chunk instead of being joined into a single buffer,
+    # blobs are encoded as they are written and closed with the response.
+    if any(isinstance(c, codec.Base64) for c in data.chunks):
+        response.response = data
+    else:
+        response.response = data.chunks
+    response.content_length = len(data)
+
+
+def get_accepts_sse(request: Request) -> bool:
+    # Checked explicitly because `*/*` would match any mimetype.
+    return any(
+        value == 'text/event-stream' and quality > 0
+        for value, quality in request.accept_mimetypes
+    )
+
+
+def _stream_with_frappe_db(body):
+    """Commits writes made while a streamed response body is being generated.
+
+    Frappe commits and closes the database connection before the response
+    body is iterated, queries made by the tool during iteration reconnect and
+    so have to be committed here.
+    """
+    import frappe
+
+    try:
+        yield from body
+    except BaseException:
+        if frappe.db:
+            frappe.db.rollback()
+        raise
+    else:
+        if frappe.db:
+            frappe.db.commit()
+    finally:
+        if frappe.db:
+            frappe.db.close()
+
+
+def _get_frappe_site() -> tuple[str, str, str | None] | None:
+    """Returns the site, sites path and user of the current Frappe request, or
+    None if not running in one."""
+    try:
+        import frappe
+    except ImportError:
+        return None
+
+    if not (site := getattr(frappe.local, 'site', None)):
+        return None
+
+    session = getattr(frappe.local, 'session', None)
+    sites_path = getattr(frappe.local, 'sites_path', '.')
+    return site, sites_path, getattr(session, 'user', None)
+
+
+def _run_with_site_connection(site: tuple[str, str, str | None], fn, *args):
+    """Runs `fn` with a connection of its own to the site.
+
+    Writes are committed unless `fn` raises or returns an error response, the
+    connection is closed once done.
+    """
+    import frappe
+
+    name, sites_path, user = site
+    frappe.init(site=name, sites_path=sites_path)
+    try:
+        frappe.connect()
+        if user:
+            frappe.set_user(user)
+
+        result = fn(*args)
+        if isinstance(result, types.JSONRPCErrorResponse):
+            frappe.db.rollback()
+        else:
+            frappe.db.commit()
+        return result
+    except BaseException:
+        if frappe.db:
+            frappe.db.rollback()
+        raise
+    finally:
+        frappe.destroy()
 
 
 def get_is_notification(data: dict) -> bool:
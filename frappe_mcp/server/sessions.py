@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, TypedDict
+
+from frappe_mcp.server.sqlite import SQLiteConnections
+
+__all__ = [
+    'MemorySessionStore',
+    'RedisSessionStore',
+    'SQLiteSessionStore',
+    'Session',
+    'SessionStore',
+    'is_valid_session_id',
+    'new_session_id',
+]
+
+
+class Session(TypedDict, total=False):
+    # Negotiated on initialize
+    protocolVersion: str
+    clientInfo: dict[str, Any] | None
+    capabilities: dict[str, Any] | None
+    created: float
+    # URIs of the session's resource subscriptions, and the process that
+    # sends their updates
+    subscriptions: list[str]
+    subscriber: str
+
+
+def new_session_id() -> str:
+    """Returns a new, unguessable session id of visible ASCII characters."""
+    return secrets.token_urlsafe(24)
+
+
+_SESSION_ID = re.compile(r'[\x21-\x7e]{1,256}')
+
+
+def is_valid_session_id(session_id: str) -> bool:
+    """Whether an `Mcp-Session-Id` sent by a client is of visible ASCII
+    characters, as required by the spec."""
+    return _SESSION_ID.fullmatch(session_id) is not None
+
+
+class SessionStore:
+    """Stores the sessions created on initialize, by their `Mcp-Session-Id`.
+
+    Sessions are evicted once they haven't been used for `ttl` seconds, every
+    `get` extends a session's lifetime.
+
+    `MemorySessionStore` only keeps sessions in the current process. When
+    running multiple workers a shared store such as `RedisSessionStore` is
+    needed, since a client's requests can reach any of them. A store for
+    another backend implements `get`, `set` and `delete`.
+    """
+
+    def get(self, session_id: str) -> Session | None:
+        """Returns the session, or None if it doesn't exist or has expired."""
+        raise NotImplementedError
+
+    def peek(self, session_id: str) -> Session | None:
+        """Returns the session like `get`, without extending its lifetime.
+
+        Used to check the sessions with resource subscriptions before they
+        are sent updates. Override this if `get` extends the lifetime.
+        """
+        return self.get(session_id)
+
+    def set(self, session_id: str, session: Session):
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """Keeps sessions in the current process.
+
+    The least recently used sessions are evicted once more than
+    `max_sessions` are stored.
+    """
+
+    def __init__(self, *, ttl: float = 3600, max_sessions: int = 10_000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, tuple[float, Session]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Session | None:
+        with self._lock:
+            item = self._sessions.get(session_id)
+            if item is None:
+                return None
+
+            expires, session = item
+            now = time.monotonic()
+            if expires <= now:
+                del self._sessions[session_id]
+                return None
+
+            self._sessions[session_id] = (now + self.ttl, session)
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def peek(self, session_id: str) -> Session | None:
+        with self._lock:
+            item = self._sessions.get(session_id)
+            if item is None or item[0] <= time.monotonic():
+                return None
+            return item[1]
+
+    def set(self, session_id: str, session: Session):
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic() + self.ttl, session)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Keeps sessions in an SQLite database shared by processes on a machine.
+
+    Lets workers on one machine share sessions without running Redis.
+    Expired sessions are deleted when a session is created.
+    """
+
+    def __init__(self, path: str | os.PathLike, *, ttl: float = 3600):
+        self.path = os.fspath(path)
+        self.ttl = ttl
+        self._connections = SQLiteConnections(self.path)
+        self._connections.get().execute(
+            'create table if not exists sessions '
+            '(id text primary key, data text not null, expires real not null)'
+        )
+
+    def get(self, session_id: str) -> Session | None:
+        now = time.time()
+        with self._connections.get() as connection:
+            row = connection.execute(
+                'select data, expires from sessions where id = ? and expires > ?',
+                (session_id, now),
+            ).fetchone()
+            if row is None:
+                return None
+
+            # Extended once half of the ttl has passed, not on every request
+            if row[1] - now < self.ttl / 2:
+                connection.execute(
+                    'update sessions set expires = ? where id = ?',
+                    (now + self.ttl, session_id),
+                )
+        return json.loads(row[0])
+
+    def peek(self, session_id: str) -> Session | None:
+        with self._connections.get() as connection:
+            row = connection.execute(
+                'select data from sessions where id = ? and expires > ?',
+                (session_id, time.time()),
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set(self, session_id: str, session: Session):
+        now = time.time()
+        with self._connections.get() as connection:
+            connection.execute(
+                'insert or replace into sessions (id, data, expires) values (?, ?, ?)',
+                (session_id, json.dumps(session), now + self.ttl),
+            )
+            connection.execute('delete from sessions where expires <= ?', (now,))
+
+    def delete(self, session_id: str):
+        with self._connections.get() as connection:
+            connection.execute('delete from sessions where id = ?', (session_id,))
+
+
+class RedisSessionStore(SessionStore):
+    """Keeps sessions in Redis, expired by Redis after `ttl` seconds.
+
+    Args:
+        client: A `redis.Redis` client. Frappe's `frappe.cache` is one, so
+            sessions can be kept in the site's Redis.
+        prefix: Prefix added to keys.
+    """
+
+    def __init__(
+        self, client: Any, *, ttl: float = 3600, prefix: str = 'frappe_mcp:session:'
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, session_id: str) -> Session | None:
+        key = self.prefix + session_id
+        value = self.client.get(key)
+        if value is None:
+            return None
+        self.client.pexpire(key, max(int(self.ttl * 1000), 1))
+        return json.loads(value)
+
+    def peek(self, session_id: str) -> Session | None:
+        value = self.client.get(self.prefix + session_id)
+        return None if value is None else json.loads(value)
+
+    def set(self, session_id: str, session: Session):
+        self.client.set(
+            self.prefix + session_id,
+            json.dumps(session),
+            px=max(int(self.ttl * 1000), 1),
+        )
+
+    def delete(self, session_id: str):
+        self.client.delete(self.prefix + session_id)
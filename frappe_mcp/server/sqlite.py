@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+
+__all__ = ['SQLiteConnections']
+
+
+class SQLiteConnections:
+    """Connections to the SQLite database at `path`, one per thread as
+    connections can't be shared between threads.
+
+    The database is opened in WAL mode so that processes on the machine can
+    read it while another one writes.
+    """
+
+    def __init__(self, path: str | os.PathLike, *, timeout: float = 5):
+        self.path = os.fspath(path)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute('pragma journal_mode=wal')
+            self._local.connection = connection
+        return connection
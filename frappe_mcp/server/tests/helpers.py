@@ -0,0 +1,77 @@
+"""Requests sent to an `MCP` instance in tests, as a client would."""
+
+from __future__ import annotations
+
+import io
+import json
+from typing import Any
+
+from werkzeug.wrappers import Request, Response
+
+SSE_ACCEPT = 'application/json, text/event-stream'
+
+
+def post(
+    mcp,
+    data: Any,
+    *,
+    accept: str | None = None,
+    session_id: str | None = None,
+    version: str | None = None,
+) -> Response:
+    """Posts a JSON-RPC message, or a batch of them, to the endpoint."""
+    headers = {}
+    if accept:
+        headers['Accept'] = accept
+    if session_id:
+        headers['Mcp-Session-Id'] = session_id
+    if version:
+        headers['MCP-Protocol-Version'] = version
+    request = Request.from_values(
+        method='POST',
+        content_type='application/json',
+        input_stream=io.BytesIO(json.dumps(data).encode()),
+        headers=headers,
+    )
+    return mcp.handle(request, Response())
+
+
+def get_request(method: str, params: dict | None = None, *, request_id=1) -> dict:
+    return {
+        'jsonrpc': '2.0',
+        'id': request_id,
+        'method': method,
+        'params': params or {},
+    }
+
+
+def get_tool_call(name: str, arguments: dict | None = None, *, request_id=1) -> dict:
+    params = {'name': name, 'arguments': arguments or {}}
+    return get_request('tools/call', params, request_id=request_id)
+
+
+def request(mcp, method: str, params: dict | None = None, *, request_id=1, **kwargs):
+    """Sends a request, returns the decoded JSON-RPC response. Keyword
+    arguments are passed to `post`."""
+    data = get_request(method, params, request_id=request_id)
+    return json.loads(post(mcp, data, **kwargs).data)
+
+
+def call_tool(mcp, name: str, arguments: dict | None = None, *, request_id=1, **kwargs):
+    """Calls a tool, returns the decoded JSON-RPC response."""
+    data = get_tool_call(name, arguments, request_id=request_id)
+    return json.loads(post(mcp, data, **kwargs).data)
+
+
+def get_sse_events(response: Response) -> list[dict]:
+    """Returns the decoded `data:` of each event of an SSE response."""
+    events = []
+    for event in response.get_data().decode().split('\n\n'):
+        lines = [
+            line[len('data: ') :]
+            for line in event.split('\n')
+            if line.startswith('data: ')
+        ]
+        if lines:
+            events.append(json.loads('\n'.join(lines)))
+    return events
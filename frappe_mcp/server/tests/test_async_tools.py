@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import threading
+import time
+
+import pytest
+
+from frappe_mcp.server import loop, types
+from frappe_mcp.server.context import Context
+from frappe_mcp.server.server import MCP
+from frappe_mcp.server.tests.helpers import (
+    SSE_ACCEPT,
+    call_tool,
+    get_sse_events,
+    get_tool_call,
+    post,
+)
+from frappe_mcp.server.tools import get_tool, run_tool
+
+user = contextvars.ContextVar('user', default=None)
+
+
+@pytest.fixture
+def cancelled():
+    return threading.Event()
+
+
+@pytest.fixture
+def mcp(cancelled):
+    mcp = MCP(name='frappe-mcp')
+
+    @mcp.tool()
+    async def fetch(delay: float):
+        """Fetches two things concurrently."""
+        results = await asyncio.gather(
+            asyncio.sleep(delay, result='a'),
+            asyncio.sleep(delay, result='b'),
+        )
+        return {'results': results, 'user': user.get()}
+
+    @mcp.tool()
+    async def count(n: int):
+        """Counts to n."""
+        for i in range(n):
+            await asyncio.sleep(0)
+            yield f'{i + 1}'
+
+    @mcp.tool()
+    async def export(ctx: Context):
+        """Sends rows."""
+        for i in range(2):
+            await asyncio.sleep(0)
+            ctx.send(f'row {i}')
+        return 'done'
+
+    @mcp.tool(timeout=0.05)
+    async def wait():
+        """Waits until cancelled."""
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    return mcp
+
+
+def test_async_tool(mcp):
+    token = user.set('test@example.com')
+    try:
+        data = call_tool(mcp, 'fetch', {'delay': 0.1})
+    finally:
+        user.reset(token)
+
+    # The coroutine runs in a copy of the request's context
+    expected = {'results': ['a', 'b'], 'user': 'test@example.com'}
+    assert data['result']['structuredContent'] == expected
+
+
+def test_async_tools_share_loop(mcp):
+    # Calls in a batch run concurrently on the same loop
+    batch = [get_tool_call('fetch', {'delay': 0.2}, request_id=i) for i in range(4)]
+    start = time.monotonic()
+    data = json.loads(post(mcp, batch).data)
+    assert time.monotonic() - start < 0.6
+    assert [d['result']['structuredContent']['results'] for d in data] == [
+        ['a', 'b']
+    ] * 4
+    assert loop.get_loop() is loop.get_loop()
+
+
+def test_async_generator_tool(mcp):
+    data = call_tool(mcp, 'count', {'n': 3})
+    assert [c['text'] for c in data['result']['content']] == ['1', '2', '3']
+
+    response = post(mcp, get_tool_call('count', {'n': 3}), accept=SSE_ACCEPT)
+    assert response.mimetype == 'text/event-stream'
+    [event] = get_sse_events(response)
+    assert [c['text'] for c in event['result']['content']] == ['1', '2', '3']
+
+
+def test_async_tool_with_context(mcp):
+    response = post(mcp, get_tool_call('export'), accept=SSE_ACCEPT)
+    texts = [c['text'] for c in get_sse_events(response)[0]['result']['content']]
+    assert texts == ['row 0', 'row 1', 'done']
+
+
+def test_async_tool_timeout_cancels_coroutine(mcp, cancelled):
+    data = call_tool(mcp, 'wait')
+    assert data['error']['code'] == types.REQUEST_TIMEOUT
+    assert cancelled.wait(2)
+
+
+def test_run_tool():
+    async def add(a: int, b: int):
+        """Adds two numbers."""
+        return a + b
+
+    assert run_tool(get_tool(add), {'a': 1, 'b': 2}) == 3
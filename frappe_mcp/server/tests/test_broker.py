@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from frappe_mcp.server.broker import FileBroker, InProcessBroker
+
+
+class TestInProcessBroker:
+    def test_publish_subscribe(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe(['a', 'b'])
+        other = broker.subscribe(['c'])
+
+        broker.publish('a', {'n': 1})
+        broker.publish('b', {'n': 2})
+        broker.publish('c', {'n': 3})
+
+        assert subscription.get(0.1) == {'n': 1}
+        assert subscription.get(0.1) == {'n': 2}
+        assert subscription.get(0.01) is None
+        assert other.get(0.1) == {'n': 3}
+
+    def test_get_blocks_until_published(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe(['a'])
+
+        timer = threading.Timer(0.05, broker.publish, args=('a', {'n': 1}))
+        timer.start()
+        start = time.monotonic()
+        assert subscription.get(5) == {'n': 1}
+        assert time.monotonic() - start < 1
+
+    def test_slow_subscription_drops_oldest(self):
+        broker = InProcessBroker(max_pending=2)
+        subscription = broker.subscribe(['a'])
+        for n in range(5):
+            broker.publish('a', {'n': n})
+
+        assert subscription.get(0.1) == {'n': 3}
+        assert subscription.get(0.1) == {'n': 4}
+        assert subscription.dropped == 3  # type: ignore[attr-defined]
+
+    def test_close_unsubscribes(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe(['a'])
+        subscription.close()
+        broker.publish('a', {'n': 1})
+        assert broker._channels == {}
+
+
+class TestFileBroker:
+    def test_publish_subscribe(self, tmp_path):
+        publisher = FileBroker(tmp_path, poll_interval=0.01)
+        broker = FileBroker(tmp_path, poll_interval=0.01)
+
+        publisher.publish('a', {'n': 0})
+        subscription = broker.subscribe(['a', 'b'])
+
+        # Only messages published after subscribing are received
+        publisher.publish('a', {'n': 1})
+        publisher.publish('b', {'n': 2})
+        publisher.publish('c', {'n': 3})
+
+        assert subscription.get(1) == {'n': 1}
+        assert subscription.get(1) == {'n': 2}
+        assert subscription.get(0.05) is None
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+import pytest
+
+from frappe_mcp.server import types
+from frappe_mcp.server.bulkhead import Bulkhead
+from frappe_mcp.server.context import CancellationToken, Context
+from frappe_mcp.server.errors import RequestCancelledError
+from frappe_mcp.server.server import MCP
+from frappe_mcp.server.tests.helpers import (
+    SSE_ACCEPT,
+    call_tool,
+    get_tool_call,
+    post,
+)
+
+
+def _get_stat(mcp, kind, key):
+    return mcp.get_tool_stats()[kind].get('search', {}).get(key)
+
+
+def _wait_for(condition, timeout=2):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, 'timed out'
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def _get_mcp(release, **kwargs):
+    mcp = MCP(name='frappe-mcp', **kwargs)
+
+    @mcp.tool(concurrency=1, tags=['search'])
+    def search():
+        """Searches slowly."""
+        release.wait(5)
+        return 'found'
+
+    @mcp.tool(tags=['search'])
+    def search_titles():
+        """Searches titles."""
+        return 'found'
+
+    @mcp.tool()
+    def lookup():
+        """Looks up a value."""
+        return 'value'
+
+    return mcp
+
+
+def _start(mcp, name) -> tuple[threading.Thread, list]:
+    results = []
+    thread = threading.Thread(target=lambda: results.append(call_tool(mcp, name)))
+    thread.start()
+    return thread, results
+
+
+def test_tool_limit(release):
+    mcp = _get_mcp(release, queue_timeout=0.1)
+    thread, _ = _start(mcp, 'search')
+    _wait_for(lambda: _get_stat(mcp, 'tools', 'in_flight') == 1)
+
+    error = call_tool(mcp, 'search')['error']
+    assert error['code'] == types.SERVER_BUSY
+    assert error['data'] == {'retryable': True}
+
+    # Other tools are not affected
+    assert call_tool(mcp, 'lookup')['result']['content'][0]['text'] == 'value'
+
+    release.set()
+    thread.join()
+    stats = mcp.get_tool_stats()['tools']
+    assert stats['search'] == {'limit': 1, 'in_flight': 0, 'queued': 0, 'rejected': 1}
+    assert stats['lookup'] == {
+        'limit': None,
+        'in_flight': 0,
+        'queued': 0,
+        'rejected': 0,
+    }
+
+
+def test_timed_out_call_holds_slot(release):
+    mcp = MCP(name='frappe-mcp', queue_timeout=0.05)
+
+    @mcp.tool(concurrency=1, timeout=0.05)
+    def slow():
+        """Runs past its timeout."""
+        release.wait(5)
+        return 'done'
+
+    assert call_tool(mcp, 'slow')['error']['code'] == types.REQUEST_TIMEOUT
+
+    # The tool is still running in its thread
+    assert mcp.get_tool_stats()['tools']['slow']['in_flight'] == 1
+    assert call_tool(mcp, 'slow')['error']['code'] == types.SERVER_BUSY
+
+    release.set()
+    _wait_for(lambda: mcp.get_tool_stats()['tools']['slow']['in_flight'] == 0)
+
+
+def test_timed_out_stream_holds_slot(release):
+    mcp = MCP(name='frappe-mcp', queue_timeout=0.05)
+
+    @mcp.tool(concurrency=1, timeout=0.05)
+    def export(ctx: Context):
+        """Streams past its timeout."""
+        ctx.send('started')
+        release.wait(5)
+        return 'done'
+
+    def stream():
+        response = post(mcp, get_tool_call('export'), accept=SSE_ACCEPT)
+        body = response.get_data()
+        response.close()
+        return response, body
+
+    response, body = stream()
+    assert response.mimetype == 'text/event-stream'
+    assert b'timed out' in body
+
+    # The tool is still running in its thread after the response is closed
+    assert mcp.get_tool_stats()['tools']['export']['in_flight'] == 1
+    response, body = stream()
+    assert json.loads(body)['error']['code'] == types.SERVER_BUSY
+
+    release.set()
+    _wait_for(lambda: mcp.get_tool_stats()['tools']['export']['in_flight'] == 0)
+
+
+def test_tag_limit(release):
+    mcp = _get_mcp(release, tag_concurrency={'search': 1}, queue_timeout=0.1)
+    thread, _ = _start(mcp, 'search')
+    _wait_for(lambda: _get_stat(mcp, 'tags', 'in_flight') == 1)
+
+    assert call_tool(mcp, 'search_titles')['error']['code'] == types.SERVER_BUSY
+    release.set()
+    thread.join()
+    assert call_tool(mcp, 'search_titles')['result']['isError'] is False
+
+
+def test_queued_call_runs_once_free(release):
+    mcp = _get_mcp(release)
+    first, _ = _start(mcp, 'search')
+    _wait_for(lambda: _get_stat(mcp, 'tools', 'in_flight') == 1)
+
+    second, results = _start(mcp, 'search')
+    _wait_for(lambda: _get_stat(mcp, 'tools', 'queued') == 1)
+
+    release.set()
+    first.join()
+    second.join()
+    assert results[0]['result']['content'][0]['text'] == 'found'
+
+
+def test_cancelled_while_queued():
+    bulkhead = Bulkhead(1)
+    token = CancellationToken()
+    assert bulkhead.acquire(None, token)
+
+    error = RequestCancelledError('Request cancelled')
+    threading.Timer(0.05, token.cancel, args=(error,)).start()
+    with pytest.raises(RequestCancelledError):
+        bulkhead.acquire(None, token)
+    assert bulkhead.get_stats()['queued'] == 0
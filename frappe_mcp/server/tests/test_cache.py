@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from frappe_mcp.server import tools
+from frappe_mcp.server.cache import MemoryCache, ResultCache, SQLiteCache
+from frappe_mcp.server.server import MCP
+from frappe_mcp.server.tests.helpers import call_tool
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def cache(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryCache(max_entries=2)
+    return SQLiteCache(tmp_path / 'cache.db', max_entries=2)
+
+
+class TestCache:
+    def test_get_set(self, cache):
+        assert cache.get('a') is None
+        cache.set('a', b'1', 60)
+        assert cache.get('a') == b'1'
+        cache.set('a', b'2', 60)
+        assert cache.get('a') == b'2'
+
+    def test_expiry(self, cache):
+        cache.set('a', b'1', 0.01)
+        time.sleep(0.02)
+        assert cache.get('a') is None
+
+    def test_eviction(self, cache):
+        cache.set('a', b'1', 60)
+        cache.set('b', b'2', 61)
+        cache.set('c', b'3', 62)
+        assert cache.get('a') is None
+        assert cache.get('b') == b'2'
+        assert cache.get('c') == b'3'
+
+    def test_clear(self, cache):
+        cache.set('a', b'1', 60)
+        cache.clear()
+        assert cache.get('a') is None
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set('a', b'1', 60)
+    cache.set('b', b'2', 60)
+    cache.get('a')
+    cache.set('c', b'3', 60)
+    assert cache.get('a') == b'1'
+    assert cache.get('b') is None
+
+
+def test_memory_cache_max_bytes():
+    cache = MemoryCache(max_bytes=4)
+    cache.set('a', b'12', 60)
+    cache.set('b', b'34', 60)
+    cache.set('c', b'56', 60)
+    assert cache.get('a') is None
+    assert cache.get('c') == b'56'
+
+    cache.set('d', b'too large', 60)
+    assert cache.get('d') is None
+
+
+def test_sqlite_cache_is_shared(tmp_path):
+    SQLiteCache(tmp_path / 'cache.db').set('a', b'1', 60)
+    assert SQLiteCache(tmp_path / 'cache.db').get('a') == b'1'
+
+
+def lookup(name: str):
+    return {'name': name}
+
+
+def test_result_cache_ttl():
+    cache = ResultCache(ttl=30)
+    assert cache.get_ttl(tools.get_tool(lookup)) is None
+    assert cache.get_ttl(tools.get_tool(lookup, tools.ToolOptions(cache=True))) == 30
+    assert cache.get_ttl(tools.get_tool(lookup, tools.ToolOptions(cache=5))) == 5
+
+    read_only = tools.get_tool(
+        lookup, tools.ToolOptions(annotations={'readOnlyHint': True})
+    )
+    assert cache.get_ttl(read_only) == 30
+    read_only['cache'] = False
+    assert cache.get_ttl(read_only) is None
+
+
+def test_result_cache_key():
+    cache = ResultCache()
+    key = cache.get_key('lookup', {'a': 1, 'b': [1, 2]})
+    assert key == cache.get_key('lookup', {'b': [1, 2], 'a': 1})
+    assert key != cache.get_key('lookup', {'a': 1, 'b': [2, 1]})
+    assert key != cache.get_key('other', {'a': 1, 'b': [1, 2]})
+
+
+def test_tools_call_is_cached():
+    result_cache = ResultCache()
+    mcp = MCP(name='frappe-mcp', result_cache=result_cache)
+    calls = []
+
+    @mcp.tool(annotations={'readOnlyHint': True})
+    def get_count(doctype: str):
+        """Counts documents."""
+        calls.append(doctype)
+        return {'count': len(calls)}
+
+    @mcp.tool()
+    def create(doctype: str):
+        """Creates a document."""
+        calls.append(doctype)
+        return doctype
+
+    @mcp.tool(cache=True)
+    def fail(doctype: str):
+        """Always fails."""
+        calls.append(doctype)
+        raise Exception('failed')
+
+    first = call_tool(mcp, 'get_count', {'doctype': 'ToDo'})
+    assert call_tool(mcp, 'get_count', {'doctype': 'ToDo'}) == first
+    assert first['result']['structuredContent'] == {'count': 1}
+    assert call_tool(mcp, 'get_count', {'doctype': 'Note'})['result'][
+        'structuredContent'
+    ] == {'count': 2}
+    assert result_cache.get_stats() == {'hits': 1, 'misses': 2}
+
+    call_tool(mcp, 'create', {'doctype': 'ToDo'})
+    call_tool(mcp, 'create', {'doctype': 'ToDo'})
+    assert len(calls) == 4
+
+    assert call_tool(mcp, 'fail', {'doctype': 'ToDo'})['result']['isError']
+    assert call_tool(mcp, 'fail', {'doctype': 'ToDo'})['result']['isError']
+    assert len(calls) == 6
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from frappe_mcp.server import types
+from frappe_mcp.server.broker import FileBroker
+from frappe_mcp.server.context import CancellationToken, Context
+from frappe_mcp.server.errors import RequestCancelledError
+from frappe_mcp.server.server import MCP
+from frappe_mcp.server.tests.helpers import (
+    SSE_ACCEPT,
+    call_tool,
+    get_sse_events,
+    get_tool_call,
+    post,
+)
+
+
+def _cancel(mcp, request_id, session_id=None):
+    data = {
+        'jsonrpc': '2.0',
+        'method': 'notifications/cancelled',
+        'params': {'requestId': request_id, 'reason': 'User cancelled'},
+    }
+    assert post(mcp, data, session_id=session_id).status_code == 202
+
+
+def _add_tools(mcp, started: threading.Event, stopped: threading.Event):
+    @mcp.tool()
+    def wait(ctx: Context):
+        """Waits until cancelled."""
+        started.set()
+        while not ctx.cancelled:
+            time.sleep(0.005)
+        stopped.set()
+        ctx.raise_if_cancelled()
+
+    @mcp.tool(timeout=0.05)
+    def sleep(seconds: float, ctx: Context):
+        """Sleeps."""
+        time.sleep(seconds)
+        if ctx.cancelled:
+            stopped.set()
+        return 'done'
+
+    @mcp.tool()
+    def quick():
+        """Returns immediately."""
+        return 'done'
+
+
+@pytest.fixture
+def events():
+    return threading.Event(), threading.Event()
+
+
+@pytest.fixture
+def mcp(events):
+    mcp = MCP(name='frappe-mcp')
+    _add_tools(mcp, *events)
+    return mcp
+
+
+def test_tool_timeout(mcp, events):
+    _, stopped = events
+    start = time.monotonic()
+    data = call_tool(mcp, 'sleep', {'seconds': 0.5})
+    assert time.monotonic() - start < 0.4
+    assert data['error']['code'] == types.REQUEST_TIMEOUT
+    assert data['error']['message'] == "Tool 'sleep' timed out after 0.05 seconds"
+
+    # The tool sees that it has been cancelled
+    assert stopped.wait(2)
+
+    result = call_tool(mcp, 'sleep', {'seconds': 0})['result']
+    assert result['content'][0]['text'] == 'done'
+
+
+def test_server_tool_timeout(events):
+    mcp = MCP(name='frappe-mcp', tool_timeout=0.05)
+    _add_tools(mcp, *events)
+    assert call_tool(mcp, 'wait')['error']['code'] == types.REQUEST_TIMEOUT
+    assert call_tool(mcp, 'quick')['result']['content'][0]['text'] == 'done'
+
+
+def _call_sse(mcp, name, arguments=None):
+    response = post(mcp, get_tool_call(name, arguments), accept=SSE_ACCEPT)
+    assert response.mimetype == 'text/event-stream'
+    events = get_sse_events(response)
+    response.close()
+    return events[-1]
+
+
+def test_stream_timeout(events):
+    _, stopped = events
+    mcp = MCP(name='frappe-mcp')
+
+    @mcp.tool(timeout=0.1)
+    def report(ctx: Context):
+        """Sends content until cancelled."""
+        ctx.send('started')
+        for _ in range(100):
+            if ctx.cancelled:
+                stopped.set()
+                break
+            time.sleep(0.02)
+        return 'done'
+
+    @mcp.tool(timeout=0.1)
+    def rows():
+        """Yields rows slowly."""
+        yield 'a'
+        time.sleep(0.3)
+        yield 'b'
+        yield 'c'
+
+    start = time.monotonic()
+    result = _call_sse(mcp, 'report')['result']
+    assert time.monotonic() - start < 1
+    assert result['isError'] is True
+    assert result['content'][0]['text'] == 'started'
+    assert 'timed out after 0.1 seconds' in result['content'][-1]['text']
+    assert stopped.wait(2)
+
+    # Generators are stopped once they yield
+    result = _call_sse(mcp, 'rows')['result']
+    assert result['isError'] is True
+    assert [c['text'] for c in result['content'][:-1]] == ['a']
+
+
+def test_stream_error_before_content(mcp, events):
+    started, stopped = events
+
+    # Sent as the error response of calls that aren't streamed
+    data = _call_sse(mcp, 'sleep', {'seconds': 0.5})
+    assert data['error'] == {
+        'code': types.REQUEST_TIMEOUT,
+        'message': "Tool 'sleep' timed out after 0.05 seconds",
+    }
+    assert stopped.wait(2)
+
+    results = []
+    thread = threading.Thread(target=lambda: results.append(_call_sse(mcp, 'wait')))
+    thread.start()
+    assert started.wait(2)
+    _cancel(mcp, 1)
+    thread.join(2)
+    assert results[0]['error']['code'] == types.REQUEST_CANCELLED
+
+
+def _call_in_thread(mcp, name, **kwargs):
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(call_tool(mcp, name, **kwargs))
+    )
+    thread.start()
+    return thread, results
+
+
+def test_cancelcall_tool(mcp, events):
+    started, stopped = events
+    thread, results = _call_in_thread(mcp, 'wait', request_id='a', session_id='s1')
+    assert started.wait(2)
+
+    # Calls are tracked per session
+    _cancel(mcp, 'a', session_id='s2')
+    _cancel(mcp, 'b', session_id='s1')
+    time.sleep(0.05)
+    assert not stopped.is_set()
+
+    _cancel(mcp, 'a', session_id='s1')
+    thread.join(2)
+    assert stopped.is_set()
+    assert results[0]['id'] == 'a'
+    assert results[0]['error'] == {
+        'code': types.REQUEST_CANCELLED,
+        'message': 'User cancelled',
+    }
+    assert mcp._calls == {}
+
+
+def test_cancel_call_in_other_worker(tmp_path, events):
+    started, stopped = events
+    broker = FileBroker(tmp_path, poll_interval=0.01)
+    worker = MCP(name='frappe-mcp', broker=broker)
+    other_worker = MCP(name='frappe-mcp', broker=broker)
+    _add_tools(worker, *events)
+
+    thread, results = _call_in_thread(worker, 'wait', request_id=7)
+    assert started.wait(2)
+    _cancel(other_worker, 7)
+
+    thread.join(2)
+    assert stopped.is_set()
+    assert results[0]['error']['code'] == types.REQUEST_CANCELLED
+
+
+def test_cancellation_token():
+    token = CancellationToken()
+    calls = []
+    token.add_callback(lambda: calls.append(1))
+    assert not token.cancelled
+
+    error = RequestCancelledError('cancelled')
+    token.cancel(error)
+    token.cancel(RequestCancelledError('again'))
+    assert token.cancelled
+    assert token.error is error
+    assert calls == [1]
+
+    token.add_callback(lambda: calls.append(2))
+    assert calls == [1, 2]
+
+    ctx = Context(token=token)
+    assert ctx.cancelled
+    with pytest.raises(RequestCancelledError):
+        ctx.raise_if_cancelled()
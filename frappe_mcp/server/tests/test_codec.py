@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import pytest
+
+from frappe_mcp.server import codec
+
+
+def get_codecs() -> list[codec.JSONCodec]:
+    codecs: list[codec.JSONCodec] = [codec.StdlibCodec()]
+    try:
+        codecs.append(codec.OrjsonCodec())
+    except ImportError:
+        pass
+    return codecs
+
+
+@pytest.mark.parametrize('json_codec', get_codecs(), ids=lambda c: c.name)
+class TestCodec:
+    def test_round_trip(self, json_codec):
+        data = {'a': [1, 2.5, None, True], 'b': 'ü', 'c': {}}
+        encoded = json_codec.dumps(data)
+        assert isinstance(encoded, bytes)
+        assert json_codec.loads(encoded) == data
+        assert json_codec.loads(encoded.decode()) == data
+
+    def test_invalid_json_raises_value_error(self, json_codec):
+        with pytest.raises(ValueError):
+            json_codec.loads(b'{"a": ')
+        with pytest.raises(ValueError):
+            json_codec.loads(b'\xff\xfe')
+
+
+def test_set_codec():
+    default = codec.get_codec()
+    stdlib = codec.StdlibCodec()
+    try:
+        codec.set_codec(stdlib)
+        assert codec.get_codec() is stdlib
+        assert codec.loads(codec.dumps([1])) == [1]
+    finally:
+        codec.set_codec(default)
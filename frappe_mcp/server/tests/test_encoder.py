@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import decimal
+import json
+import uuid
+from typing import NamedTuple
+
+import pytest
+from pydantic import BaseModel, Field
+
+from frappe_mcp.server import codec, encoder
+from frappe_mcp.server.tools import get_tool
+from frappe_mcp.server.tools.handlers import _get_result
+
+
+def get_codecs() -> list[codec.JSONCodec]:
+    codecs: list[codec.JSONCodec] = [codec.StdlibCodec()]
+    try:
+        codecs.append(codec.OrjsonCodec())
+    except ImportError:
+        pass
+    return codecs
+
+
+class FrappeDict(dict):
+    # Like frappe._dict
+    __getattr__ = dict.get
+
+
+@dataclasses.dataclass
+class Item:
+    code: str
+    rate: decimal.Decimal
+
+
+class Customer(BaseModel):
+    name: str
+    since: datetime.date = Field(alias='customerSince')
+
+
+class Point(NamedTuple):
+    x: int
+    y: int
+
+
+class Money:
+    def __init__(self, amount, currency):
+        self.amount = amount
+        self.currency = currency
+
+
+@pytest.fixture(params=get_codecs(), ids=lambda c: c.name)
+def json_codec(request):
+    default = codec.get_codec()
+    codec.set_codec(request.param)
+    yield request.param
+    codec.set_codec(default)
+
+
+def _dumps(value, **kwargs) -> object:
+    return json.loads(encoder.ResultEncoder(**kwargs).dumps(value))
+
+
+def test_encode_types(json_codec):
+    row = FrappeDict(
+        name='SINV-0001',
+        posting_date=datetime.date(2025, 1, 31),
+        modified=datetime.datetime(2025, 1, 31, 10, 30, 5, 120000),
+        from_time=datetime.time(9, 15),
+        grand_total=decimal.Decimal('1250.50'),
+        tags={'urgent'},
+        batch=uuid.UUID(int=1),
+        item=Item('ITEM-1', decimal.Decimal('2.5')),
+        customer=Customer(name='ACME', customerSince=datetime.date(2020, 5, 1)),
+    )
+    assert _dumps({'rows': [row]}) == {
+        'rows': [
+            {
+                'name': 'SINV-0001',
+                'posting_date': '2025-01-31',
+                'modified': '2025-01-31T10:30:05.120000',
+                'from_time': '09:15:00',
+                'grand_total': 1250.5,
+                'tags': ['urgent'],
+                'batch': '00000000-0000-0000-0000-000000000001',
+                'item': {'code': 'ITEM-1', 'rate': 2.5},
+                'customer': {'name': 'ACME', 'customerSince': '2020-05-01'},
+            }
+        ]
+    }
+
+
+def test_decimal_as_string(json_codec):
+    value = {'rate': decimal.Decimal('0.1000000000000000055511151231257827')}
+    assert _dumps(value, decimal_as='string') == {
+        'rate': '0.1000000000000000055511151231257827'
+    }
+
+
+def test_namedtuple(json_codec):
+    # The stdlib encoder writes tuples as arrays without calling the handler
+    expected = {'x': 1, 'y': 2} if json_codec.name == 'orjson' else [1, 2]
+    assert _dumps({'point': Point(1, 2)}) == {'point': expected}
+
+
+def test_register_type(json_codec):
+    result_encoder = encoder.ResultEncoder()
+    with pytest.raises(TypeError):
+        result_encoder.dumps({'price': Money(10, 'EUR')})
+
+    result_encoder.register(Money, lambda m: f'{m.amount} {m.currency}')
+    assert json.loads(result_encoder.dumps({'price': Money(10, 'EUR')})) == {
+        'price': '10 EUR'
+    }
+
+
+def test_structured_result(json_codec):
+    def get_invoice():
+        """Returns an invoice."""
+        return FrappeDict(name='SINV-0001', grand_total=decimal.Decimal('10.5'))
+
+    result = json.loads(bytes(codec.encode(_get_result(get_tool(get_invoice), {}))))
+    expected = {'name': 'SINV-0001', 'grand_total': 10.5}
+    assert result['structuredContent'] == expected
+    assert json.loads(result['content'][0]['text']) == expected
+    assert result['isError'] is False
+
+
+def test_unencodable_result_falls_back_to_str():
+    price = Money(10, 'EUR')
+
+    def get_price():
+        """Returns a price."""
+        return price
+
+    result = _get_result(get_tool(get_price), {})
+    assert result.content[0].text == str(price)
+    assert result.structuredContent is None
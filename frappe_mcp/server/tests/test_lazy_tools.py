@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import importlib
+import sys
+import textwrap
+
+import pytest
+
+from frappe_mcp.server.server import MCP
+from frappe_mcp.server.tests.helpers import request
+
+MODULE = textwrap.dedent(
+    '''
+    from frappe_mcp import Context
+
+    def monthly_report(month: str):
+        """Get the monthly report."""
+        return {'month': month, 'total': 10}
+
+    def export_report(month: str, ctx: Context):
+        """Export the monthly report."""
+        ctx.report_progress(1, 1)
+        return {'month': month}
+    '''
+)
+
+SCHEMA = {
+    'type': 'object',
+    'properties': {'month': {'type': 'string'}},
+    'required': ['month'],
+}
+
+DECORATED_MODULE = textwrap.dedent(
+    '''
+    from {app} import mcp
+
+    @mcp.tool()
+    def hello(name: str):
+        """Say hello."""
+        return f'Hello {{name}}'
+    '''
+)
+
+
+@pytest.fixture
+def module(tmp_path, monkeypatch):
+    name = f'lazy_reports_{tmp_path.name}'
+    (tmp_path / f'{name}.py').write_text(MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield name
+    sys.modules.pop(name, None)
+
+
+def test_imported_on_first_call(module):
+    mcp = MCP(name='frappe-mcp')
+    mcp.add_lazy_tool(
+        f'{module}:monthly_report',
+        description='Get the monthly report.',
+        input_schema=SCHEMA,
+    )
+
+    [tool] = request(mcp, 'tools/list')['result']['tools']
+    assert tool['name'] == 'monthly_report'
+    assert tool['inputSchema'] == SCHEMA
+    assert module not in sys.modules
+
+    params = {'name': 'monthly_report', 'arguments': {'month': '2025-01'}}
+    result = request(mcp, 'tools/call', params)['result']
+    assert result['structuredContent'] == {'month': '2025-01', 'total': 10}
+    assert module in sys.modules
+
+
+def test_arguments_validated_before_import(module):
+    mcp = MCP(name='frappe-mcp')
+    mcp.add_lazy_tool(f'{module}.monthly_report', input_schema=SCHEMA)
+
+    response = request(mcp, 'tools/call', {'name': 'monthly_report', 'arguments': {}})
+    assert response['error']['code'] == -32602
+    assert module not in sys.modules
+
+
+def test_context_inferred_on_load(module):
+    mcp = MCP(name='frappe-mcp')
+    mcp.add_lazy_tool(f'{module}:export_report', name='export', input_schema=SCHEMA)
+
+    params = {'name': 'export', 'arguments': {'month': '2025-01'}}
+    result = request(mcp, 'tools/call', params)['result']
+    assert result['structuredContent'] == {'month': '2025-01'}
+    assert mcp._tool_registry['export']['context_param'] == 'ctx'
+
+
+def test_import_error_is_returned(module):
+    mcp = MCP(name='frappe-mcp')
+    mcp.add_lazy_tool(f'{module}:missing', input_schema=SCHEMA)
+
+    params = {'name': 'missing', 'arguments': {'month': '2025-01'}}
+    result = request(mcp, 'tools/call', params)['result']
+    assert result['isError'] is True
+    assert result['content'][0]['text'].startswith("Error loading tool 'missing'")
+
+
+def test_invalid_path():
+    mcp = MCP(name='frappe-mcp')
+    with pytest.raises(ValueError):
+        mcp.add_lazy_tool('monthly_report', input_schema=SCHEMA)
+
+
+def test_decorated_module(tmp_path, monkeypatch):
+    app, module = f'lazy_app_{tmp_path.name}', f'lazy_greetings_{tmp_path.name}'
+    (tmp_path / f'{app}.py').write_text(
+        'from frappe_mcp.server.server import MCP\n\nmcp = MCP(name="frappe-mcp")\n'
+    )
+    (tmp_path / f'{module}.py').write_text(DECORATED_MODULE.format(app=app))
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    try:
+        mcp = importlib.import_module(app).mcp
+        schema = {'type': 'object', 'properties': {'name': {'type': 'string'}}}
+        mcp._mcp_entry_fn = lambda: mcp.add_lazy_tool(
+            f'{module}:hello', input_schema=schema
+        )
+        mcp.setup()
+        tool = mcp._tool_registry['hello']
+
+        params = {'name': 'hello', 'arguments': {'name': 'Ada'}}
+        result = request(mcp, 'tools/call', params)['result']
+        assert result['content'] == [{'type': 'text', 'text': 'Hello Ada'}]
+        assert not result['isError']
+        assert mcp._tool_registry['hello'] is tool
+    finally:
+        sys.modules.pop(app, None)
+        sys.modules.pop(module, None)
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import sys
+import textwrap
+
+import pytest
+
+from frappe_mcp.server import manifest
+from frappe_mcp.server.resources import DirectoryProvider, get_resource
+from frappe_mcp.server.server import MCP
+from frappe_mcp.server.tests.helpers import request
+
+MODULE = textwrap.dedent(
+    '''
+    from frappe_mcp import Context, PromptMessage, TextContent
+
+    def monthly_report(month: str):
+        """Get the monthly report.
+
+        Args:
+            month: Month of the report, e.g. 2025-01.
+        """
+        return {'month': month, 'total': 10}
+
+    def export_report(month: str, ctx: Context):
+        """Export the monthly report."""
+        return {'month': month}
+
+    def summarize(topic: str):
+        """Summarize a topic."""
+        return [PromptMessage(role='user', content=TextContent(text=topic))]
+
+    def readme():
+        """The app's readme."""
+        return '# Reports'
+
+    def get_report_version(month: str):
+        return 1
+
+    def get_report(month: str):
+        """A monthly report."""
+        return {'month': month}
+    '''
+)
+
+# Registers its tools with the decorators, as in the README
+DECORATED_MODULE = textwrap.dedent(
+    '''
+    from frappe_mcp import PromptMessage, TextContent
+    from {app} import mcp
+
+    @mcp.tool()
+    def hello(name: str):
+        """Say hello."""
+        return f'Hello {{name}}'
+
+    @mcp.prompt()
+    def greet(name: str):
+        """Greet someone."""
+        return [PromptMessage(role='user', content=TextContent(text=name))]
+
+    @mcp.resource('frappe://greeting/{{name}}')
+    def get_greeting(name: str):
+        """A greeting."""
+        return f'Hello {{name}}'
+    '''
+)
+
+APP_MODULE = textwrap.dedent(
+    """
+    import importlib
+
+    from frappe_mcp.server.server import MCP
+
+    mcp = MCP(name='frappe-mcp', manifest={manifest!r})
+    mcp._mcp_entry_fn = lambda: importlib.import_module({module!r})
+    """
+)
+
+
+@pytest.fixture
+def module(tmp_path, monkeypatch):
+    name = f'manifest_reports_{tmp_path.name}'
+    (tmp_path / f'{name}.py').write_text(MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield name
+    sys.modules.pop(name, None)
+
+
+def _get_mcp(module, path, calls):
+    mcp = MCP(name='frappe-mcp', manifest=path)
+
+    def handle_mcp():
+        calls.append(1)
+        reports = importlib.import_module(module)
+        mcp.tool(annotations={'readOnlyHint': True})(reports.monthly_report)
+        mcp.tool()(reports.export_report)
+        mcp.prompt()(reports.summarize)
+        mcp.resource('frappe://readme', mime_type='text/markdown')(reports.readme)
+        mcp.resource('frappe://report/{month}', version=reports.get_report_version)(
+            reports.get_report
+        )
+
+    mcp._mcp_entry_fn = handle_mcp
+    return mcp
+
+
+def _compile(module, path):
+    mcp = _get_mcp(module, path, [])
+    mcp._mcp_entry_fn()
+    manifest.write_manifest(mcp, path)
+    sys.modules.pop(module)
+    return mcp
+
+
+def test_loaded_without_import(module, tmp_path):
+    path = tmp_path / 'manifest.json'
+    compiled = _compile(module, path)
+
+    calls = []
+    mcp = _get_mcp(module, path, calls)
+    mcp.setup()
+    assert calls == []
+    assert module not in sys.modules
+
+    for method in ('tools/list', 'prompts/list'):
+        assert request(mcp, method) == request(compiled, method)
+    assert module not in sys.modules
+
+    params = {'name': 'monthly_report', 'arguments': {'month': '2025-01'}}
+    result = request(mcp, 'tools/call', params)['result']
+    assert result['structuredContent'] == {'month': '2025-01', 'total': 10}
+
+    tool = mcp._tool_registry['export_report']
+    assert tool['context_param'] == 'ctx'
+    assert tool['stream'] is True
+
+    params = {'name': 'summarize', 'arguments': {'topic': 'Sales'}}
+    [message] = request(mcp, 'prompts/get', params)['result']['messages']
+    assert message['content']['text'] == 'Sales'
+
+
+def test_resources_loaded_without_import(module, tmp_path):
+    path = tmp_path / 'manifest.json'
+    compiled = _compile(module, path)
+
+    mcp = _get_mcp(module, path, [])
+    mcp.setup()
+    for method in ('resources/list', 'resources/templates/list'):
+        assert request(mcp, method) == request(compiled, method)
+    assert [
+        r['uri'] for r in request(mcp, 'resources/list')['result']['resources']
+    ] == ['frappe://readme']
+    assert module not in sys.modules
+
+    result = request(mcp, 'resources/read', {'uri': 'frappe://report/2025-01'})[
+        'result'
+    ]
+    assert json.loads(result['contents'][0]['text']) == {'month': '2025-01'}
+    assert 'etag' in result['_meta']
+
+    [content] = request(mcp, 'resources/read', {'uri': 'frappe://readme'})['result'][
+        'contents'
+    ]
+    assert content == {
+        'uri': 'frappe://readme',
+        'mimeType': 'text/markdown',
+        'text': '# Reports',
+    }
+
+
+def test_decorated_module_loaded(tmp_path, monkeypatch):
+    app, module = f'greeting_app_{tmp_path.name}', f'greetings_{tmp_path.name}'
+    path = tmp_path / 'manifest.json'
+    (tmp_path / f'{app}.py').write_text(
+        APP_MODULE.format(manifest=str(path), module=module)
+    )
+    (tmp_path / f'{module}.py').write_text(DECORATED_MODULE.format(app=app))
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    try:
+        compiled = importlib.import_module(app).mcp
+        compiled._mcp_entry_fn()
+        manifest.write_manifest(compiled, path)
+        sys.modules.pop(app)
+        sys.modules.pop(module)
+
+        mcp = importlib.import_module(app).mcp
+        mcp.setup()
+        assert module not in sys.modules
+        entry = mcp._tool_registry['hello']
+
+        # Importing the module registers the tools again once frozen
+        params = {'name': 'hello', 'arguments': {'name': 'Ada'}}
+        result = request(mcp, 'tools/call', params)['result']
+        assert result['content'] == [{'type': 'text', 'text': 'Hello Ada'}]
+        assert not result['isError']
+        assert module in sys.modules
+        assert mcp._tool_registry['hello'] is entry
+
+        params = {'name': 'greet', 'arguments': {'name': 'Ada'}}
+        [message] = request(mcp, 'prompts/get', params)['result']['messages']
+        assert message['content']['text'] == 'Ada'
+
+        result = request(mcp, 'resources/read', {'uri': 'frappe://greeting/Ada'})
+        assert result['result']['contents'][0]['text'] == 'Hello Ada'
+
+        for method in ('tools/list', 'prompts/list', 'resources/templates/list'):
+            assert request(mcp, method) == request(compiled, method)
+    finally:
+        sys.modules.pop(app, None)
+        sys.modules.pop(module, None)
+
+
+def test_stale_manifest_not_loaded(module, tmp_path):
+    path = tmp_path / 'manifest.json'
+    _compile(module, path)
+
+    source = tmp_path / f'{module}.py'
+    stat = source.stat()
+    source.write_text(MODULE + '\n')
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    calls = []
+    mcp = _get_mcp(module, path, calls)
+    mcp.setup()
+    assert calls == [1]
+    assert 'monthly_report' in mcp._tool_registry
+
+
+@pytest.mark.parametrize('content', [b'', b'{"version": 0}', b'{"version": 1}'])
+def test_invalid_manifest_not_loaded(module, tmp_path, content):
+    path = tmp_path / 'manifest.json'
+    path.write_bytes(content)
+    mcp = _get_mcp(module, path, [])
+    assert manifest.load_manifest(mcp, path) is False
+    assert len(mcp._tool_registry) == 0
+
+
+def test_local_function_rejected():
+    mcp = MCP(name='frappe-mcp')
+
+    @mcp.tool()
+    def local_tool():
+        """A tool defined in a function."""
+
+    with pytest.raises(ValueError, match='local_tool'):
+        manifest.compile_manifest(mcp)
+
+
+def test_provider_rejected(tmp_path):
+    mcp = MCP(name='frappe-mcp')
+    mcp.add_resource(get_resource(DirectoryProvider(tmp_path), 'file:///{+path}'))
+
+    with pytest.raises(ValueError, match='to the manifest'):
+        manifest.compile_manifest(mcp)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import os
+import time
+
+import pytest
+
+from frappe_mcp.server import process, types
+from frappe_mcp.server.context import Context
+from frappe_mcp.server.server import MCP
+from frappe_mcp.server.tests.helpers import call_tool
+from frappe_mcp.server.tools import get_tool
+
+
+def get_pid():
+    """Returns the process id."""
+    return {'pid': os.getpid()}
+
+
+def repeat(text: str, times: int):
+    """Repeats text."""
+    return text * times
+
+
+def crash():
+    """Exits the process."""
+    os._exit(3)
+
+
+def fail():
+    """Raises an error."""
+    raise ValueError('bad input')
+
+
+def spin(seconds: float):
+    """Keeps the CPU busy."""
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+    return 'done'
+
+
+def hold_shared_memory(name: str):
+    """Creates shared memory and spins until killed."""
+    from multiprocessing.shared_memory import SharedMemory
+
+    SharedMemory(name=name, create=True, size=16).close()
+    return spin(10)
+
+
+@pytest.fixture(scope='module')
+def mcp():
+    mcp = MCP(name='frappe-mcp', process_workers=1)
+    for fn in (get_pid, repeat, crash, fail):
+        mcp.tool(executor='process')(fn)
+    mcp.tool(executor='process', timeout=0.5)(spin)
+    mcp.tool(executor='process', timeout=0.5)(hold_shared_memory)
+    yield mcp
+    mcp._process_pool.shutdown()
+
+
+def test_process_tool(mcp):
+    result = call_tool(mcp, 'get_pid')['result']
+    pid = result['structuredContent']['pid']
+    assert pid != os.getpid()
+
+    # The worker is reused
+    assert call_tool(mcp, 'get_pid')['result']['structuredContent']['pid'] == pid
+
+
+def test_large_result(mcp):
+    # Passed back through shared memory
+    text = call_tool(
+        mcp, 'repeat', {'text': 'ab', 'times': process.SHARED_MEMORY_THRESHOLD}
+    )
+    assert (
+        text['result']['content'][0]['text'] == 'ab' * process.SHARED_MEMORY_THRESHOLD
+    )
+
+
+def test_tool_error(mcp):
+    result = call_tool(mcp, 'fail')['result']
+    assert result['isError'] is True
+    assert result['content'][0]['text'] == "Error calling tool 'fail': bad input"
+
+
+def test_crash_is_isolated(mcp):
+    result = call_tool(mcp, 'crash')['result']
+    assert result['isError'] is True
+    assert 'exited with code 3' in result['content'][0]['text']
+
+    # A new worker takes its place
+    assert (
+        call_tool(mcp, 'repeat', {'text': 'a', 'times': 2})['result']['content'][0][
+            'text'
+        ]
+        == 'aa'
+    )
+
+
+def test_timeout_kills_worker(mcp):
+    pid = call_tool(mcp, 'get_pid')['result']['structuredContent']['pid']
+    start = time.monotonic()
+    data = call_tool(mcp, 'spin', {'seconds': 10})
+    assert time.monotonic() - start < 5
+    assert data['error']['code'] == types.REQUEST_TIMEOUT
+
+    assert call_tool(mcp, 'get_pid')['result']['structuredContent']['pid'] != pid
+    assert (
+        call_tool(mcp, 'spin', {'seconds': 0})['result']['content'][0]['text'] == 'done'
+    )
+
+
+def test_shared_memory_unlinked_on_timeout(mcp, monkeypatch):
+    from multiprocessing.shared_memory import SharedMemory
+
+    # The name the pool passes to the worker for its result
+    monkeypatch.setattr(process.secrets, 'token_hex', lambda n: 'test' * (n // 2))
+    name = 'fmcp_' + 'test' * 4
+
+    data = call_tool(mcp, 'hold_shared_memory', {'name': name})
+    assert data['error']['code'] == types.REQUEST_TIMEOUT
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=name)
+
+
+def test_workers_spawned_lazily():
+    pool = process.ProcessPool()
+    assert pool.max_workers == process.DEFAULT_MAX_WORKERS
+    tool = get_tool(get_pid, {'executor': 'process'})
+    pool.add_tool(tool)
+    try:
+        pool.call(tool, {})
+        pool.call(tool, {})
+        assert len(pool._workers) == 1
+    finally:
+        pool.shutdown()
+
+
+def test_invalid_process_tools():
+    def local():
+        """Not importable."""
+
+    def with_context(ctx: Context):
+        """Takes a context."""
+
+    with pytest.raises(ValueError, match='top level of a module'):
+        get_tool(local, {'executor': 'process'})
+    with pytest.raises(ValueError, match='takes a Context'):
+        get_tool(with_context, {'executor': 'process'})
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import os
+
+from frappe_mcp.server import process_local
+from frappe_mcp.server.process_local import ProcessLocal
+
+
+def test_created_once_per_process(monkeypatch):
+    created = []
+    value = ProcessLocal(lambda: created.append(1) or len(created))
+    assert value.get() == 1
+    assert value.get() == 1
+
+    # A forked worker creates its own
+    pid = os.getpid()
+    monkeypatch.setattr(process_local.os, 'getpid', lambda: pid + 1)
+    assert value.get() == 2
+    assert value.get() == 2
+
+    value.reset()
+    assert value.get() == 3
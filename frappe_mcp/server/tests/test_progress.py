@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import time
+
+import pytest
+
+from frappe_mcp.server import context
+from frappe_mcp.server.broker import InProcessBroker, get_session_channel
+from frappe_mcp.server.context import Context
+from frappe_mcp.server.server import MCP
+from frappe_mcp.server.tests.helpers import (
+    SSE_ACCEPT,
+    get_request,
+    get_sse_events,
+    post,
+)
+
+
+def _call(mcp, name, *, progress_token=None, **kwargs):
+    params: dict = {'name': name, 'arguments': {}}
+    if progress_token is not None:
+        params['_meta'] = {'progressToken': progress_token}
+    return post(mcp, get_request('tools/call', params), **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def no_interval(monkeypatch):
+    monkeypatch.setattr(context, 'PROGRESS_INTERVAL', 0)
+
+
+@pytest.fixture
+def mcp():
+    mcp = MCP(name='frappe-mcp', broker=InProcessBroker())
+
+    @mcp.tool()
+    def count(ctx: Context):
+        """Counts to three."""
+        for i in range(3):
+            ctx.report_progress(i + 1, 3, message=f'Step {i + 1}')
+        return {'count': 3}
+
+    return mcp
+
+
+def test_report_progress_rate_limit(monkeypatch):
+    monkeypatch.setattr(context, 'PROGRESS_INTERVAL', 60)
+    sent = []
+    ctx = Context(progress_token='t', notify=sent.append)
+
+    ctx.report_progress(1, 10)
+    ctx.report_progress(2, 10)  # Too soon
+    ctx.report_progress(1, 10)  # Not increasing
+    ctx.report_progress(10, 10)  # Done, always sent
+    assert [n.params['progress'] for n in sent] == [1, 10]
+    assert sent[0].method == 'notifications/progress'
+    assert sent[0].params == {'progressToken': 't', 'progress': 1, 'total': 10}
+
+
+def test_report_progress_without_token():
+    sent = []
+    ctx = Context(notify=sent.append)
+    ctx.report_progress(1, 10)
+    assert sent == []
+
+
+def test_progress_sse(mcp):
+    response = _call(mcp, 'count', progress_token='p1', accept=SSE_ACCEPT)
+    assert response.mimetype == 'text/event-stream'
+
+    *notifications, result = get_sse_events(response)
+    assert [n['method'] for n in notifications] == ['notifications/progress'] * 3
+    assert [n['params']['progress'] for n in notifications] == [1, 2, 3]
+    assert notifications[0]['params']['progressToken'] == 'p1'
+    assert notifications[0]['params']['message'] == 'Step 1'
+
+    assert result['id'] == 1
+    assert result['result']['structuredContent'] == {'count': 3}
+    assert json.loads(result['result']['content'][0]['text']) == {'count': 3}
+    assert result['result']['isError'] is False
+
+
+def test_progress_without_token(mcp):
+    response = _call(mcp, 'count', accept=SSE_ACCEPT)
+    [result] = get_sse_events(response)
+    assert result['result']['structuredContent'] == {'count': 3}
+
+
+def test_progress_over_session_stream(mcp):
+    subscription = mcp._broker.subscribe([get_session_channel('session-1')])
+    response = _call(mcp, 'count', progress_token=7, session_id='session-1')
+    assert json.loads(response.data)['result']['structuredContent'] == {'count': 3}
+
+    messages = []
+    deadline = time.monotonic() + 2
+    while len(messages) < 3 and time.monotonic() < deadline:
+        if (message := subscription.get(0.1)) is not None:
+            messages.append(message)
+    assert [m['params']['progress'] for m in messages] == [1, 2, 3]
+    assert all(m['params']['progressToken'] == 7 for m in messages)
+
+
+def test_progress_after_content(mcp):
+    @mcp.tool()
+    def export(ctx: Context):
+        """Exports rows."""
+        ctx.report_progress(0, 3)
+        for i in range(3):
+            ctx.send(f'row {i}')
+            ctx.report_progress(i + 1, 3)
+
+    subscription = mcp._broker.subscribe([get_session_channel('session-1')])
+    response = _call(
+        mcp,
+        'export',
+        progress_token='p1',
+        accept=SSE_ACCEPT,
+        session_id='session-1',
+    )
+    progress, result = get_sse_events(response)
+    assert progress['params']['progress'] == 0
+    assert [c['text'] for c in result['result']['content']] == [
+        'row 0',
+        'row 1',
+        'row 2',
+    ]
+
+    # Reported once the response event started, sent to the session's stream
+    messages = []
+    while (message := subscription.get(0.1)) is not None:
+        messages.append(message)
+    assert [m['params']['progress'] for m in messages] == [1, 2, 3]
+    assert all(m['params']['progressToken'] == 'p1' for m in messages)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from frappe_mcp.server import prompts, tools
+from frappe_mcp.server.registry import Registry
+
+
+def add(a: int, b: int):
+    """Adds two numbers."""
+    return a + b
+
+
+def greet(name: str):
+    """Greets someone."""
+    return []
+
+
+@pytest.fixture
+def registry() -> Registry[tools.Tool]:
+    registry = Registry('tools', tools.get_tool_description)
+    registry['add'] = tools.get_tool(add)
+    return registry
+
+
+def test_list_result(registry):
+    result = json.loads(bytes(registry.get_list_result()))
+    assert [t['name'] for t in result['tools']] == ['add']
+    assert result['tools'][0]['inputSchema']['required'] == ['a', 'b']
+    assert 'outputSchema' not in result['tools'][0]
+
+
+def test_list_result_is_cached(registry):
+    result = registry.get_list_result()
+    assert registry.get_list_result() is result
+
+
+def test_list_result_is_invalidated(registry):
+    result = registry.get_list_result()
+    version = registry.version
+
+    registry['add_again'] = tools.get_tool(add, tools.ToolOptions(name='add_again'))
+    assert registry.version > version
+    assert registry.get_list_result() is not result
+    names = [t['name'] for t in json.loads(bytes(registry.get_list_result()))['tools']]
+    assert names == ['add', 'add_again']
+
+    registry.move_to_end('add')
+    names = [t['name'] for t in json.loads(bytes(registry.get_list_result()))['tools']]
+    assert names == ['add_again', 'add']
+
+    del registry['add']
+    assert registry.pop('add_again')['name'] == 'add_again'
+    assert registry.pop('missing', None) is None
+    assert json.loads(bytes(registry.get_list_result())) == {'tools': []}
+
+
+def test_invalid_entry_is_rejected(registry):
+    tool = tools.get_tool(add)
+    tool['input_schema'] = 'not a schema'  # type: ignore[typeddict-item]
+
+    version = registry.version
+    with pytest.raises(ValueError, match="Invalid tool 'bad'"):
+        registry['bad'] = tool
+
+    assert 'bad' not in registry
+    assert registry.version == version
+
+
+def test_prompt_registry():
+    registry = Registry('prompts', prompts.get_prompt_description)
+    registry['greet'] = prompts.get_prompt(greet)
+
+    result = json.loads(bytes(registry.get_list_result()))
+    assert result == {
+        'prompts': [
+            {
+                'name': 'greet',
+                'description': 'Greets someone.',
+                'arguments': [{'name': 'name', 'required': True}],
+            }
+        ]
+    }
+
+
+def _get_pages(registry, page_size):
+    pages = [json.loads(bytes(registry.get_page(None, page_size)))]
+    while cursor := pages[-1].get('nextCursor'):
+        pages.append(json.loads(bytes(registry.get_page(cursor, page_size))))
+    return pages
+
+
+def test_pagination(registry):
+    for i in range(4):
+        registry[f'add_{i}'] = tools.get_tool(add, tools.ToolOptions(name=f'add_{i}'))
+
+    pages = _get_pages(registry, 2)
+    assert [[t['name'] for t in p['tools']] for p in pages] == [
+        ['add', 'add_0'],
+        ['add_1', 'add_2'],
+        ['add_3'],
+    ]
+    assert 'nextCursor' not in pages[-1]
+
+    assert len(_get_pages(registry, 5)) == 1
+
+
+def test_cursor_is_stateless(registry):
+    # E.g. the same tools registered in another worker
+    other = Registry('tools', tools.get_tool_description)
+    for r in (registry, other):
+        r['add'] = tools.get_tool(add)
+        r['add_0'] = tools.get_tool(add, tools.ToolOptions(name='add_0'))
+    assert other.get_digest() == registry.get_digest()
+
+    cursor = json.loads(bytes(registry.get_page(None, 1)))['nextCursor']
+    assert bytes(other.get_page(cursor, 1)) == bytes(registry.get_page(cursor, 1))
+
+
+def test_invalid_cursor(registry):
+    registry['add_0'] = tools.get_tool(add, tools.ToolOptions(name='add_0'))
+    cursor = json.loads(bytes(registry.get_page(None, 1)))['nextCursor']
+
+    for invalid in ['', 'not-a-cursor', cursor + 'x']:
+        with pytest.raises(ValueError, match='Invalid cursor'):
+            registry.get_page(invalid or 'x', 1)
+
+    registry['add_1'] = tools.get_tool(add, tools.ToolOptions(name='add_1'))
+    with pytest.raises(ValueError, match='the list has changed'):
+        registry.get_page(cursor, 1)
@@ -5,6 +5,7 @@ import pytest
 from werkzeug.wrappers import Request, Response
 
 from frappe_mcp.server import types
+from frappe_mcp.server.broker import CANCELLED
 from frappe_mcp.server.server import MCP
 
 
@@ -42,7 +43,9 @@ def mcp_with_prompts():
     @mcp.prompt()
     def no_args_prompt():
         """A prompt with no arguments."""
-        return [types.PromptMessage(role='user', content=types.TextContent(text='Hello'))]
+        return [
+            types.PromptMessage(role='user', content=types.TextContent(text='Hello'))
+        ]
 
     return mcp
 
@@ -155,7 +158,12 @@ def test_handle_call_tool_with_regular_content(mcp_instance):
 
 
 def _post(mcp, method, params=None, request_id=1):
-    data = {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params or {}}
+    data = {
+        'jsonrpc': '2.0',
+        'id': request_id,
+        'method': method,
+        'params': params or {},
+    }
     request = Request.from_values(
         method='POST',
         content_type='application/json',
@@ -164,6 +172,143 @@ def _post(mcp, method, params=None, request_id=1):
     return json.loads(mcp.handle(request, Response()).data)
 
 
+def test_list_tools_after_add_tool(mcp_instance):
+    assert len(_post(mcp_instance, 'tools/list')['result']['tools']) == 2
+
+    @mcp_instance.tool()
+    def multiplier(a: int, b: int):
+        """Multiplies two numbers."""
+        return a * b
+
+    tools = _post(mcp_instance, 'tools/list')['result']['tools']
+    assert [t['name'] for t in tools] == ['adder', 'subtractor', 'multiplier']
+
+
+def test_list_tools_paginated(mcp_instance):
+    mcp_instance._page_size = 1
+
+    data = _post(mcp_instance, 'tools/list')
+    assert [t['name'] for t in data['result']['tools']] == ['adder']
+    cursor = data['result']['nextCursor']
+
+    data = _post(mcp_instance, 'tools/list', {'cursor': cursor})
+    assert [t['name'] for t in data['result']['tools']] == ['subtractor']
+    assert 'nextCursor' not in data['result']
+
+    data = _post(mcp_instance, 'tools/list', {'cursor': 'invalid'})
+    assert data['error']['code'] == types.INVALID_PARAMS
+
+
+def test_list_prompts_paginated():
+    mcp = MCP(name='frappe-mcp', page_size=1)
+    for name in ('first', 'second'):
+        mcp.add_prompt(
+            {'name': name, 'description': None, 'arguments': None, 'fn': list}
+        )
+
+    data = _post(mcp, 'prompts/list')
+    assert [p['name'] for p in data['result']['prompts']] == ['first']
+
+    data = _post(mcp, 'prompts/list', {'cursor': data['result']['nextCursor']})
+    assert [p['name'] for p in data['result']['prompts']] == ['second']
+
+
+def test_add_invalid_tool(mcp_instance):
+    with pytest.raises(ValueError, match="Invalid tool 'invalid'"):
+        mcp_instance.add_tool(
+            {
+                'name': 'invalid',
+                'description': 'An invalid tool.',
+                'input_schema': {'type': 'object'},
+                'output_schema': None,
+                'annotations': {'title': ['not', 'a', 'string']},
+                'fn': lambda: None,
+            }
+        )
+
+    assert len(_post(mcp_instance, 'tools/list')['result']['tools']) == 2
+
+
+def test_setup_runs_entry_fn_once():
+    mcp = MCP(name='frappe-mcp')
+    calls = []
+
+    def entry():
+        calls.append(1)
+        mcp.add_prompt(
+            {'name': 'greet', 'description': None, 'arguments': None, 'fn': list}
+        )
+
+    mcp._mcp_entry_fn = entry
+    mcp.setup()
+    mcp.setup()
+    assert len(calls) == 1
+    assert [p['name'] for p in _post(mcp, 'prompts/list')['result']['prompts']] == [
+        'greet'
+    ]
+
+    with pytest.raises(RuntimeError):
+        mcp.add_prompt(
+            {'name': 'late', 'description': None, 'arguments': None, 'fn': list}
+        )
+
+    mcp.setup(reload=True)
+    assert len(calls) == 2
+    mcp.add_prompt({'name': 'late', 'description': None, 'arguments': None, 'fn': list})
+
+
+def test_setup_retries_after_error():
+    mcp = MCP(name='frappe-mcp')
+    calls = []
+
+    def entry():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ImportError('broken')
+
+    mcp._mcp_entry_fn = entry
+    with pytest.raises(ImportError):
+        mcp.setup()
+    mcp.setup()
+    assert len(calls) == 2
+
+
+def test_call_tool_invalid_arguments(mcp_instance):
+    data = _post(
+        mcp_instance, 'tools/call', {'name': 'adder', 'arguments': {'a': 'x', 'b': 1}}
+    )
+    assert data['error']['code'] == types.INVALID_PARAMS
+    assert data['error']['message'] == (
+        "Invalid arguments for tool 'adder': 'x' is not of type 'integer' (at $.a)"
+    )
+
+    data = _post(mcp_instance, 'tools/call', {'name': 'adder', 'arguments': {'a': 1}})
+    assert data['error']['code'] == types.INVALID_PARAMS
+    assert "'b' is a required property" in data['error']['message']
+
+
+def test_add_tool_compiles_validator(mcp_instance):
+    mcp_instance.add_tool(
+        {
+            'name': 'echo',
+            'description': 'Echoes a value.',
+            'input_schema': {
+                'type': 'object',
+                'properties': {'value': {'type': 'string'}},
+            },
+            'output_schema': None,
+            'annotations': None,
+            'fn': lambda value: value,
+        }
+    )
+    assert callable(mcp_instance._tool_registry['echo']['validator'])
+
+    data = _post(
+        mcp_instance, 'tools/call', {'name': 'echo', 'arguments': {'value': 1}}
+    )
+    assert data['error']['code'] == types.INVALID_PARAMS
+
+
 def test_initialize_has_prompts_capability(mcp_instance):
     result = _post(mcp_instance, 'initialize', {'clientInfo': {'name': 'test'}})
     assert 'prompts' in result['result']['capabilities']
@@ -191,7 +336,11 @@ def test_handle_list_prompts_arguments(mcp_with_prompts):
 
 
 def test_handle_get_prompt(mcp_with_prompts):
-    result = _post(mcp_with_prompts, 'prompts/get', {'name': 'summarize', 'arguments': {'topic': 'Python'}})
+    result = _post(
+        mcp_with_prompts,
+        'prompts/get',
+        {'name': 'summarize', 'arguments': {'topic': 'Python'}},
+    )
     messages = result['result']['messages']
     assert len(messages) == 1
     assert messages[0]['role'] == 'user'
@@ -199,7 +348,11 @@ def test_handle_get_prompt(mcp_with_prompts):
 
 
 def test_handle_get_prompt_default_arg(mcp_with_prompts):
-    result = _post(mcp_with_prompts, 'prompts/get', {'name': 'summarize', 'arguments': {'topic': 'Go', 'language': 'french'}})
+    result = _post(
+        mcp_with_prompts,
+        'prompts/get',
+        {'name': 'summarize', 'arguments': {'topic': 'Go', 'language': 'french'}},
+    )
     assert 'french' in result['result']['messages'][0]['content']['text']
 
 
@@ -229,3 +382,467 @@ def test_handler_exception_returns_internal_error(mcp_instance):
 
     result = _post(mcp_instance, 'tools/call', {'name': 'boom', 'arguments': {}})
     assert result['result']['isError'] is True
+
+
+def _post_batch(mcp, batch):
+    request = Request.from_values(
+        method='POST',
+        content_type='application/json',
+        input_stream=io.BytesIO(json.dumps(batch).encode('utf-8')),
+    )
+    return mcp.handle(request, Response())
+
+
+def test_handle_batch(mcp_instance):
+    batch = [
+        {
+            'jsonrpc': '2.0',
+            'id': 1,
+            'method': 'tools/call',
+            'params': {'name': 'adder', 'arguments': {'a': 1, 'b': 2}},
+        },
+        {'jsonrpc': '2.0', 'method': 'notifications/initialized'},
+        {
+            'jsonrpc': '2.0',
+            'id': 2,
+            'method': 'tools/call',
+            'params': {'name': 'subtractor', 'arguments': {'a': 5, 'b': 2}},
+        },
+        {'jsonrpc': '2.0', 'id': 3, 'method': 'foo/bar'},
+    ]
+    response = _post_batch(mcp_instance, batch)
+
+    assert response.status_code == 200
+    response_data = json.loads(response.data)
+    assert [r['id'] for r in response_data] == [1, 2, 3]
+    assert response_data[0]['result']['structuredContent'] == {'output': 3}
+    assert response_data[1]['result']['content'] == [{'type': 'text', 'text': '3'}]
+    assert response_data[2]['error']['code'] == types.METHOD_NOT_FOUND
+
+
+def test_handle_batch_runs_concurrently():
+    import threading
+
+    mcp = MCP(name='frappe-mcp', batch_workers=4)
+    barrier = threading.Barrier(3, timeout=5)
+
+    @mcp.tool()
+    def wait():
+        """Returns once all batch entries are running."""
+        return barrier.wait()
+
+    batch = [
+        {'jsonrpc': '2.0', 'id': i, 'method': 'tools/call', 'params': {'name': 'wait'}}
+        for i in range(3)
+    ]
+    response_data = json.loads(_post_batch(mcp, batch).data)
+    assert all(r['result']['isError'] is False for r in response_data)
+
+
+def test_handle_batch_sequential_tools():
+    import threading
+
+    mcp = MCP(name='frappe-mcp', batch_workers=4)
+    thread_names = []
+
+    @mcp.tool(thread_safe=False)
+    def unsafe():
+        """Not thread safe."""
+        thread_names.append(threading.current_thread().name)
+        return 'ok'
+
+    batch = [
+        {
+            'jsonrpc': '2.0',
+            'id': i,
+            'method': 'tools/call',
+            'params': {'name': 'unsafe'},
+        }
+        for i in range(3)
+    ]
+    response_data = json.loads(_post_batch(mcp, batch).data)
+    assert [r['id'] for r in response_data] == [0, 1, 2]
+    assert thread_names == [threading.current_thread().name] * 3
+
+
+class _Connection:
+    """Stands in for a database connection, fails if used concurrently."""
+
+    def __init__(self):
+        import threading
+
+        self.lock = threading.Lock()
+        self.committed = False
+        self.closed = False
+
+    def sql(self):
+        import time
+
+        assert self.lock.acquire(blocking=False), 'connection used concurrently'
+        time.sleep(0.05)
+        self.lock.release()
+        return id(self)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def _get_fake_frappe():
+    import types as pytypes
+
+    from werkzeug.local import Local, release_local
+
+    frappe = pytypes.ModuleType('frappe')
+    frappe.local = Local()
+    frappe.db = frappe.local('db')
+    frappe.connections = []
+
+    def init(site, sites_path='.'):
+        frappe.local.site = site
+        frappe.local.sites_path = sites_path
+
+    def connect():
+        frappe.local.db = _Connection()
+        frappe.connections.append(frappe.local.db)
+
+    def set_user(user):
+        frappe.local.session = pytypes.SimpleNamespace(user=user)
+
+    def destroy():
+        frappe.local.db.close()
+        release_local(frappe.local)
+
+    frappe.init = init
+    frappe.connect = connect
+    frappe.set_user = set_user
+    frappe.destroy = destroy
+    return frappe
+
+
+def test_handle_batch_connection_per_entry(monkeypatch):
+    import sys
+
+    frappe = _get_fake_frappe()
+    monkeypatch.setitem(sys.modules, 'frappe', frappe)
+    frappe.init('test.localhost', './sites')
+    frappe.connect()
+    frappe.set_user('test@example.com')
+    request_db = frappe.local.db
+
+    mcp = MCP(name='frappe-mcp', batch_workers=4)
+
+    @mcp.tool()
+    def get_count():
+        """Queries the database."""
+        assert frappe.local.session.user == 'test@example.com'
+        return frappe.db.sql()
+
+    batch = [
+        {
+            'jsonrpc': '2.0',
+            'id': i,
+            'method': 'tools/call',
+            'params': {'name': 'get_count'},
+        }
+        for i in range(4)
+    ]
+    response_data = json.loads(_post_batch(mcp, batch).data)
+    assert all(r['result']['isError'] is False for r in response_data)
+
+    # Each entry used, committed and closed a connection of its own
+    used = {r['result']['content'][0]['text'] for r in response_data}
+    assert len(used) == 4
+    assert str(id(request_db)) not in used
+    assert all(c.committed and c.closed for c in frappe.connections[1:])
+    assert frappe.local.db is request_db and not request_db.closed
+
+
+def test_handle_batch_invalid(mcp_instance):
+    response = _post_batch(mcp_instance, [])
+    assert response.status_code == 400
+    assert json.loads(response.data)['error']['code'] == types.INVALID_REQUEST
+
+    response_data = json.loads(_post_batch(mcp_instance, [1, {'jsonrpc': '2.0'}]).data)
+    assert [r['error']['code'] for r in response_data] == [types.INVALID_REQUEST] * 2
+
+
+def test_handle_batch_of_notifications(mcp_instance):
+    response = _post_batch(
+        mcp_instance, [{'jsonrpc': '2.0', 'method': 'notifications/initialized'}]
+    )
+    assert response.status_code == 202
+    assert not response.data
+
+
+def _post_sse(mcp, method, params=None, request_id=1):
+    data = {
+        'jsonrpc': '2.0',
+        'id': request_id,
+        'method': method,
+        'params': params or {},
+    }
+    request = Request.from_values(
+        method='POST',
+        content_type='application/json',
+        headers={'Accept': 'application/json, text/event-stream'},
+        input_stream=io.BytesIO(json.dumps(data).encode('utf-8')),
+    )
+    return mcp.handle(request, Response())
+
+
+def _get_sse_messages(body: str) -> list[dict]:
+    messages = []
+    for event in body.split('\n\n'):
+        lines = [
+            line[len('data: ') :]
+            for line in event.split('\n')
+            if line.startswith('data: ')
+        ]
+        if lines:
+            messages.append(json.loads('\n'.join(lines)))
+    return messages
+
+
+@pytest.fixture
+def mcp_with_streaming_tools():
+    from frappe_mcp.server.context import Context
+
+    mcp = MCP(name='frappe-mcp')
+
+    @mcp.tool()
+    def rows(count: int):
+        """Yields rows."""
+        for i in range(count):
+            yield {'row': i}
+
+    @mcp.tool()
+    def sender(count: int, ctx: Context):
+        """Sends rows through the context."""
+        for i in range(count):
+            ctx.send(f'row {i}')
+        return 'done'
+
+    @mcp.tool()
+    def failing():
+        """Fails after the first row."""
+        yield 'first'
+        raise RuntimeError('broken')
+
+    return mcp
+
+
+def test_call_generator_tool_streams_sse(mcp_with_streaming_tools):
+    response = _post_sse(
+        mcp_with_streaming_tools,
+        'tools/call',
+        {'name': 'rows', 'arguments': {'count': 3}},
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.is_streamed
+
+    chunks = list(response.iter_encoded())
+    assert len(chunks) == 5
+
+    messages = _get_sse_messages(b''.join(chunks).decode())
+    assert len(messages) == 1
+    assert messages[0]['id'] == 1
+    assert messages[0]['result']['isError'] is False
+    assert [c['text'] for c in messages[0]['result']['content']] == [
+        '{"row":0}',
+        '{"row":1}',
+        '{"row":2}',
+    ]
+
+
+def test_call_context_tool_streams_sse(mcp_with_streaming_tools):
+    response = _post_sse(
+        mcp_with_streaming_tools,
+        'tools/call',
+        {'name': 'sender', 'arguments': {'count': 2}},
+    )
+
+    messages = _get_sse_messages(response.get_data(as_text=True))
+    texts = [c['text'] for c in messages[0]['result']['content']]
+    assert texts == ['row 0', 'row 1', 'done']
+
+
+def test_call_streaming_tool_error(mcp_with_streaming_tools):
+    response = _post_sse(mcp_with_streaming_tools, 'tools/call', {'name': 'failing'})
+
+    result = _get_sse_messages(response.get_data(as_text=True))[0]['result']
+    assert result['isError'] is True
+    assert result['content'][0]['text'] == 'first'
+    assert 'broken' in result['content'][1]['text']
+
+
+def test_call_streaming_tool_without_sse(mcp_with_streaming_tools):
+    result = _post(
+        mcp_with_streaming_tools,
+        'tools/call',
+        {'name': 'sender', 'arguments': {'count': 2}},
+    )
+    assert [c['text'] for c in result['result']['content']] == [
+        'row 0',
+        'row 1',
+        'done',
+    ]
+
+    result = _post(
+        mcp_with_streaming_tools,
+        'tools/call',
+        {'name': 'rows', 'arguments': {'count': 2}},
+    )
+    assert len(result['result']['content']) == 2
+
+
+def test_call_regular_tool_with_sse(mcp_instance):
+    response = _post_sse(
+        mcp_instance, 'tools/call', {'name': 'adder', 'arguments': {'a': 1, 'b': 2}}
+    )
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.data)['result']['structuredContent'] == {'output': 3}
+
+
+def _get(mcp, headers=None):
+    request = Request.from_values(
+        method='GET',
+        headers={'Accept': 'text/event-stream', **(headers or {})},
+    )
+    return mcp.handle(request, Response())
+
+
+def test_get_sse_stream():
+    mcp = MCP(name='frappe-mcp', sse_heartbeat=0.01, sse_max_duration=5)
+    response = _get(mcp, {'Mcp-Session-Id': 'session-a'})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+
+    body = response.iter_encoded()
+    assert next(body) == b': stream opened\n\n'
+    assert next(body) == b': ping\n\n'
+
+    mcp.send_notification('notifications/tools/list_changed')
+    mcp.send_notification(
+        'notifications/message', {'level': 'info', 'data': 'a'}, session_id='session-a'
+    )
+    mcp.send_notification(
+        'notifications/message', {'level': 'info', 'data': 'b'}, session_id='session-b'
+    )
+
+    messages = _get_sse_messages(b''.join([next(body), next(body)]).decode())
+    assert [m['method'] for m in messages] == [
+        'notifications/tools/list_changed',
+        'notifications/message',
+    ]
+    assert messages[1]['params']['data'] == 'a'
+
+    response.close()
+    assert mcp._sse_streams == 0
+
+
+def test_session_cannot_join_server_channels():
+    mcp = MCP(name='frappe-mcp', sse_heartbeat=0.01, sse_max_duration=5)
+    response = _get(mcp, {'Mcp-Session-Id': CANCELLED})
+    body = response.iter_encoded()
+    assert next(body) == b': stream opened\n\n'
+
+    mcp._broker.publish(CANCELLED, {'sessionId': None, 'requestId': 1})
+    assert next(body) == b': ping\n\n'
+    response.close()
+
+    for session_id in ('', 'a b', 'caf\u00e9', 'a' * 257):
+        response = _get(mcp, {'Mcp-Session-Id': session_id})
+        assert response.status_code == 400
+        assert json.loads(response.data)['error']['code'] == types.INVALID_REQUEST
+
+
+def test_get_sse_stream_limits():
+    mcp = MCP(name='frappe-mcp', sse_max_streams=1)
+
+    response = _get(mcp)
+    assert response.status_code == 200
+    assert _get(mcp).status_code == 503
+
+    response.close()
+    assert _get(mcp).status_code == 200
+
+
+def test_get_requires_sse_accept(mcp_instance):
+    request = Request.from_values(method='GET', headers={'Accept': 'application/json'})
+    assert mcp_instance.handle(request, Response()).status_code == 406
+
+
+def test_get_sse_stream_closes_after_max_duration():
+    mcp = MCP(name='frappe-mcp', sse_heartbeat=0.01, sse_max_duration=0.05)
+    response = _get(mcp)
+    chunks = list(response.iter_encoded())
+    assert chunks[0] == b': stream opened\n\n'
+    assert set(chunks[1:]) == {b': ping\n\n'}
+
+
+def test_parse_error(mcp_instance):
+    request = Request.from_values(
+        method='POST',
+        content_type='application/json',
+        input_stream=io.BytesIO(b'{"jsonrpc": "2.0", "id": 1,'),
+    )
+    response = mcp_instance.handle(request, Response())
+    assert response.status_code == 400
+    response_data = json.loads(response.data)
+    assert response_data['id'] is None
+    assert response_data['error']['code'] == types.PARSE_ERROR
+
+
+def test_success_response_is_written_in_chunks(mcp_instance):
+    data = {
+        'jsonrpc': '2.0',
+        'id': 'a',
+        'method': 'tools/call',
+        'params': {'name': 'adder', 'arguments': {'a': 1, 'b': 2}},
+    }
+    request = Request.from_values(
+        method='POST',
+        content_type='application/json',
+        input_stream=io.BytesIO(json.dumps(data).encode('utf-8')),
+    )
+    response = mcp_instance.handle(request, Response())
+
+    assert not response.is_streamed
+    assert len(response.response) > 1
+    assert response.content_length == len(response.get_data())
+    assert json.loads(response.get_data()) == {
+        'jsonrpc': '2.0',
+        'id': 'a',
+        'result': {
+            'content': [{'type': 'text', 'text': '{"output":3}'}],
+            'structuredContent': {'output': 3},
+            'isError': False,
+        },
+    }
+
+
+def test_get_success_response():
+    from frappe_mcp.server.codec import RawJSON
+    from frappe_mcp.server.server import get_success_response
+
+    result = types.CallToolResult(content=[types.TextContent(text='x')])
+    assert bytes(get_success_response(1, result)) == (
+        b'{"jsonrpc":"2.0","id":1,"result":{"content":[{"type":"text","text":"x"}]}}'
+    )
+    assert bytes(get_success_response('a', RawJSON(b'{"a":', b'1}'))) == (
+        b'{"jsonrpc":"2.0","id":"a","result":{"a":1}}'
+    )
+    assert json.loads(bytes(get_success_response(2, {'b': None}))) == {
+        'jsonrpc': '2.0',
+        'id': 2,
+        'result': {'b': None},
+    }
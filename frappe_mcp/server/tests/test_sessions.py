@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import time
+
+from werkzeug.wrappers import Request, Response
+
+from frappe_mcp.server import types
+from frappe_mcp.server.context import Context
+from frappe_mcp.server.server import MCP
+from frappe_mcp.server.sessions import MemorySessionStore, SQLiteSessionStore
+from frappe_mcp.server.tests.helpers import call_tool, get_request, post
+
+
+def _post(mcp, method, params=None, session_id=None) -> Response:
+    return post(mcp, get_request(method, params), session_id=session_id)
+
+
+def _initialize(mcp, version='2025-06-18') -> str:
+    params = {
+        'protocolVersion': version,
+        'clientInfo': {'name': 'inspector', 'version': '1.0'},
+        'capabilities': {'roots': {}},
+    }
+    response = _post(mcp, 'initialize', params)
+    assert response.status_code == 200
+    return response.headers['Mcp-Session-Id']
+
+
+def _get_mcp(store=None) -> MCP:
+    mcp = MCP(name='frappe-mcp', session_store=store or MemorySessionStore())
+
+    @mcp.tool()
+    def whoami(ctx: Context):
+        """Returns the session id."""
+        return ctx.session_id
+
+    @mcp.tool()
+    def get_totals():
+        """Returns totals."""
+        return {'total': 3}
+
+    @mcp.resource('frappe://doc/{doctype}/{name}')
+    def get_doc(doctype: str, name: str):
+        return name
+
+    return mcp
+
+
+def test_session_issued():
+    mcp = _get_mcp()
+    session_id = _initialize(mcp)
+    assert len(session_id) >= 32
+
+    result = call_tool(mcp, 'whoami', session_id=session_id)['result']
+    assert result['content'][0]['text'] == session_id
+
+    session = mcp.get_session(session_id)
+    assert session is not None
+    assert session['protocolVersion'] == '2025-06-18'
+    assert session['clientInfo'] == {'name': 'inspector', 'version': '1.0'}
+
+
+def test_unknown_session():
+    mcp = _get_mcp()
+    response = _post(mcp, 'ping', session_id='unknown')
+    assert response.status_code == 404
+    assert json.loads(response.data)['error']['code'] == types.INVALID_REQUEST
+
+    request = Request.from_values(
+        method='GET',
+        headers={'Accept': 'text/event-stream', 'Mcp-Session-Id': 'unknown'},
+    )
+    assert mcp.handle(request, Response()).status_code == 404
+
+    # Requests without a session are handled, and initialize ignores the header
+    assert _post(mcp, 'ping').status_code == 200
+    response = _post(mcp, 'initialize', session_id='unknown')
+    assert response.headers['Mcp-Session-Id'] != 'unknown'
+
+
+def test_initialize_in_batch_rejected():
+    mcp = _get_mcp()
+    batch = [
+        get_request('initialize', {'protocolVersion': '2025-06-18'}),
+        get_request('ping', request_id=2),
+    ]
+    response = post(mcp, batch)
+    assert 'Mcp-Session-Id' not in response.headers
+
+    initialize, ping = json.loads(response.data)
+    assert initialize['id'] == 1
+    assert initialize['error']['code'] == types.INVALID_REQUEST
+    assert ping == {'jsonrpc': '2.0', 'id': 2, 'result': {}}
+
+
+def test_delete():
+    mcp = _get_mcp()
+    session_id = _initialize(mcp)
+    params = {'uri': 'frappe://doc/ToDo/'}
+    _post(mcp, 'resources/subscribe', params, session_id)
+    assert mcp._subscriptions
+
+    request = Request.from_values(
+        method='DELETE', headers={'Mcp-Session-Id': session_id}
+    )
+    assert mcp.handle(request, Response()).status_code == 204
+    assert not mcp._subscriptions
+    assert mcp.handle(request, Response()).status_code == 404
+    assert _post(mcp, 'ping', session_id=session_id).status_code == 404
+
+
+def test_stateless_by_default():
+    mcp = MCP(name='frappe-mcp')
+    response = _post(mcp, 'initialize', {'protocolVersion': '2025-06-18'})
+    assert 'Mcp-Session-Id' not in response.headers
+    assert _post(mcp, 'ping', session_id='any').status_code == 200
+
+    request = Request.from_values(method='DELETE', headers={'Mcp-Session-Id': 'any'})
+    assert mcp.handle(request, Response()).status_code == 405
+
+
+def test_protocol_version_from_session():
+    mcp = _get_mcp()
+    mcp._structured_text = 'none'
+
+    # Clients before structured content always get the JSON as text
+    session_id = _initialize(mcp, '2025-03-26')
+    content = call_tool(mcp, 'get_totals', session_id=session_id)['result']['content']
+    assert json.loads(content[0]['text']) == {'total': 3}
+
+    session_id = _initialize(mcp, '2025-06-18')
+    result = call_tool(mcp, 'get_totals', session_id=session_id)['result']
+    assert result['content'] == []
+
+
+def test_memory_store():
+    store = MemorySessionStore(ttl=0.1, max_sessions=2)
+    store.set('a', {'protocolVersion': '2025-06-18'})
+    store.set('b', {'protocolVersion': '2025-06-18'})
+    assert store.get('a') is not None
+    store.set('c', {'protocolVersion': '2025-06-18'})
+
+    # The least recently used session is evicted
+    assert store.get('b') is None
+    assert store.get('a') is not None
+
+    time.sleep(0.15)
+    assert store.get('a') is None
+    assert store.get('c') is None
+
+
+def test_peek_does_not_extend(tmp_path):
+    for store in (
+        MemorySessionStore(ttl=0.2),
+        SQLiteSessionStore(tmp_path / 's.db', ttl=0.2),
+    ):
+        store.set('a', {'protocolVersion': '2025-06-18'})
+        assert store.peek('a') == {'protocolVersion': '2025-06-18'}
+        assert store.peek('b') is None
+
+        time.sleep(0.12)
+        assert store.peek('a') is not None
+        time.sleep(0.12)
+        assert store.peek('a') is None
+        assert store.get('a') is None
+
+
+def test_expired_session_unsubscribed():
+    store = MemorySessionStore()
+    mcp = _get_mcp(store)
+    session_id = _initialize(mcp)
+    params = {'uri': 'frappe://doc/ToDo/'}
+    _post(mcp, 'resources/subscribe', params, session_id)
+    assert mcp._subscriptions
+
+    # Evicted from the store without a DELETE
+    store.delete(session_id)
+    mcp.notify_resource_updated('frappe://doc/ToDo/TD-1')
+    mcp._subscriptions.flush()
+    assert not mcp._subscriptions
+
+
+def test_sqlite_store_shared(tmp_path):
+    # Each MCP instance stands in for a worker process
+    path = tmp_path / 'sessions.db'
+    first = _get_mcp(SQLiteSessionStore(path, ttl=0.2))
+    second = _get_mcp(SQLiteSessionStore(path, ttl=0.2))
+
+    session_id = _initialize(first)
+    result = call_tool(second, 'whoami', session_id=session_id)['result']
+    assert result['content'][0]['text'] == session_id
+
+    # Idle sessions expire
+    time.sleep(0.25)
+    response = _post(second, 'ping', session_id=session_id)
+    assert response.status_code == 404
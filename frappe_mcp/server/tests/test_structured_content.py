@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+from typing import TypedDict
+
+import pytest
+
+from frappe_mcp.server.cache import ResultCache
+from frappe_mcp.server.context import Context
+from frappe_mcp.server.server import MCP
+from frappe_mcp.server.tests.helpers import (
+    SSE_ACCEPT,
+    call_tool,
+    get_sse_events,
+    get_tool_call,
+    post,
+    request,
+)
+
+
+class Totals(TypedDict):
+    count: int
+    amount: float
+
+
+def _call(mcp, name, *, version=None):
+    return call_tool(mcp, name, version=version)['result']
+
+
+def _get_mcp(structured_text='json', result_cache=None):
+    mcp = MCP(
+        name='frappe-mcp',
+        structured_text=structured_text,
+        result_cache=result_cache,
+    )
+
+    @mcp.tool(cache=True)
+    def get_totals() -> Totals:
+        """Get the totals."""
+        return {'count': 2, 'amount': 10.5}
+
+    @mcp.tool()
+    def export_totals(ctx: Context) -> Totals:
+        """Get the totals after some work."""
+        return {'count': 2, 'amount': 10.5}
+
+    return mcp
+
+
+@pytest.mark.parametrize(
+    'requested, expected',
+    [
+        ('2025-06-18', '2025-06-18'),
+        ('2025-03-26', '2025-03-26'),
+        ('2099-01-01', '2025-06-18'),
+    ],
+)
+def test_protocol_version_negotiation(requested, expected):
+    params = {'protocolVersion': requested, 'clientInfo': {'name': 'test'}}
+    result = request(_get_mcp(), 'initialize', params)['result']
+    assert result['protocolVersion'] == expected
+
+
+def test_output_schema_listed():
+    [tool, _] = request(_get_mcp(), 'tools/list')['result']['tools']
+    assert tool['outputSchema'] == {
+        'type': 'object',
+        'properties': {'count': {'type': 'integer'}, 'amount': {'type': 'number'}},
+        'required': ['count', 'amount'],
+    }
+
+
+def test_structured_text_json():
+    result = _call(_get_mcp('none'), 'get_totals')
+    # Older clients always get the JSON
+    assert json.loads(result['content'][0]['text']) == {'count': 2, 'amount': 10.5}
+    assert result['structuredContent'] == {'count': 2, 'amount': 10.5}
+
+
+def test_structured_text_none():
+    result = _call(_get_mcp('none'), 'get_totals', version='2025-06-18')
+    assert result['content'] == []
+    assert result['structuredContent'] == {'count': 2, 'amount': 10.5}
+
+
+def test_structured_text_summary():
+    result = _call(_get_mcp('summary'), 'get_totals', version='2025-06-18')
+    assert result['content'] == [
+        {'type': 'text', 'text': 'Structured result with keys: count, amount'}
+    ]
+    assert result['structuredContent'] == {'count': 2, 'amount': 10.5}
+
+
+def test_structured_text_stream():
+    response = post(
+        _get_mcp('none'),
+        get_tool_call('export_totals'),
+        version='2025-06-18',
+        accept=SSE_ACCEPT,
+    )
+    assert response.mimetype == 'text/event-stream'
+    [event] = get_sse_events(response)
+    result = event['result']
+    assert result['content'] == []
+    assert result['structuredContent'] == {'count': 2, 'amount': 10.5}
+
+
+def test_structured_text_cached_separately():
+    mcp = _get_mcp('none', result_cache=ResultCache())
+    assert _call(mcp, 'get_totals', version='2025-06-18')['content'] == []
+    assert _call(mcp, 'get_totals')['content'] != []
+    assert _call(mcp, 'get_totals', version='2025-06-18')['content'] == []
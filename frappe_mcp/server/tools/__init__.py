@@ -1,26 +1,49 @@
 from __future__ import annotations
 
 from collections.abc import Callable
-from inspect import getdoc
-from typing import Any, TypedDict
+from inspect import getdoc, isasyncgenfunction, iscoroutine, isgeneratorfunction
+from typing import Any, Literal, TypedDict
 
-from jsonschema import validate
-
-from frappe_mcp.server.tools.handlers import handle_call_tool, handle_list_tools
-from frappe_mcp.server.tools.tool_schema import get_descriptions, get_input_schema
+from frappe_mcp.server import loop
+from frappe_mcp.server.context import Context
+from frappe_mcp.server.process import (
+    get_function_path,
+    import_function,
+    parse_function_path,
+)
+from frappe_mcp.server.registry import loading
+from frappe_mcp.server.tools.handlers import (
+    get_tool_description,
+    handle_call_tool,
+    handle_list_tools,
+)
+from frappe_mcp.server.tools.stream import ToolStream
+from frappe_mcp.server.tools.tool_schema import (
+    get_context_param,
+    get_descriptions,
+    get_input_schema,
+    get_output_schema,
+)
+from frappe_mcp.server.tools.validator import Validator, compile_validator
 
 __all__ = [
-    "Tool",
-    "ToolAnnotations",
-    "ToolOptions",
-    "get_tool",
-    "handle_call_tool",
-    "handle_list_tools",
-    "run_tool",
+    'StructuredText',
+    'Tool',
+    'ToolAnnotations',
+    'ToolOptions',
+    'ToolStream',
+    'get_lazy_tool',
+    'get_tool',
+    'get_tool_description',
+    'get_validator',
+    'handle_call_tool',
+    'handle_list_tools',
+    'load_tool',
+    'run_tool',
 ]
 
 
-class Tool(TypedDict):
+class _ToolRequired(TypedDict):
     name: str
     description: str
     input_schema: dict[str, Any]
@@ -29,6 +52,47 @@ class Tool(TypedDict):
     fn: Callable
 
 
+class Tool(_ToolRequired, total=False):
+    # If False, calls to the tool are never run concurrently with other
+    # entries of a JSON-RPC batch. Defaults to True.
+    thread_safe: bool
+    # If True, results are streamed as SSE events to clients that accept
+    # them. Defaults to True for (async) generator functions and tools that
+    # take a `Context`.
+    stream: bool
+    # Name of the parameter the `Context` is passed as, if any.
+    context_param: str | None
+    # Validates arguments against `input_schema`, compiled when the tool is
+    # created or registered.
+    validator: Validator
+    # If True, or the number of seconds, results are cached when the server
+    # has a result cache. Defaults to caching tools annotated as read only or
+    # idempotent.
+    cache: bool | float | None
+    # Seconds after which a call to the tool is stopped, overrides the
+    # server's `tool_timeout`.
+    timeout: float | None
+    # Where calls are run, 'process' runs them in the server's process pool.
+    # Defaults to 'thread'.
+    executor: Literal['thread', 'process']
+    # Maximum number of concurrent calls to the tool, unlimited by default.
+    concurrency: int | None
+    # Tags the server's per tag concurrency limits apply to.
+    tags: list[str] | None
+    # Seconds a call waits for a free slot when the tool or one of its tags
+    # is at its limit, overrides the server's `queue_timeout`.
+    queue_timeout: float | None
+    # Import path of the function of a lazy tool, e.g.
+    # 'app.tools.reports:monthly_report'. `fn` is None until the function is
+    # imported on the first call, see `load_tool`.
+    path: str
+
+
+# Text content sent along with the structured content of dict results, see
+# `handlers.get_structured_text`.
+StructuredText = Literal['json', 'summary', 'none']
+
+
 class ToolAnnotations(TypedDict, total=False):
     title: str | None
     readOnlyHint: bool | None
@@ -41,8 +105,17 @@ class ToolOptions(TypedDict, total=False):
     name: str | None
     description: str | None
     input_schema: dict | None
+    output_schema: dict | None
     use_entire_docstring: bool
     annotations: ToolAnnotations | None
+    thread_safe: bool
+    stream: bool | None
+    cache: bool | float | None
+    timeout: float | None
+    executor: Literal['thread', 'process']
+    concurrency: int | None
+    tags: list[str] | None
+    queue_timeout: float | None
 
 
 def get_tool(fn: Callable, options: ToolOptions | None = None):
@@ -55,34 +128,154 @@ def get_tool(fn: Callable, options: ToolOptions | None = None):
             annotations=None,
         )
 
-    name = options.get("name") or fn.__name__
-    description = options.get("description") or getdoc(fn) or ""
-    input_schema = options.get("input_schema")
+    name = options.get('name') or fn.__name__
+    description = options.get('description') or getdoc(fn) or ''
+    input_schema = options.get('input_schema')
 
     _description, args = get_descriptions(description)
-    if not options.get("use_entire_docstring") and description:
+    if not options.get('use_entire_docstring') and description:
         description = _description
 
     _input_schema = get_input_schema(fn)
-    for schema_key, schema_value in _input_schema["properties"].items():
+    for schema_key, schema_value in _input_schema['properties'].items():
         if schema_key not in args:
             continue
-        schema_value["description"] = args[schema_key]
+        schema_value['description'] = args[schema_key]
     input_schema = input_schema or _input_schema
 
+    context_param = get_context_param(fn)
+    stream = options.get('stream')
+    executor = options.get('executor', 'thread')
+    if executor == 'process':
+        if context_param is not None:
+            raise ValueError(
+                f"Tool '{name}' takes a Context and can't run in a process"
+            )
+        # Raises if the function can't be imported by the worker
+        get_function_path(fn)
+        stream = False
+    elif stream is None:
+        stream = (
+            isgeneratorfunction(fn)
+            or isasyncgenfunction(fn)
+            or context_param is not None
+        )
+
     tool = Tool(
         fn=fn,
         name=name,
         description=description,
         input_schema=input_schema,
-        output_schema=None,
-        annotations=options.get("annotations"),
+        output_schema=options.get('output_schema') or get_output_schema(fn),
+        annotations=options.get('annotations'),
+        thread_safe=options.get('thread_safe', True),
+        stream=stream,
+        context_param=context_param,
+        validator=compile_validator(input_schema),
+        cache=options.get('cache'),
+        timeout=options.get('timeout'),
+        executor=executor,
+        concurrency=options.get('concurrency'),
+        tags=options.get('tags'),
+        queue_timeout=options.get('queue_timeout'),
     )
     return tool
 
 
+def get_lazy_tool(path: str, options: ToolOptions) -> Tool:
+    """Returns a tool for the function at the import path `path` without
+    importing it.
+
+    The tool can be listed right away, its function is imported and inspected
+    when the tool is first called. As neither can be read from the function,
+    the `input_schema` must be passed and the description defaults to empty.
+    The name defaults to the function's name.
+
+    Raises:
+        ValueError: If the path is invalid or no input schema is passed.
+    """
+    _, qualname = parse_function_path(path)
+    input_schema = options.get('input_schema')
+    if input_schema is None:
+        raise ValueError(f"Lazy tool '{path}' needs an input_schema")
+
+    tool = Tool(
+        fn=None,  # type: ignore[typeddict-item]
+        name=options.get('name') or qualname.rpartition('.')[2],
+        description=options.get('description') or '',
+        input_schema=input_schema,
+        output_schema=options.get('output_schema'),
+        annotations=options.get('annotations'),
+        thread_safe=options.get('thread_safe', True),
+        validator=compile_validator(input_schema),
+        cache=options.get('cache'),
+        timeout=options.get('timeout'),
+        executor=options.get('executor', 'thread'),
+        concurrency=options.get('concurrency'),
+        tags=options.get('tags'),
+        queue_timeout=options.get('queue_timeout'),
+        path=path,
+    )
+    if (stream := options.get('stream')) is not None:
+        tool['stream'] = stream
+    return tool
+
+
+def load_tool(tool: Tool) -> Tool:
+    """Imports the function of a lazy tool, if not yet imported, and sets the
+    keys that are inferred from it.
+
+    Raises:
+        ImportError, AttributeError: If the function can't be imported.
+        ValueError: If the function can't be run with the tool's executor.
+    """
+    if tool.get('fn') is not None:
+        return tool
+
+    with loading():
+        if tool.get('fn') is not None:
+            return tool
+
+        fn = import_function(*parse_function_path(tool['path']))
+        if 'context_param' in tool:
+            # Inferred when the manifest was compiled
+            tool['fn'] = fn
+            return tool
+
+        context_param = get_context_param(fn)
+        if tool.get('executor') == 'process':
+            if context_param is not None:
+                raise ValueError(
+                    f"Tool '{tool['name']}' takes a Context and can't run in a process"
+                )
+            tool['stream'] = False
+        elif tool.get('stream') is None:
+            tool['stream'] = (
+                isgeneratorfunction(fn)
+                or isasyncgenfunction(fn)
+                or context_param is not None
+            )
+        tool['context_param'] = context_param
+        # Set last, a tool with a function is loaded
+        tool['fn'] = fn
+    return tool
+
+
+def get_validator(tool: Tool) -> Validator:
+    """Returns the tool's compiled validator, compiling it if not yet done."""
+    if (validator := tool.get('validator')) is None:
+        validator = tool['validator'] = compile_validator(tool['input_schema'])
+    return validator
+
+
 def run_tool(tool: Tool, arguments: dict[str, Any]):
-    validate(instance=arguments, schema=tool["input_schema"])
-    properties = tool["input_schema"]["properties"]
+    load_tool(tool)
+    get_validator(tool)(arguments)
+    properties = tool['input_schema']['properties']
     tool_args = {key: arguments[key] for key in arguments if key in properties}
-    return tool["fn"](**tool_args)
+    if context_param := tool.get('context_param'):
+        tool_args[context_param] = Context()
+    result = tool['fn'](**tool_args)
+    if iscoroutine(result):
+        return loop.run_coroutine(result)
+    return result
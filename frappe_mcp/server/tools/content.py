@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import base64
+import io
+import mimetypes
+import os
+from collections.abc import Iterator
+from typing import Any
+
+from frappe_mcp.server import codec
+
+__all__ = [
+    'encode_binary',
+    'get_mime_type',
+    'is_binary',
+    'is_text_stream',
+    'iter_chunks',
+    'read_text',
+]
+
+# Bytes encoded at a time, a multiple of 3 so that the base64 chunks can be
+# concatenated without padding in between.
+CHUNK_SIZE = 3 * 256 * 1024
+
+# Leading bytes of common file formats, checked in order.
+_SIGNATURES: list[tuple[bytes, str]] = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'%PDF-', 'application/pdf'),
+    (b'ID3', 'audio/mpeg'),
+    (b'\xff\xfb', 'audio/mpeg'),
+    (b'OggS', 'audio/ogg'),
+    (b'fLaC', 'audio/flac'),
+    (b'PK\x03\x04', 'application/zip'),
+]
+
+# RIFF containers hold the format at bytes 8 to 12.
+_RIFF_FORMATS = {
+    b'WEBP': 'image/webp',
+    b'WAVE': 'audio/wav',
+}
+
+
+def is_binary(value: Any) -> bool:
+    """True for bytes-like values and binary file objects returned by tools.
+
+    Files opened in text mode are not binary, see `is_text_stream`.
+    """
+    return isinstance(
+        value, (bytes, bytearray, memoryview, io.RawIOBase, io.BufferedIOBase)
+    )
+
+
+def is_text_stream(value: Any) -> bool:
+    """True for files opened in text mode, their reads return str."""
+    return isinstance(value, io.TextIOBase)
+
+
+def read_text(value: io.TextIOBase) -> str:
+    """Reads a text stream whole and closes it."""
+    try:
+        return value.read()
+    finally:
+        value.close()
+
+
+def get_mime_type(head: bytes, name: str | None = None) -> str:
+    """Guesses the mime type from the leading bytes of the data, falls back to
+    the file name's extension."""
+    for signature, mime_type in _SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+
+    if head.startswith(b'RIFF') and (mime_type := _RIFF_FORMATS.get(head[8:12])):
+        return mime_type
+
+    if name and (mime_type := mimetypes.guess_type(name)[0]):
+        return mime_type
+    return 'application/octet-stream'
+
+
+def encode_binary(value: Any) -> codec.RawJSON:
+    """Encodes bytes or a binary file object as a content block.
+
+    Images and audio are encoded as image and audio content, anything else as
+    an embedded blob resource. The data is base64 encoded a chunk at a time
+    into the chunks of the returned JSON, so neither the base64 string nor the
+    content block's JSON is built as a whole. File objects are read a chunk at
+    a time and closed.
+    """
+    name = getattr(value, 'name', None)
+    name = name if isinstance(name, str) else None
+
+    chunks = iter_chunks(value)
+    first = next(chunks, b'')
+    mime_type = get_mime_type(bytes(first[:16]), name)
+    data = [base64.b64encode(first)]
+    data.extend(base64.b64encode(chunk) for chunk in chunks)
+
+    if mime_type.startswith(('image/', 'audio/')):
+        kind = b'image' if mime_type.startswith('image/') else b'audio'
+        return codec.RawJSON(
+            b'{"type":"%s","mimeType":%s,"data":"' % (kind, codec.dumps(mime_type)),
+            *data,
+            b'"}',
+        )
+
+    uri = f'file://{os.path.abspath(name)}' if name else 'blob:'
+    return codec.RawJSON(
+        b'{"type":"resource","resource":{"uri":%s,"mimeType":%s,"blob":"'
+        % (codec.dumps(uri), codec.dumps(mime_type)),
+        *data,
+        b'"}}',
+    )
+
+
+def iter_chunks(value: Any) -> Iterator[bytes | memoryview]:
+    """Yields the data of bytes or a binary file object in chunks of
+    `CHUNK_SIZE` bytes, file objects are closed once read."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        view = memoryview(value).cast('B')
+        for start in range(0, len(view), CHUNK_SIZE):
+            yield view[start : start + CHUNK_SIZE]
+        return
+
+    try:
+        pending = b''
+        while block := value.read(CHUNK_SIZE):
+            # Reads can be short, e.g. for sockets or pipes
+            pending += block
+            size = len(pending) - len(pending) % 3
+            if size:
+                yield pending[:size]
+                pending = pending[size:]
+        if pending:
+            yield pending
+    finally:
+        if callable(close := getattr(value, 'close', None)):
+            close()
@@ -1,78 +1,496 @@
 from __future__ import annotations
 
-import json
+import contextvars
+import inspect
+import threading
 from collections import OrderedDict
+from collections.abc import Callable, Generator
 from typing import Any
 
+import jsonschema
 from pydantic import ValidationError
 
 import frappe_mcp.server.tools as tools
-from frappe_mcp.server import types
+from frappe_mcp.server import loop, types
+from frappe_mcp.server.bulkhead import Bulkheads
+from frappe_mcp.server.cache import ResultCache
+from frappe_mcp.server.codec import RawJSON, dumps, encode, loads
+from frappe_mcp.server.context import CancellationToken, Context
+from frappe_mcp.server.encoder import get_result_encoder
+from frappe_mcp.server.errors import MCPError, RequestTimeoutError
+from frappe_mcp.server.process import ProcessPool
+from frappe_mcp.server.registry import Registry
+from frappe_mcp.server.tools.content import (
+    encode_binary,
+    is_binary,
+    is_text_stream,
+    read_text,
+)
+from frappe_mcp.server.tools.stream import ToolStream
 
+# Number of keys listed in the 'summary' text of a structured result.
+SUMMARY_KEYS = 10
 
-def handle_call_tool(params, tool_registry: OrderedDict[str, tools.Tool]):
+CONTENT_BLOCK_TYPES = (
+    types.TextContent,
+    types.ImageContent,
+    types.AudioContent,
+    types.ResourceLink,
+    types.EmbeddedResource,
+)
+
+
+def handle_call_tool(
+    params,
+    tool_registry: OrderedDict[str, tools.Tool],
+    *,
+    stream: bool = False,
+    result_cache: ResultCache | None = None,
+    timeout: float | None = None,
+    token: CancellationToken | None = None,
+    notify: Callable[[types.JSONRPCNotification], None] | None = None,
+    process_pool: ProcessPool | None = None,
+    structured_text: tools.StructuredText = 'json',
+    bulkheads: Bulkheads | None = None,
+    session_id: str | None = None,
+):
     """
     Handles the tools/call request from the client.
+
+    Returns a `CallToolResult`, it is serialized once when the response is
+    written. If `stream` is True, i.e. the client accepts SSE, and the tool
+    streams its results, or reports progress and the request has a
+    `progressToken`, a `ToolStream` is returned instead.
+
+    Otherwise progress notifications reported by the tool are passed to
+    `notify`.
+
+    If a `result_cache` is passed and the tool is cacheable, the encoded
+    result is returned from and stored in the cache.
+
+    The call, or the stream, is bounded by the tool's timeout, or `timeout`
+    if the tool does not set one. `token` is passed to the tool's `Context`. A
+    `RequestTimeoutError` or `RequestCancelledError` is raised if the call
+    times out or the token is cancelled.
+
+    Tools with `executor='process'` are run in `process_pool`, without a pool
+    they are run in the calling thread.
+
+    `structured_text` sets the text content sent along with the structured
+    content of dict results, see `get_structured_text`.
+
+    If `bulkheads` are passed the call, or the stream until it is closed,
+    holds a slot of the tool's bulkheads. A call that times out holds it
+    until the tool stops running. Cached results don't take a slot. A
+    `ServerBusyError` is raised if no slot is free in time.
+
+    `session_id` is set on the tool's `Context`.
+
+    Raises a `ValueError` if the arguments don't match the tool's input schema.
     """
     call_params = types.CallToolRequestParams.model_validate(params)
     tool_name = call_params.name
     arguments = call_params.arguments or {}
+    progress_token = call_params.meta.progressToken if call_params.meta else None
+    token = token or CancellationToken()
 
     if tool_name not in tool_registry:
         # TODO: Figure out how to return a proper JSON-RPC error
         # For now, return a result with an error indication.
         error_content = types.TextContent(text=f"Tool '{tool_name}' not found.")
         result = types.CallToolResult(content=[error_content], isError=True)
-        return result.model_dump(exclude_none=True, by_alias=True)
+        return result
 
     tool_info = tool_registry[tool_name]
     fn = tool_info.get('fn')
 
-    if not fn:
+    if not fn and tool_info.get('path') is None:
         error_content = types.TextContent(
             text=f"Tool '{tool_name}' has no associated function."
         )
         result = types.CallToolResult(content=[error_content], isError=True)
-        return result.model_dump(exclude_none=True, by_alias=True)
+        return result
 
     try:
-        return _get_result(fn, arguments)
+        tools.get_validator(tool_info)(arguments)
+    except jsonschema.ValidationError as e:
+        # Raised as a ValueError so that it is returned as INVALID_PARAMS
+        raise ValueError(
+            f"Invalid arguments for tool '{tool_name}': {e.message} (at {e.json_path})"
+        ) from e
+
+    # Lazy tools are imported once their arguments are valid
+    if tool_info.get('path') is not None:
+        try:
+            tools.load_tool(tool_info)
+        except Exception as e:
+            error_content = types.TextContent(
+                text=f"Error loading tool '{tool_name}': {e}"
+            )
+            return types.CallToolResult(content=[error_content], isError=True)
+
+    if (tool_timeout := tool_info.get('timeout')) is not None:
+        timeout = tool_timeout
+
+    reports_progress = progress_token is not None and tool_info.get('context_param')
+    if stream and (tool_info.get('stream') or reports_progress):
+        return ToolStream(
+            tool_info,
+            arguments,
+            token=token,
+            progress_token=progress_token,
+            structured_text=structured_text,
+            session_id=session_id,
+            timeout=timeout,
+            release=(
+                bulkheads.acquire(tool_info, token) if bulkheads is not None else None
+            ),
+        )
+
+    ctx = None
+    if tool_info.get('context_param'):
+        ctx = Context(
+            token=token,
+            progress_token=progress_token,
+            notify=notify,
+            session_id=session_id,
+        )
+
+    def call():
+        release = None
+        if bulkheads is not None:
+            release = bulkheads.acquire(tool_info, token)
+
+        return _call_tool(
+            tool_info,
+            arguments,
+            ctx,
+            timeout=timeout,
+            token=token,
+            process_pool=process_pool,
+            structured_text=structured_text,
+            release=release,
+        )
+
+    ttl = result_cache.get_ttl(tool_info) if result_cache is not None else None
+    if result_cache is None or ttl is None:
+        return call()
+
+    key = result_cache.get_key(tool_name, arguments)
+    if structured_text != 'json':
+        # The result's text content differs
+        key = f'{key}:{structured_text}'
+    if (cached := result_cache.get(key)) is not None:
+        return RawJSON(cached)
+
+    result = call()
+    if isinstance(result, types.CallToolResult) and result.isError:
+        return result
+
+    encoded = encode(result)
+    result_cache.set(key, bytes(encoded), ttl)
+    return encoded
+
+
+def _call_tool(
+    tool: tools.Tool,
+    arguments,
+    ctx: Context | None,
+    *,
+    timeout: float | None,
+    token: CancellationToken,
+    process_pool: ProcessPool | None = None,
+    structured_text: tools.StructuredText = 'json',
+    release: Callable[[], None] | None = None,
+) -> types.CallToolResult | RawJSON:
+    """Calls the tool, `release` is called once the tool has stopped running.
+
+    A call that times out in a thread returns before the tool does, `release`
+    is then called by the thread when the tool returns.
+    """
+    in_process = tool.get('executor') == 'process' and process_pool is not None
+    if timeout is not None and not in_process and token.error is None:
+        result = _get_result_with_timeout(
+            tool, arguments, ctx, token, timeout, structured_text, on_done=release
+        )
+    else:
+        try:
+            if token.error is not None:
+                raise token.error
+
+            if in_process:
+                # The worker is killed on timeout, so the tool has stopped
+                # running once this returns
+                assert process_pool is not None
+                result = process_pool.call(
+                    tool,
+                    arguments,
+                    timeout=timeout,
+                    token=token,
+                    structured_text=structured_text,
+                )
+            else:
+                result = _get_safe_result(tool, arguments, ctx, token, structured_text)
+        finally:
+            if release is not None:
+                release()
+
+    # The client is no longer waiting for the result
+    if token.error is not None:
+        raise token.error
+    return result
+
+
+def _get_result_with_timeout(
+    tool: tools.Tool,
+    arguments,
+    ctx: Context | None,
+    token: CancellationToken,
+    timeout: float,
+    structured_text: tools.StructuredText = 'json',
+    *,
+    on_done: Callable[[], None] | None = None,
+) -> types.CallToolResult | RawJSON:
+    """Runs the tool in a separate thread and waits for at most `timeout`
+    seconds, or until the token is cancelled.
+
+    A thread can't be stopped, after a timeout or cancellation it keeps
+    running in the background until the tool returns or checks its context.
+    `on_done` is called by the thread once the tool returns.
+    """
+    done = threading.Event()
+    outcome: list[Any] = []
+
+    def run():
+        try:
+            outcome.append(
+                _get_safe_result(tool, arguments, ctx, token, structured_text)
+            )
+        except BaseException as e:
+            outcome.append(e)
+        finally:
+            done.set()
+            if on_done is not None:
+                on_done()
+
+    thread = threading.Thread(
+        target=contextvars.copy_context().run,
+        args=(run,),
+        name=f'frappe-mcp-tool-{tool["name"]}',
+        daemon=True,
+    )
+    token.add_callback(done.set)
+    thread.start()
+
+    if not done.wait(timeout):
+        error = RequestTimeoutError(
+            f"Tool '{tool['name']}' timed out after {timeout} seconds"
+        )
+        token.cancel(error)
+        raise error
+
+    if not outcome:
+        # Woken up by the token being cancelled
+        assert token.error is not None
+        raise token.error
+
+    if isinstance(outcome[0], BaseException):
+        raise outcome[0]
+    return outcome[0]
+
+
+def _get_safe_result(
+    tool: tools.Tool,
+    arguments,
+    ctx: Context | None,
+    token: CancellationToken,
+    structured_text: tools.StructuredText = 'json',
+) -> types.CallToolResult | RawJSON:
+    try:
+        return _get_result(tool, arguments, ctx, token, structured_text)
+    except MCPError:
+        raise
     except Exception as e:
-        error_content = types.TextContent(text=f"Error calling tool '{tool_name}': {e}")
+        error_content = types.TextContent(
+            text=f"Error calling tool '{tool['name']}': {e}"
+        )
         result = types.CallToolResult(content=[error_content], isError=True)
-        return result.model_dump(exclude_none=True, by_alias=True)
+        return result
+
+
+def _get_result(
+    tool: tools.Tool,
+    arguments,
+    ctx: Context | None = None,
+    token: CancellationToken | None = None,
+    structured_text: tools.StructuredText = 'json',
+):
+    if context_param := tool.get('context_param'):
+        ctx = ctx or Context(token=token)
+        arguments = {**arguments, context_param: ctx}
+
+    tool_result = tool['fn'](**arguments)
+    if inspect.iscoroutine(tool_result):
+        tool_result = loop.run_coroutine(tool_result, token)
+    elif inspect.isasyncgen(tool_result):
+        tool_result = loop.iter_async(tool_result, token)
+
+    if isinstance(tool_result, Generator):
+        content = []
+        for item in tool_result:
+            if token is not None and token.error is not None:
+                tool_result.close()
+                raise token.error
+            content.append(get_content_block(item))
+        return get_content_result(content)
 
+    if ctx is not None and ctx.content:
+        content = [get_content_block(item) for item in ctx.content]
+        if tool_result is not None:
+            content.append(get_content_block(tool_result))
+        return get_content_result(content)
 
-def _get_result(fn, arguments):
-    # TODO: check if tool_result is list of content blocks, if so, return it as is
+    if isinstance(tool_result, types.CallToolResult):
+        return tool_result
 
-    tool_result = fn(**arguments)
-    content = types.TextContent(text='')
-    if isinstance(tool_result, str):
-        content.text = tool_result
+    if (
+        isinstance(tool_result, CONTENT_BLOCK_TYPES)
+        or is_binary(tool_result)
+        or is_text_stream(tool_result)
+    ):
+        return get_content_result([get_content_block(tool_result)])
+
+    if (
+        isinstance(tool_result, (list, tuple))
+        and tool_result
+        and all(isinstance(item, CONTENT_BLOCK_TYPES) for item in tool_result)
+    ):
+        return types.CallToolResult(content=list(tool_result), isError=False)
+
+    if isinstance(tool_result, str) and tool_result:
+        content = types.TextContent(text=tool_result)
+        return types.CallToolResult(content=[content], isError=False)
 
-    structured = None
     try:
-        content.text = content.text or json.dumps(tool_result)
-        if isinstance(tool_result, dict):
-            structured = tool_result
-    except Exception:
-        content.text = content.text or str(tool_result)
-
-    result = types.CallToolResult(
-        content=[content], structuredContent=structured, isError=False
+        encoded = get_result_encoder().dumps(tool_result)
+    except (TypeError, ValueError):
+        content = types.TextContent(text=str(tool_result))
+        return types.CallToolResult(content=[content], isError=False)
+
+    return get_encoded_result(tool_result, encoded, structured_text)
+
+
+def get_encoded_result(
+    value: Any,
+    encoded: bytes,
+    structured_text: tools.StructuredText = 'json',
+) -> types.CallToolResult | RawJSON:
+    """Returns the result for a value returned by a tool, given its JSON.
+
+    Values encoded as a JSON object are sent as structured content. The JSON
+    is written into the result as is rather than being encoded again.
+    """
+    if not encoded.startswith(b'{'):
+        content = types.TextContent(text=encoded.decode())
+        return types.CallToolResult(content=[content], isError=False)
+
+    if structured_text == 'json':
+        text = encoded.decode()
+    else:
+        keys = value if isinstance(value, dict) else loads(encoded)
+        text = get_structured_text(keys, structured_text)
+
+    content = b'[]'
+    if text is not None:
+        content = b'[{"type":"text","text":' + dumps(text) + b'}]'
+    return RawJSON(
+        b'{"content":',
+        content,
+        b',"structuredContent":',
+        encoded,
+        b',"isError":false}',
     )
 
-    return result.model_dump(exclude_none=True, by_alias=True)
 
+def get_content_block(value: Any) -> types.ContentBlock | RawJSON:
+    """Converts a single value produced by a tool into a content block.
+
+    Bytes and binary file objects are returned as an encoded content block,
+    see `encode_binary`. Files opened in text mode are read as text.
+    """
+    if isinstance(value, CONTENT_BLOCK_TYPES):
+        return value
+    if isinstance(value, str):
+        return types.TextContent(text=value)
+    if is_binary(value):
+        return encode_binary(value)
+    if is_text_stream(value):
+        return types.TextContent(text=read_text(value))
+    return types.TextContent(text=safe_dumps(value))
+
+
+def get_structured_text(
+    value: dict[str, Any], mode: tools.StructuredText
+) -> str | None:
+    """Returns the text content sent along with the structured content of a
+    result.
+
+    'json' is the JSON of the result, as clients that don't read structured
+    content expect. 'summary' lists the result's keys, 'none' sends no text.
+    """
+    if mode == 'none':
+        return None
+    if mode == 'summary':
+        keys = list(value)
+        names = ', '.join(str(k) for k in keys[:SUMMARY_KEYS])
+        if len(keys) > SUMMARY_KEYS:
+            names += f' and {len(keys) - SUMMARY_KEYS} more'
+        return f'Structured result with keys: {names}'
+    return get_result_encoder().dumps(value).decode()
+
+
+def get_content_result(
+    content: list[types.ContentBlock | RawJSON],
+) -> types.CallToolResult | RawJSON:
+    """Returns a result holding the content blocks.
+
+    If any of the blocks is already encoded the result is encoded around them,
+    so that large binary content is not copied.
+    """
+    if not any(isinstance(block, RawJSON) for block in content):
+        return types.CallToolResult(content=content, isError=False)
+
+    chunks = [b'{"content":[']
+    for i, block in enumerate(content):
+        if i:
+            chunks.append(b',')
+        chunks.extend(encode(block).chunks)
+    chunks.append(b'],"isError":false}')
+    return RawJSON(*chunks)
 
-def handle_list_tools(params, tool_registry: OrderedDict[str, tools.Tool]):
+
+def handle_list_tools(
+    params,
+    tool_registry: OrderedDict[str, tools.Tool],
+    *,
+    page_size: int | None = None,
+):
     """
     Handles the tools/list request from the client.
     https://modelcontextprotocol.io/specification/2025-06-18/tools/list#toolslist
+
+    Tools in a `Registry` are validated and encoded when registered, the
+    cached list result is returned as is. If `page_size` is set the result is
+    paginated.
     """
-    # TODO: add pagination support
-    types.ListToolsRequestParams.model_validate(params)
+    list_params = types.ListToolsRequestParams.model_validate(params)
+
+    if isinstance(tool_registry, Registry):
+        if page_size is None and list_params.cursor is None:
+            return tool_registry.get_list_result()
+        return tool_registry.get_page(
+            list_params.cursor, page_size or len(tool_registry)
+        )
 
     tool_list = []
     for tool_info in tool_registry.values():
@@ -80,10 +498,22 @@ def handle_list_tools(params, tool_registry: OrderedDict[str, tools.Tool]):
             tool_list.append(tool)
 
     result = types.ListToolsResult(tools=tool_list, nextCursor=None)
-    return result.model_dump(exclude_none=True, by_alias=True)
+    return result
 
 
 def get_validated_tool(tool: tools.Tool):
+    """Returns the tool as sent to the client, or None if it is invalid."""
+    try:
+        return get_tool_description(tool)
+    except ValidationError:
+        return None
+
+
+def get_tool_description(tool: tools.Tool) -> types.Tool:
+    """Returns the tool as sent to the client.
+
+    Raises a pydantic `ValidationError` (a `ValueError`) if the tool is invalid.
+    """
     t = {
         'name': tool.get('name'),
         'description': tool.get('description'),
@@ -97,15 +527,11 @@ def get_validated_tool(tool: tools.Tool):
     if t['annotations'] is None:
         del t['annotations']
 
-    try:
-        return types.Tool.model_validate(t)
-    except ValidationError as e:
-        print(e)
-    return None
+    return types.Tool.model_validate(t)
 
 
 def safe_dumps(data: Any) -> str:
     try:
-        return json.dumps(data)
-    except Exception:
+        return get_result_encoder().dumps(data).decode()
+    except (TypeError, ValueError):
         return str(data)
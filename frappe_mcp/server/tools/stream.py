@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import contextvars
+import queue
+import threading
+from collections.abc import Callable, Iterator
+from inspect import (
+    isasyncgenfunction,
+    iscoroutine,
+    iscoroutinefunction,
+    isgeneratorfunction,
+)
+from typing import Any
+
+import frappe_mcp.server.tools as tools
+import frappe_mcp.server.tools.handlers as handlers
+from frappe_mcp.server import loop, types
+from frappe_mcp.server.context import CancellationToken, Context
+from frappe_mcp.server.errors import MCPError, RequestTimeoutError
+
+__all__ = ['ToolStream']
+
+# Number of content blocks a tool can get ahead of the client before
+# Context.send blocks.
+MAX_PENDING = 64
+
+_CONTENT = 'content'
+_DONE = 'done'
+_ERROR = 'error'
+_CANCELLED = 'cancelled'
+
+
+class ToolStream:
+    """Iterates over the content blocks of a tool call as they are produced.
+
+    Generator tools are advanced in the iterating thread, async generators
+    are advanced on the shared event loop. Other tools send content through
+    their `Context`, these are run in a separate thread (or on the event loop
+    if async) so that content can be flushed while the tool is running.
+
+    Errors raised by the tool are yielded as a text content block after
+    which `is_error` is set. An `MCPError`, e.g. once `token` is cancelled or
+    the call times out, is raised as for calls that aren't streamed.
+
+    If `progress_token` is set, progress reported by the tool through its
+    `Context` is yielded as `JSONRPCNotification`s in between the content
+    blocks. A dict returned by a tool that sent no content is kept as
+    `structured_content`, `structured_text` sets the text sent along with it.
+
+    If `timeout` is set, `token` is cancelled with a `RequestTimeoutError`
+    once iteration has taken that many seconds. Generator tools are only
+    stopped when they next yield.
+
+    Callbacks passed to `call_on_close` are called when the stream is closed,
+    whether or not it was iterated. `release` is called once the tool has
+    stopped running: by the tool's thread when it returns, which can be after
+    the stream is closed on a timeout, otherwise when the stream is closed.
+    """
+
+    tool: tools.Tool
+    arguments: dict[str, Any]
+    is_error: bool
+    token: CancellationToken
+    progress_token: str | int | None
+    structured_content: dict[str, Any] | None
+
+    def __init__(
+        self,
+        tool: tools.Tool,
+        arguments: dict[str, Any],
+        *,
+        token: CancellationToken | None = None,
+        progress_token: str | int | None = None,
+        structured_text: tools.StructuredText = 'json',
+        session_id: str | None = None,
+        timeout: float | None = None,
+        release: Callable[[], None] | None = None,
+    ):
+        self.tool = tool
+        self.arguments = arguments
+        self.is_error = False
+        self.token = token or CancellationToken()
+        self.progress_token = progress_token
+        self.session_id = session_id
+        self.timeout = timeout
+        self.structured_text = structured_text
+        self.structured_content = None
+        self._on_close: list[Callable[[], None]] = []
+        self._release = release
+        self._release_lock = threading.Lock()
+        self._thread_started = False
+
+        # Iteration happens when the response body is written, this can be
+        # after the request context has been torn down.
+        self._context = contextvars.copy_context()
+
+    def __iter__(self) -> Iterator[types.ContentBlock | types.JSONRPCNotification]:
+        timer = self._start_timer()
+        try:
+            fn = self.tool['fn']
+            if isgeneratorfunction(fn) or isasyncgenfunction(fn):
+                items = self._iter_generator()
+            else:
+                items = self._iter_thread()
+
+            for item in items:
+                if self.token.error is not None:
+                    raise self.token.error
+                if isinstance(item, types.JSONRPCNotification):
+                    yield item
+                else:
+                    yield handlers.get_content_block(item)
+        except MCPError:
+            raise
+        except Exception as e:
+            self.is_error = True
+            yield types.TextContent(
+                text=f"Error calling tool '{self.tool['name']}': {e}"
+            )
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    def _start_timer(self) -> threading.Timer | None:
+        if self.timeout is None:
+            return None
+
+        error = RequestTimeoutError(
+            f"Tool '{self.tool['name']}' timed out after {self.timeout} seconds"
+        )
+        timer = threading.Timer(self.timeout, self.token.cancel, args=(error,))
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def _iter_generator(self) -> Iterator[Any]:
+        pending: list[Any] = []
+        arguments = self._get_arguments(pending.append, pending.append)
+        generator = self._context.run(self.tool['fn'], **arguments)
+        if not isinstance(generator, Iterator):
+            generator = loop.iter_async(generator, self.token)
+
+        while True:
+            try:
+                item = self._context.run(next, generator)
+            except StopIteration:
+                yield from pending
+                return
+
+            yield from pending
+            pending.clear()
+            yield item
+
+    def _iter_thread(self) -> Iterator[Any]:
+        # Async tools send from the event loop thread, which must not block
+        is_async = iscoroutinefunction(self.tool['fn'])
+        items: queue.Queue[tuple[str, Any]] = queue.Queue(
+            maxsize=0 if is_async else MAX_PENDING
+        )
+        closed = threading.Event()
+
+        def put(kind: str, value: Any):
+            # Stop blocking the tool if the client has gone away
+            while not closed.is_set():
+                try:
+                    items.put((kind, value), timeout=1)
+                    return
+                except queue.Full:
+                    continue
+
+        def run():
+            try:
+                value = self.tool['fn'](**arguments)
+                if iscoroutine(value):
+                    value = loop.run_coroutine(value, self.token)
+                put(_DONE, value)
+            except Exception as e:
+                put(_ERROR, e)
+            finally:
+                self._release_slot()
+
+        def wake():
+            # Stops waiting for the tool once the call is cancelled
+            try:
+                items.put_nowait((_CANCELLED, None))
+            except queue.Full:
+                pass
+
+        self.token.add_callback(wake)
+        sent = 0
+
+        def send(content: Any):
+            nonlocal sent
+            sent += 1
+            put(_CONTENT, content)
+
+        arguments = self._get_arguments(send, lambda n: put(_CONTENT, n))
+        thread = threading.Thread(
+            target=self._context.run,
+            args=(run,),
+            name=f'frappe-mcp-tool-{self.tool["name"]}',
+            daemon=True,
+        )
+        self._thread_started = True
+        thread.start()
+
+        try:
+            while True:
+                kind, value = items.get()
+                if kind == _CONTENT:
+                    yield value
+                elif kind == _DONE:
+                    if isinstance(value, dict) and not sent:
+                        self.structured_content = value
+                        if self.structured_text != 'json':
+                            value = handlers.get_structured_text(
+                                value, self.structured_text
+                            )
+                    if value is not None:
+                        yield value
+                    return
+                elif kind == _CANCELLED:
+                    assert self.token.error is not None
+                    raise self.token.error
+                else:
+                    raise value
+        finally:
+            closed.set()
+
+    def _get_arguments(self, send, notify) -> dict[str, Any]:
+        if context_param := self.tool.get('context_param'):
+            context = Context(
+                send=send,
+                token=self.token,
+                progress_token=self.progress_token,
+                notify=notify,
+                session_id=self.session_id,
+            )
+            return {**self.arguments, context_param: context}
+        return self.arguments
+
+    def call_on_close(self, callback: Callable[[], None]):
+        self._on_close.append(callback)
+
+    def close(self):
+        callbacks, self._on_close = self._on_close, []
+        for callback in callbacks:
+            callback()
+        if not self._thread_started:
+            self._release_slot()
+
+    def _release_slot(self):
+        with self._release_lock:
+            release, self._release = self._release, None
+        if release is not None:
+            release()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import base64
+import io
+import json
+
+import pytest
+
+from frappe_mcp.server import codec, types
+from frappe_mcp.server.tools import content, get_tool
+from frappe_mcp.server.tools.handlers import _get_result
+
+PNG = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 4
+
+
+def _result(fn) -> dict:
+    return json.loads(bytes(codec.encode(_get_result(get_tool(fn), {}))))
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Exercises encoding across several chunks
+    monkeypatch.setattr(content, 'CHUNK_SIZE', 3 * 16)
+
+
+@pytest.mark.parametrize(
+    'head, name, expected',
+    [
+        (PNG, None, 'image/png'),
+        (b'\xff\xd8\xff\xe0', None, 'image/jpeg'),
+        (b'RIFF\x00\x00\x00\x00WEBPVP8 ', None, 'image/webp'),
+        (b'RIFF\x00\x00\x00\x00WAVEfmt ', None, 'audio/wav'),
+        (b'%PDF-1.7', None, 'application/pdf'),
+        (b'col1,col2', 'report.csv', 'text/csv'),
+        (b'\x00\x01', None, 'application/octet-stream'),
+    ],
+)
+def test_get_mime_type(head, name, expected):
+    assert content.get_mime_type(head, name) == expected
+
+
+def test_bytes_result():
+    def preview():
+        """Returns an image."""
+        return PNG
+
+    result = _result(preview)
+    [block] = result['content']
+    assert block['type'] == 'image'
+    assert block['mimeType'] == 'image/png'
+    assert base64.b64decode(block['data']) == PNG
+    assert result['isError'] is False
+
+
+@pytest.mark.parametrize('size', [0, 1, 47, 48, 49, 1000])
+def test_file_result(size):
+    data = b'%PDF-' + bytes(i % 251 for i in range(size))
+    file = io.BytesIO(data)
+    file.name = 'invoice.pdf'
+
+    def download():
+        """Returns a file."""
+        return file
+
+    [block] = _result(download)['content']
+    assert block['type'] == 'resource'
+    assert block['resource']['uri'].endswith('/invoice.pdf')
+    assert block['resource']['mimeType'] == 'application/pdf'
+    assert base64.b64decode(block['resource']['blob']) == data
+    assert file.closed
+
+
+def test_text_file_result(tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_text('hello')
+    files = []
+
+    def read_notes():
+        """Returns a file opened in text mode."""
+        files.append(open(path))
+        return files[0]
+
+    assert not content.is_binary(io.StringIO('hello'))
+    with open(path, 'rb') as f:
+        assert content.is_binary(f)
+    assert _result(read_notes)['content'] == [{'type': 'text', 'text': 'hello'}]
+    assert files[0].closed
+
+
+def test_encoded_in_chunks():
+    encoded = content.encode_binary(PNG)
+    # Held as one base64 chunk per read chunk
+    assert len(encoded.chunks) > 10
+    assert max(len(c) for c in encoded.chunks[1:-1]) == 4 * 16
+
+
+def test_content_blocks_pass_through():
+    image = types.ImageContent(data='aGk=', mimeType='image/png')
+    link = types.ResourceLink(name='Invoice', uri='file:///invoice.pdf')
+
+    def single():
+        """Returns a content block."""
+        return image
+
+    def several():
+        """Returns content blocks."""
+        return [image, link]
+
+    assert _get_result(get_tool(single), {}).content == [image]
+    assert _get_result(get_tool(several), {}).content == [image, link]
+
+
+def test_mixed_generator_content():
+    def pages():
+        """Yields text and an image."""
+        yield 'Page 1'
+        yield PNG
+
+    [text, image] = _result(pages)['content']
+    assert text == {'type': 'text', 'text': 'Page 1'}
+    assert base64.b64decode(image['data']) == PNG
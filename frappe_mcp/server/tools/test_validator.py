@@ -0,0 +1,154 @@
+import pytest
+from jsonschema import Draft202012Validator, SchemaError, ValidationError
+
+from frappe_mcp.server.tools.validator import _is_supported, compile_validator
+
+SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'name': {
+            'type': 'string',
+            'minLength': 2,
+            'maxLength': 5,
+            'pattern': '^[a-z]+$',
+        },
+        'count': {'type': 'integer', 'minimum': 0, 'exclusiveMaximum': 10},
+        'ratio': {'type': 'number'},
+        'flag': {'type': 'boolean'},
+        'tag': {'type': ['string', 'null']},
+        'mode': {'enum': ['read', 'write']},
+        'version': {'const': 1},
+        'value': {'anyOf': [{'type': 'integer'}, {'type': 'string'}]},
+        'rows': {
+            'type': 'array',
+            'minItems': 1,
+            'maxItems': 2,
+            'items': {
+                'type': 'object',
+                'properties': {'id': {'type': 'integer'}},
+                'required': ['id'],
+                'additionalProperties': False,
+            },
+        },
+        'meta': {'type': 'object', 'additionalProperties': {'type': 'string'}},
+    },
+    'required': ['name'],
+}
+
+# Numbers are compared by value in enum and const, booleans are distinct
+EQUALITY_SCHEMAS = [
+    {'enum': [1, 'a']},
+    {'const': 1},
+    {'const': 1.0},
+    {'enum': [[1, True], {'a': 0}]},
+    {'const': False},
+]
+
+EQUALITY_INSTANCES = [
+    1,
+    1.0,
+    2,
+    True,
+    False,
+    0,
+    'a',
+    [1, True],
+    [1.0, 1],
+    {'a': 0.0},
+    {'a': False},
+]
+
+INSTANCES = [
+    {'name': 'ab'},
+    {},
+    [],
+    {'name': 1},
+    {'name': 'a'},
+    {'name': 'abcdef'},
+    {'name': 'AB'},
+    {'name': 'ab', 'count': 1.0},
+    {'name': 'ab', 'count': 1.5},
+    {'name': 'ab', 'count': True},
+    {'name': 'ab', 'count': -1},
+    {'name': 'ab', 'count': 10},
+    {'name': 'ab', 'ratio': 1},
+    {'name': 'ab', 'ratio': '1'},
+    {'name': 'ab', 'flag': 0},
+    {'name': 'ab', 'tag': None},
+    {'name': 'ab', 'tag': 1},
+    {'name': 'ab', 'mode': 'read'},
+    {'name': 'ab', 'mode': 'delete'},
+    {'name': 'ab', 'version': 1},
+    {'name': 'ab', 'version': True},
+    {'name': 'ab', 'value': 'x'},
+    {'name': 'ab', 'value': 1.5},
+    {'name': 'ab', 'rows': []},
+    {'name': 'ab', 'rows': [{'id': 1}, {'id': 2}, {'id': 3}]},
+    {'name': 'ab', 'rows': [{'id': 1}, {}]},
+    {'name': 'ab', 'rows': [{'id': 1, 'extra': 2}]},
+    {'name': 'ab', 'meta': {'a': 'b'}},
+    {'name': 'ab', 'meta': {'a': 1}},
+]
+
+
+def _get_error(validate, instance):
+    try:
+        validate(instance)
+    except ValidationError as e:
+        return e.message, list(e.path)
+    return None
+
+
+@pytest.mark.parametrize('instance', INSTANCES)
+def test_compiled_validator_matches_jsonschema(instance):
+    validate = compile_validator(SCHEMA)
+    errors = [
+        (e.message, list(e.path))
+        for e in Draft202012Validator(SCHEMA).iter_errors(instance)
+    ]
+
+    error = _get_error(validate, instance)
+    if not errors:
+        assert error is None
+    else:
+        assert error in errors
+
+
+@pytest.mark.parametrize('schema', EQUALITY_SCHEMAS)
+def test_compiled_equality_matches_jsonschema(schema):
+    validate = compile_validator(schema)
+    assert validate.__name__ == 'validate_0'
+    for instance in EQUALITY_INSTANCES:
+        expected = Draft202012Validator(schema).is_valid(instance)
+        assert (_get_error(validate, instance) is None) is expected, instance
+
+
+def test_compile_validator_is_generated():
+    assert _is_supported(SCHEMA)
+    validate = compile_validator(SCHEMA)
+    assert validate.__name__ == 'validate_0'
+
+
+def test_compile_validator_unsupported_keyword():
+    schema = {
+        'type': 'object',
+        'properties': {'a': {'type': 'string', 'format': 'email'}},
+    }
+    assert not _is_supported(schema)
+
+    validate = compile_validator(schema)
+    validate({'a': 'x@example.com'})
+    with pytest.raises(ValidationError):
+        validate({'a': 1})
+
+
+def test_compile_validator_invalid_schema():
+    with pytest.raises(SchemaError):
+        compile_validator({'type': 'unknown'})
+
+
+def test_compile_validator_boolean_schemas():
+    validate = compile_validator({'properties': {'a': False, 'b': True}})
+    validate({'b': 1})
+    with pytest.raises(ValidationError):
+        validate({'a': 1})
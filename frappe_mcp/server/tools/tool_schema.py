@@ -9,8 +9,11 @@ from typing import (
     get_args,
     get_origin,
     get_type_hints,
+    is_typeddict,
 )
 
+from frappe_mcp.server.context import Context
+
 # Mapping of Python types to JSON schema types
 _PY_TO_JSON_TYPE_MAP = {
     int: 'integer',
@@ -106,6 +109,10 @@ def _convert_type_to_json_schema(py_type: Any) -> dict:
         # Handles dict types
         return _handle_dict_type(py_type)
 
+    if is_typeddict(py_type):
+        # Handles TypedDicts, e.g. nested in a returned TypedDict
+        return _handle_typeddict_type(py_type)
+
     if py_type is Any:
         # Handles Any type
         return {}
@@ -152,6 +159,9 @@ def get_input_schema(fn: Callable) -> dict:
             continue
 
         annotation = type_hints.get(name, Any)
+        if _is_context_param(param, annotation):
+            # Passed by the server, not by the client
+            continue
 
         # Convert Python type to a JSON schema property
         prop_schema = _convert_type_to_json_schema(annotation)
@@ -168,6 +178,64 @@ def get_input_schema(fn: Callable) -> dict:
     return input_schema
 
 
+def get_output_schema(fn: Callable) -> dict | None:
+    """
+    Generate a JSON schema for a function's return value from its return
+    annotation.
+
+    Only annotations of values returned as structured content, i.e. dicts and
+    TypedDicts, have a schema. Returns None for any other annotation.
+    """
+    try:
+        annotation = get_type_hints(fn).get('return')
+    except (NameError, TypeError):
+        return None
+
+    if annotation is None:
+        return None
+
+    if annotation is dict or get_origin(annotation) is dict or is_typeddict(annotation):
+        return _convert_type_to_json_schema(annotation)
+    return None
+
+
+def _handle_typeddict_type(py_type: Any) -> dict:
+    """Handle TypedDict types."""
+    try:
+        type_hints = get_type_hints(py_type)
+    except (NameError, TypeError):
+        return {'type': 'object'}
+
+    schema: dict[str, Any] = {
+        'type': 'object',
+        'properties': {
+            key: _convert_type_to_json_schema(value)
+            for key, value in type_hints.items()
+        },
+    }
+    if required := [key for key in type_hints if key in py_type.__required_keys__]:
+        schema['required'] = required
+    return schema
+
+
+def get_context_param(fn: Callable) -> str | None:
+    """Returns the name of the parameter of `fn` that is annotated as `Context`."""
+    try:
+        type_hints = get_type_hints(fn)
+    except (NameError, TypeError):
+        type_hints = {}
+
+    for name, param in inspect.signature(fn).parameters.items():
+        if _is_context_param(param, type_hints.get(name, Any)):
+            return name
+    return None
+
+
+def _is_context_param(param: inspect.Parameter, annotation: Any) -> bool:
+    # String annotation is checked for when type hints can't be resolved
+    return annotation is Context or param.annotation in (Context, 'Context')
+
+
 def get_descriptions(desc: str) -> tuple[str, dict[str, str]]:
     """
     Parses a Google-style docstring to extract the function description and
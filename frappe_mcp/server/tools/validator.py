@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Callable
+from typing import Any
+
+from jsonschema import ValidationError
+from jsonschema.validators import validator_for
+
+__all__ = ['Validator', 'compile_validator']
+
+# Raises a jsonschema.ValidationError if the instance is invalid
+Validator = Callable[[Any], None]
+
+# Keywords that have no effect on validation.
+_ANNOTATIONS = {
+    '$schema',
+    '$id',
+    '$comment',
+    'title',
+    'description',
+    'default',
+    'examples',
+    'deprecated',
+    'readOnly',
+    'writeOnly',
+}
+
+# Keywords that generated validators check, schemas using any other keyword
+# are validated using jsonschema.
+_KEYWORDS = {
+    'type',
+    'properties',
+    'required',
+    'additionalProperties',
+    'items',
+    'enum',
+    'const',
+    'anyOf',
+    'minimum',
+    'maximum',
+    'exclusiveMinimum',
+    'exclusiveMaximum',
+    'minLength',
+    'maxLength',
+    'minItems',
+    'maxItems',
+    'pattern',
+}
+
+# Checks for JSON schema types, these match jsonschema's type checker.
+_TYPE_CHECKS = {
+    'object': 'type({x}) is dict',
+    'array': 'type({x}) is list',
+    'string': 'type({x}) is str',
+    'boolean': 'type({x}) is bool',
+    'null': '{x} is None',
+    'number': '(type({x}) is int or type({x}) is float)',
+    'integer': '(type({x}) is int or type({x}) is float and {x}.is_integer())',
+}
+
+
+def compile_validator(schema: dict[str, Any]) -> Validator:
+    """Compiles a JSON schema into a function that validates instances against it.
+
+    The schema is checked once here. Schemas made up of commonly used keywords
+    (which includes all schemas generated from type annotations) are compiled
+    into Python code specialized to the schema. Other schemas use a jsonschema
+    validator that is created once and reused.
+
+    Raises:
+        jsonschema.SchemaError: If the schema is invalid.
+    """
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+
+    if not _is_supported(schema):
+        return validator_class(schema).validate
+
+    compiler = _Compiler()
+    name = compiler.compile(schema)
+    namespace: dict[str, Any] = {
+        'ValidationError': ValidationError,
+        'get_additional_message': _get_additional_message,
+        'equal': _equal,
+        **compiler.constants,
+    }
+    exec('\n'.join(compiler.lines), namespace)
+    return namespace[name]
+
+
+def _get_additional_message(extra: list[str]) -> str:
+    names = ', '.join(repr(k) for k in extra)
+    verb = 'was' if len(extra) == 1 else 'were'
+    return f'Additional properties are not allowed ({names} {verb} unexpected)'
+
+
+def _equal(a: Any, b: Any) -> bool:
+    """Compares values for enum and const the way jsonschema does.
+
+    Numbers are equal if their values are, so 1 matches 1.0, but booleans are
+    never equal to numbers. Arrays and objects are compared item by item.
+    """
+    if a is b:
+        return True
+    if type(a) is list and type(b) is list:
+        return len(a) == len(b) and all(_equal(x, y) for x, y in zip(a, b, strict=True))
+    if type(a) is dict and type(b) is dict:
+        return a.keys() == b.keys() and all(_equal(v, b[k]) for k, v in a.items())
+    if (type(a) is bool) is not (type(b) is bool):
+        return False
+    return a == b
+
+
+def _is_supported(schema: Any) -> bool:
+    if isinstance(schema, bool):
+        return True
+    if not isinstance(schema, dict):
+        return False
+
+    for key, value in schema.items():
+        if key in _ANNOTATIONS:
+            continue
+        if key not in _KEYWORDS:
+            return False
+
+        if key == 'properties' and not all(_is_supported(s) for s in value.values()):
+            return False
+        if key == 'items' and not _is_supported(value):
+            # Also rejects list (tuple validation) items
+            return False
+        if key == 'additionalProperties' and not _is_supported(value):
+            return False
+        if key == 'anyOf' and not all(_is_supported(s) for s in value):
+            return False
+        if key == 'type' and not all(t in _TYPE_CHECKS for t in _get_types(value)):
+            return False
+
+    return True
+
+
+def _get_types(value: str | list[str]) -> list[str]:
+    return [value] if isinstance(value, str) else list(value)
+
+
+class _Compiler:
+    """Generates a function for each (sub)schema.
+
+    Generated functions raise a ValidationError on the first error, the path
+    to the invalid value is added as the error propagates up to the root.
+    """
+
+    def __init__(self):
+        self.lines: list[str] = []
+        self.constants: dict[str, Any] = {}
+        self._count = 0
+
+    def compile(self, schema: dict[str, Any] | bool) -> str:
+        """Generates the function for `schema` and returns its name."""
+        name = f'validate_{self._count}'
+        self._count += 1
+
+        body = self._get_body(schema)
+        self.lines.append(f'def {name}(x):')
+        self.lines.extend(f'    {line}' for line in body or ['pass'])
+        return name
+
+    def _constant(self, value: Any) -> str:
+        name = f'c_{len(self.constants)}'
+        self.constants[name] = value
+        return name
+
+    def _error(self, message: str) -> str:
+        return f'raise ValidationError({message}, instance=x)'
+
+    def _get_body(self, schema: dict[str, Any] | bool) -> list[str]:
+        if schema is True:
+            return []
+        if schema is False:
+            return [self._error("f'False schema does not allow {x!r}'")]
+
+        assert isinstance(schema, dict)
+        body: list[str] = []
+
+        if 'type' in schema:
+            types = _get_types(schema['type'])
+            check = ' or '.join(_TYPE_CHECKS[t].format(x='x') for t in types)
+            names = ', '.join(repr(t) for t in types)
+            body += [
+                f'if not ({check}):',
+                '    ' + self._error(f'f"{{x!r}} is not of type {names}"'),
+            ]
+
+        if 'enum' in schema:
+            enum = self._constant(schema['enum'])
+            body += [
+                f'if not any(equal(x, v) for v in {enum}):',
+                '    ' + self._error(f"f'{{x!r}} is not one of {{{enum}!r}}'"),
+            ]
+
+        if 'const' in schema:
+            const = self._constant(schema['const'])
+            body += [
+                f'if not equal(x, {const}):',
+                '    ' + self._error(f"f'{{{const}!r}} was expected'"),
+            ]
+
+        if 'anyOf' in schema:
+            validators = ', '.join(self.compile(s) for s in schema['anyOf'])
+            body += [
+                f'for v in ({validators},):',
+                '    try:',
+                '        v(x)',
+                '        break',
+                '    except ValidationError:',
+                '        pass',
+                'else:',
+                '    '
+                + self._error("f'{x!r} is not valid under any of the given schemas'"),
+            ]
+
+        body += self._get_number_checks(schema)
+        body += self._get_string_checks(schema)
+        body += self._get_array_checks(schema)
+        body += self._get_object_checks(schema)
+        return body
+
+    def _get_number_checks(self, schema: dict[str, Any]) -> list[str]:
+        checks = [
+            ('minimum', '<', 'is less than the minimum of'),
+            ('maximum', '>', 'is greater than the maximum of'),
+            ('exclusiveMinimum', '<=', 'is less than or equal to the minimum of'),
+            ('exclusiveMaximum', '>=', 'is greater than or equal to the maximum of'),
+        ]
+        body = []
+        for keyword, operator, message in checks:
+            if keyword not in schema:
+                continue
+            limit = schema[keyword]
+            body += [
+                f'if (type(x) is int or type(x) is float) and x {operator} {limit!r}:',
+                '    ' + self._error(f"f'{{x!r}} {message} {limit!r}'"),
+            ]
+        return body
+
+    def _get_string_checks(self, schema: dict[str, Any]) -> list[str]:
+        body = []
+        if 'minLength' in schema:
+            n = schema['minLength']
+            body += [
+                f'if len(x) < {n}:',
+                '    ' + self._error("f'{x!r} is too short'"),
+            ]
+        if 'maxLength' in schema:
+            n = schema['maxLength']
+            body += [
+                f'if len(x) > {n}:',
+                '    ' + self._error("f'{x!r} is too long'"),
+            ]
+        if 'pattern' in schema:
+            pattern = self._constant(re.compile(schema['pattern']))
+            body += [
+                f'if {pattern}.search(x) is None:',
+                '    '
+                + self._error(f"f'{{x!r}} does not match {{{pattern}.pattern!r}}'"),
+            ]
+
+        if not body:
+            return []
+        return ['if type(x) is str:', *(f'    {line}' for line in body)]
+
+    def _get_array_checks(self, schema: dict[str, Any]) -> list[str]:
+        body = []
+        if 'minItems' in schema:
+            n = schema['minItems']
+            message = 'should be non-empty' if n == 1 else 'is too short'
+            body += [
+                f'if len(x) < {n}:',
+                '    ' + self._error(f"f'{{x!r}} {message}'"),
+            ]
+        if 'maxItems' in schema:
+            n = schema['maxItems']
+            body += [
+                f'if len(x) > {n}:',
+                '    ' + self._error("f'{x!r} is too long'"),
+            ]
+        if 'items' in schema:
+            validate = self.compile(schema['items'])
+            body += [
+                'for i, item in enumerate(x):',
+                '    try:',
+                f'        {validate}(item)',
+                '    except ValidationError as e:',
+                '        e.path.appendleft(i)',
+                '        raise',
+            ]
+
+        if not body:
+            return []
+        return ['if type(x) is list:', *(f'    {line}' for line in body)]
+
+    def _get_object_checks(self, schema: dict[str, Any]) -> list[str]:
+        body = []
+        for key in schema.get('required', []):
+            body += [
+                f'if {key!r} not in x:',
+                '    ' + self._error(repr(f'{key!r} is a required property')),
+            ]
+
+        properties = schema.get('properties', {})
+        for key, subschema in properties.items():
+            validate = self.compile(subschema)
+            body += [
+                f'if {key!r} in x:',
+                '    try:',
+                f'        {validate}(x[{key!r}])',
+                '    except ValidationError as e:',
+                f'        e.path.appendleft({key!r})',
+                '        raise',
+            ]
+
+        additional = schema.get('additionalProperties', True)
+        if additional is False:
+            known = self._constant(frozenset(properties))
+            body += [
+                f'extra = [k for k in x if k not in {known}]',
+                'if extra:',
+                '    ' + self._error('get_additional_message(extra)'),
+            ]
+        elif additional is not True:
+            validate = self.compile(additional)
+            known = self._constant(frozenset(properties))
+            body += [
+                'for k, v in x.items():',
+                f'    if k in {known}:',
+                '        continue',
+                '    try:',
+                f'        {validate}(v)',
+                '    except ValidationError as e:',
+                '        e.path.appendleft(k)',
+                '        raise',
+            ]
+
+        if not body:
+            return []
+        return ['if type(x) is dict:', *(f'    {line}' for line in body)]
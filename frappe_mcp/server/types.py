@@ -1,12 +1,17 @@
 from typing import Any, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 PARSE_ERROR = -32700
 INVALID_REQUEST = -32600
 METHOD_NOT_FOUND = -32601
 INVALID_PARAMS = -32602
 INTERNAL_ERROR = -32603
+# Implementation defined server errors
+REQUEST_TIMEOUT = -32001
+RESOURCE_NOT_FOUND = -32002
+SERVER_BUSY = -32003
+REQUEST_CANCELLED = -32800
 
 # Basic JSON-RPC Types
 JSONRPC_VERSION = "2.0"
@@ -244,8 +249,17 @@ class ListResourceTemplatesResult(BaseModel):
 
 
 # resources/read
+class ReadResourceMeta(BaseModel):
+    # Byte range of a blob resource to read
+    offset: int | None = Field(default=None, ge=0)
+    length: int | None = Field(default=None, ge=0)
+    # ETag of the last read, a read of an unchanged resource is not modified
+    etag: str | None = None
+
+
 class ReadResourceRequestParams(BaseModel):
     uri: str
+    meta: ReadResourceMeta | None = Field(default=None, alias='_meta')
 
 
 class ReadResourceResult(BaseModel):
@@ -263,9 +277,14 @@ class UnsubscribeRequestParams(BaseModel):
 
 
 # tools/call
+class RequestMeta(BaseModel):
+    progressToken: str | int | None = None
+
+
 class CallToolRequestParams(BaseModel):
     name: str
     arguments: dict[str, Any] | None = None
+    meta: RequestMeta | None = Field(default=None, alias='_meta')
 
 
 class CallToolResult(BaseModel):